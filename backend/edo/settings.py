@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'edoAPI.replicas.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'edo.urls'
@@ -81,13 +82,96 @@ WSGI_APPLICATION = 'edo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite unless DB_ENGINE=postgresql; production should run PostgreSQL,
+# which doesn't serialize writers the way SQLite does
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'edo'),
+            'USER': os.environ.get('DB_USER', 'edo'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Reuse connections across requests; check them before reuse so
+            # a restarted server doesn't fail the first request after it
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            },
+            'TEST': {
+                'NAME': os.environ.get('DB_TEST_NAME', 'test_edo'),
+            },
+        }
+    }
+    # psycopg 3's connection pool (DB_POOL_MAX_SIZE > 0) replaces persistent
+    # connections; Django requires CONN_MAX_AGE = 0 with it
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Read replicas (edoAPI.replicas): DB_REPLICAS lists replica hosts
+# (host[:port]) for PostgreSQL, or database files for SQLite. Only views
+# using ReplicaReadMixin / @read_from_replica read from them
+DB_REPLICAS = [replica for replica in os.environ.get('DB_REPLICAS', '').split(',') if replica]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        # Tests read the primary's test database through the replica alias
+        'TEST': {'MIRROR': 'default'},
     }
+    if DB_ENGINE == 'postgresql':
+        host, _, port = replica.partition(':')
+        DATABASES[f'replica_{number}'].update(HOST=host, PORT=port or DATABASES['default']['PORT'])
+    else:
+        DATABASES[f'replica_{number}']['NAME'] = replica
+
+DATABASE_ROUTERS = ['edoAPI.replicas.ReplicaRouter']
+
+DB_REPLICATION = {
+    'REPLICAS': [f'replica_{number}' for number in range(1, len(DB_REPLICAS) + 1)],
+    # Read-your-writes: users read from the primary this long after writing
+    'PIN_SECONDS': 5,
+    # Replicas further behind than this are skipped
+    'MAX_LAG_SECONDS': 10,
+    'LAG_CHECK_SECONDS': 5,
+}
+
+# Production profile for single-node SQLite deployments (edoAPI.sqlite):
+# WAL journal, tuned cache/mmap, BEGIN IMMEDIATE and retried write views
+SQLITE_PROFILE = {
+    'ENABLED': os.environ.get('SQLITE_PROFILE', '') == '1',
+    'SYNCHRONOUS': 'NORMAL',
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    'CACHE_SIZE': -64 * 1024,
+    'BUSY_TIMEOUT': 5000,
+    'RETRIES': 3,
+    'BACKOFF': 0.05,
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and SQLITE_PROFILE['ENABLED']:
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        # sqlite3's own wait for the lock, in seconds
+        'timeout': SQLITE_PROFILE['BUSY_TIMEOUT'] / 1000,
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +231,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Page size for the keyset-paginated lists (views opt in with
+    # pagination_class = KeysetPagination); dropdown sources such as
+    # properties and units stay unpaginated
+    'PAGE_SIZE': 50,
 }
 
 # JWT settings
@@ -178,6 +266,10 @@ SIMPLE_JWT = {
 
     'JTI_CLAIM': 'jti',
 
+    # Embed role claims so permission checks don't need a roles query
+    'TOKEN_OBTAIN_SERIALIZER': 'edoAPI.serializers.RoleClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'edoAPI.serializers.RoleClaimsTokenRefreshSerializer',
+
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
@@ -195,3 +287,66 @@ CORS_ALLOW_CREDENTIALS = True
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Email: messages are queued on the outbox table and sent by
+# `manage.py process_outbox`; point EMAIL_HOST/EMAIL_PORT at a local SMTP
+# stand-in for development
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 30
+
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 60,
+    'MAX_BACKOFF_SECONDS': 3600,
+    'LEASE_SECONDS': 300,
+}
+
+# Real-time chat pushes (edoAPI.pubsub). The in-memory layer only reaches
+# sockets served by the same process; run a single ASGI worker with it, or
+# point LAYER at a broker-backed implementation
+REALTIME = {
+    'LAYER': 'edoAPI.pubsub.InMemoryPubSub',
+    'QUEUE_SIZE': 100,
+}
+
+# Chat retention: read messages older than AFTER_DAYS are moved to the
+# archive table by `manage.py archive_chat_messages`
+CHAT_ARCHIVE = {
+    'AFTER_DAYS': 180,
+    'BATCH_SIZE': 1000,
+}
+
+# Invitation-form autocomplete (edoAPI.contacts). Each landlord's contacts are
+# held in memory for TTL seconds; landlords with more than MAX_CONTACTS are
+# searched in the database instead.
+CONTACT_INDEX = {
+    'TTL': 60,
+    'MAX_LANDLORDS': 256,
+    'MAX_CONTACTS': 50000,
+}
+
+# Caches. Local memory is per process: with several workers, point
+# CACHE_BACKEND/CACHE_LOCATION at a shared cache (e.g.
+# django.core.cache.backends.redis.RedisCache and redis://host:6379/0)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+}
+
+# Landlord dashboard lists cached per landlord (edoAPI.response_cache);
+# `manage.py response_cache_stats` reports hit rates for tuning TTL
+RESPONSE_CACHE = {
+    'ENABLED': os.environ.get('RESPONSE_CACHE', '') == '1',
+    'CACHE': 'default',
+    'TTL': int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+    'LOCK_SECONDS': 10,
+    'WAIT_SECONDS': 2,
+    'POLL_SECONDS': 0.05,
+}
@@ -1,16 +1,15 @@
 from django.contrib import admin
-from .models import User, Role, LandlordProperty, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage
+from .models import User, LandlordProperty, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage, Conversation, OutboundEmail
 
 class UserAdmin(admin.ModelAdmin):
     list_display = ('email', 'first_name', 'last_name', 'get_roles')
     search_fields = ('email', 'first_name', 'last_name')
 
     def get_roles(self, obj):
-        return ", ".join([role.name for role in obj.roles.all()])
+        return ", ".join(obj.role_names())
     get_roles.short_description = 'Roles'
 
 admin.site.register(User, UserAdmin)
-admin.site.register(Role)
 admin.site.register(LandlordProperty)
 admin.site.register(Unit)
 admin.site.register(Tenant)
@@ -19,3 +18,5 @@ admin.site.register(Notice)
 admin.site.register(LandlordMaintenance)
 admin.site.register(MaintenanceMessage)
 admin.site.register(ChatMessage)
+admin.site.register(Conversation)
+admin.site.register(OutboundEmail)
@@ -0,0 +1,165 @@
+"""
+Hot/cold split for chat messages.
+
+archive_chat_messages() moves read messages older than
+CHAT_ARCHIVE['AFTER_DAYS'] from ChatMessage into ArchivedChatMessage in
+batches, each one INSERT ... SELECT plus one DELETE in its own short
+transaction, so the hot table (and its indexes) only holds recent traffic.
+Unread messages and each conversation's latest message stay hot: unread
+counters, mark-read and inbox previews never have to look at the archive.
+
+Reads go through ReadThroughKeysetPagination: a page is served from the hot
+table alone unless it reaches back past the archive horizon (AFTER_DAYS ago),
+in which case the matching archived rows are merged in. Detail requests
+and deletes fall back to the archive by id; archived messages cannot be
+edited. The archive has its own search index (edoAPI.search), which the
+triggers keep in step as rows move in and out.
+"""
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import ArchivedChatMessage, ChatMessage, Conversation
+from .pagination import KeysetPagination
+
+DEFAULTS = {
+    # Read messages older than this are moved to the archive
+    'AFTER_DAYS': 180,
+    'BATCH_SIZE': 1000,
+}
+
+
+def archive_setting(name):
+    return getattr(settings, 'CHAT_ARCHIVE', {}).get(name, DEFAULTS[name])
+
+
+def archive_horizon(now=None):
+    """Everything in the archive is older than this."""
+    return (now or timezone.now()) - timedelta(days=archive_setting('AFTER_DAYS'))
+
+
+def archivable(cutoff):
+    return ChatMessage.objects.filter(timestamp__lt=cutoff, is_read=True).filter(
+        ~Exists(Conversation.objects.filter(last_message=OuterRef('pk')))
+    )
+
+
+def _move(source, target, ids, extra_columns=()):
+    """
+    INSERT ... SELECT the given rows from source into target, then DELETE
+    them. extra_columns are (column, datetime) pairs only the target has.
+    """
+    quote = connection.ops.quote_name
+    columns = [field.column for field in ChatMessage._meta.concrete_fields]
+    placeholders = ', '.join(['%s'] * len(ids))
+    insert_columns = ', '.join(quote(column) for column in columns + [name for name, _ in extra_columns])
+    select_columns = ', '.join([quote(column) for column in columns] + ['%s'] * len(extra_columns))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(target._meta.db_table)} ({insert_columns}) '
+            f'SELECT {select_columns} FROM {quote(source._meta.db_table)} WHERE {quote("id")} IN ({placeholders})',
+            [connection.ops.adapt_datetimefield_value(value) for _, value in extra_columns] + list(ids),
+        )
+    source.objects.filter(pk__in=ids)._raw_delete(connection.alias)
+
+
+def archive_batch(cutoff, batch_size):
+    """Move one batch of archivable messages; returns how many moved."""
+    with transaction.atomic():
+        ids = list(archivable(cutoff).order_by('timestamp', 'id').values_list('pk', flat=True)[:batch_size])
+        if ids:
+            _move(ChatMessage, ArchivedChatMessage, ids, extra_columns=[('archived_at', timezone.now())])
+    return len(ids)
+
+
+@dataclass
+class ArchiveResult:
+    batches: int = 0
+    moved: int = 0
+    seconds: float = 0.0
+
+
+def archive_chat_messages(cutoff=None, batch_size=None, max_batches=None, pause=0.0):
+    """
+    Move archivable messages older than `cutoff` (default: the archive
+    horizon) in batches until none are left or max_batches is reached.
+    `pause` sleeps between batches to leave room for foreground writes.
+    """
+    cutoff = min(cutoff or archive_horizon(), archive_horizon())
+    batch_size = batch_size or archive_setting('BATCH_SIZE')
+    result = ArchiveResult()
+    started = time.perf_counter()
+    while max_batches is None or result.batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        result.batches += 1
+        result.moved += moved
+        if pause:
+            time.sleep(pause)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def restore_chat_messages(newer_than, batch_size=None):
+    """
+    Move archived messages at or after `newer_than` back to the hot table,
+    e.g. after raising AFTER_DAYS, since reads only consult the archive for
+    pages older than the horizon. Returns how many moved.
+    """
+    batch_size = batch_size or archive_setting('BATCH_SIZE')
+    restored = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                ArchivedChatMessage.objects.filter(timestamp__gte=newer_than)
+                .order_by('timestamp', 'id').values_list('pk', flat=True)[:batch_size]
+            )
+            if ids:
+                _move(ArchivedChatMessage, ChatMessage, ids)
+        if not ids:
+            return restored
+        restored += len(ids)
+
+
+def _sort_key(ordering):
+    def key(obj):
+        return tuple(getattr(obj, name.lstrip('-')) for name in ordering)
+    return key
+
+
+class ReadThroughKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over a hot queryset and its archive, as if they were
+    one table. The view supplies the archive side with
+    get_archive_queryset(); it is only queried when the page reaches past
+    the archive horizon (or the hot rows run out).
+    """
+
+    def fetch(self, queryset, ordering, cursor):
+        hot = super().fetch(queryset, ordering, cursor)
+        view = getattr(self, 'view', None)
+        if view is None or not self.needs_archive(hot, ordering, cursor):
+            return hot
+        cold = super().fetch(view.get_archive_queryset(), ordering, cursor)
+        # All ordering fields share a direction (newest or oldest first)
+        merged = sorted(hot + cold, key=_sort_key(ordering), reverse=ordering[0].startswith('-'))
+        return merged[:self.page_size + 1]
+
+    def needs_archive(self, hot, ordering, cursor):
+        horizon = archive_horizon()
+        timestamp = ordering[0].lstrip('-')
+        if not ordering[0].startswith('-'):
+            # Paging back towards newer rows: archived rows only lie ahead
+            # while the cursor is still older than the horizon
+            return cursor is None or cursor['position'][0] < horizon
+        # Paging towards older rows: a full hot page that ends inside the
+        # hot window can't have archived rows interleaved
+        return len(hot) <= self.page_size or getattr(hot[-1], timestamp) < horizon
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
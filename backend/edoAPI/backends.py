@@ -11,9 +11,11 @@ class EmailBackend(ModelBackend):
             return None
         
         try:
-            # Try to fetch the user by email
-            user = User.objects.get(email=email)
+            # Case-insensitive, through the unique email_key index
+            user = User.objects.by_email(email).get()
         except User.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            User().set_password(password)
             return None
         else:
             if user.check_password(password):
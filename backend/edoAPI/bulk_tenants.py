@@ -0,0 +1,377 @@
+"""
+Bulk tenant invitation and import.
+
+Rows arrive as a JSON array, NDJSON or CSV (request body or multipart file
+upload); CSV and NDJSON bodies are parsed lazily, line by line. However many
+rows an upload has, units, pending invitations and existing users are each
+resolved with one set-based query, every row is validated in a single pass,
+and the valid rows are written with batched bulk_create calls inside one
+transaction.
+"""
+import codecs
+import csv
+import json
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from .contacts import invitee_contact, tenant_contact, upsert_contacts
+from .emails import tenant_invitation_email
+from .models import User, Role, Unit, Tenant, TenantInvitation
+from .outbox import enqueue_emails
+from .response_cache import bump_generation
+
+MAX_ROWS = 5000
+
+# Accept the camelCase keys used elsewhere in the API (and by the frontend)
+FIELD_ALIASES = {
+    'unitNumber': 'unit_id',
+    'unit_number': 'unit_id',
+    'propertyId': 'property_id',
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'leaseType': 'lease_type',
+    'startDate': 'start_date',
+    'endDate': 'end_date',
+    'emergencyContactName': 'emergency_contact_name',
+    'emergencyContactPhone': 'emergency_contact_phone',
+    'emergencyContactRelationship': 'emergency_contact_relationship',
+}
+
+REQUIRED_FIELDS = {
+    'invite': ['email', 'unit_id'],
+    'import': ['email', 'unit_id', 'first_name', 'last_name', 'phone', 'start_date'],
+}
+LEASE_TYPES = {value for value, _ in Tenant._meta.get_field('lease_type').choices}
+
+
+def _lines(stream, encoding='utf-8-sig'):
+    # Decode a byte stream one line at a time; utf-8-sig drops a spreadsheet BOM
+    return codecs.iterdecode(iter(stream.readline, b''), encoding)
+
+
+def _csv_rows(lines):
+    try:
+        yield from csv.DictReader(lines)
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ParseError(f'CSV parse error - {exc}')
+
+
+def _ndjson_rows(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error on line {number} - {exc}')
+
+
+class CSVRowParser(BaseParser):
+    """text/csv request bodies, parsed lazily into row dicts."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return _csv_rows(_lines(stream))
+
+
+class NDJSONRowParser(BaseParser):
+    """Newline-delimited JSON request bodies, one row object per line."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return _ndjson_rows(_lines(stream))
+
+
+def read_rows(request):
+    """
+    Collect up to MAX_ROWS rows from the request: an uploaded `file` (CSV,
+    or NDJSON/JSON by extension), a CSV/NDJSON body, or a JSON array (or
+    {"rows": [...]}) body.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        name = upload.name.lower()
+        if name.endswith(('.ndjson', '.jsonl')):
+            rows = _ndjson_rows(_lines(upload))
+        elif name.endswith('.json'):
+            try:
+                rows = json.load(upload)
+            except ValueError as exc:
+                raise ParseError(f'JSON parse error - {exc}')
+        else:
+            rows = _csv_rows(_lines(upload))
+    else:
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('rows')
+    if rows is None or isinstance(rows, (str, bytes, dict)):
+        raise ParseError('Expected a list of rows.')
+
+    collected = []
+    for row in rows:
+        if len(collected) == MAX_ROWS:
+            raise ParseError(f'At most {MAX_ROWS} rows can be imported per request.')
+        collected.append(row)
+    return collected
+
+
+def normalize_row(raw):
+    row = {}
+    if not isinstance(raw, dict):
+        return row
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = FIELD_ALIASES.get(str(key).strip(), str(key).strip())
+        if value is None:
+            continue
+        value = str(value).strip()
+        if value:
+            row[key] = value
+    return row
+
+
+class TenantBulkImport:
+    """
+    Validate and apply a batch of tenant rows for one landlord.
+
+    mode='invite' creates TenantInvitations and queues their emails on the
+    outbox; mode='import' creates tenancies directly, creating accounts for
+    emails that don't have one yet.
+    """
+    def __init__(self, landlord, mode, rows, default_property_id=None):
+        if mode not in REQUIRED_FIELDS:
+            raise ValueError(f'Unknown import mode "{mode}"')
+        self.landlord = landlord
+        self.mode = mode
+        self.rows = [normalize_row(row) for row in rows]
+        self.default_property_id = default_property_id
+        self.results = [
+            {'row': number, 'status': 'valid', 'email': row.get('email'), 'unit_id': row.get('unit_id'), 'errors': {}}
+            for number, row in enumerate(self.rows, start=1)
+        ]
+
+    def run(self, dry_run=False, all_or_nothing=False):
+        self.validate()
+        valid = [index for index, result in enumerate(self.results) if not result['errors']]
+        has_errors = len(valid) < len(self.results)
+        created = 0
+        if dry_run or (all_or_nothing and has_errors):
+            if not dry_run:
+                for index in valid:
+                    self.results[index]['status'] = 'skipped'
+        elif valid:
+            with transaction.atomic():
+                if self.mode == 'invite':
+                    self.create_invitations(valid)
+                else:
+                    self.create_tenancies(valid)
+            created = len(valid)
+        for result in self.results:
+            if result['errors']:
+                result['status'] = 'error'
+            else:
+                del result['errors']
+        return {
+            'mode': self.mode,
+            'dry_run': dry_run,
+            'total': len(self.results),
+            'created': created,
+            'failed': len(self.results) - len(valid),
+            'results': self.results,
+        }
+
+    def error(self, index, field, message):
+        self.results[index]['errors'].setdefault(field, []).append(message)
+
+    def validate(self):
+        # Field-level checks on every row
+        for index, row in enumerate(self.rows):
+            for field in REQUIRED_FIELDS[self.mode]:
+                if field not in row:
+                    self.error(index, field, 'This field is required.')
+            if 'email' in row:
+                try:
+                    validate_email(row['email'])
+                except ValidationError:
+                    self.error(index, 'email', 'Enter a valid email address.')
+            property_id = row.get('property_id', self.default_property_id)
+            if property_id is not None:
+                try:
+                    row['property_id'] = int(property_id)
+                except (TypeError, ValueError):
+                    self.error(index, 'property_id', 'A valid integer is required.')
+            if self.mode == 'import':
+                for field in ('start_date', 'end_date'):
+                    if field in row:
+                        try:
+                            row[field] = parse_date(str(row[field]))
+                        except ValueError:
+                            row[field] = None
+                        if row[field] is None:
+                            self.error(index, field, 'Date has wrong format. Use YYYY-MM-DD.')
+                if row.get('lease_type', 'rental') not in LEASE_TYPES:
+                    self.error(index, 'lease_type', f'Must be one of: {", ".join(sorted(LEASE_TYPES))}.')
+
+        self.resolve_email_keys()
+        self.resolve_units()
+        if self.mode == 'invite':
+            self.check_pending_invitations()
+        else:
+            self.resolve_users()
+
+    def resolve_units(self):
+        """Match every row to one of the landlord's units with a single query."""
+        unit_numbers = {row['unit_id'] for row in self.rows if 'unit_id' in row}
+        units = (
+            Unit.objects.filter(property__landlord=self.landlord, unit_id__in=unit_numbers)
+            .select_related('property')
+            .annotate(occupied=Exists(Tenant.objects.filter(unit=OuterRef('pk'))))
+        ) if unit_numbers else []
+        by_key, by_number = {}, {}
+        for unit in units:
+            by_key[(unit.property_id, unit.unit_id)] = unit
+            by_number.setdefault(unit.unit_id, []).append(unit)
+
+        claimed = {}
+        for index, row in enumerate(self.rows):
+            if 'unit_id' not in row or self.results[index]['errors'].get('property_id'):
+                continue
+            if 'property_id' in row:
+                unit = by_key.get((row['property_id'], row['unit_id']))
+            else:
+                candidates = by_number.get(row['unit_id'], [])
+                if len(candidates) > 1:
+                    self.error(index, 'property_id', 'Unit number exists in several of your properties; give property_id.')
+                    continue
+                unit = candidates[0] if candidates else None
+            if unit is None:
+                self.error(index, 'unit_id', 'Unit not found or not owned by you.')
+                continue
+            if unit.occupied:
+                self.error(index, 'unit_id', 'This unit is already occupied.')
+                continue
+            # A unit can take one tenancy per import, but several invitees
+            key = unit.pk if self.mode == 'import' else (unit.pk, self.email_key(row))
+            if key in claimed:
+                self.error(index, 'unit_id', f'Duplicate of row {claimed[key] + 1}.')
+                continue
+            claimed[key] = index
+            row['unit'] = unit
+
+    def resolve_email_keys(self):
+        """
+        Key every row's email with one query over a VALUES list, lowered by
+        the same LOWER() that computes the email_key columns and is applied
+        to invitation emails. Python's str.lower() can't stand in for it:
+        SQLite folds ASCII only (so 'É' stays 'É') while PostgreSQL folds
+        by collation, and an address keyed differently from its column
+        would miss its account, or collide with it on insert.
+        """
+        emails = list({row['email'] for row in self.rows if 'email' in row})
+        self.email_keys = {}
+        if not emails:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT column1, LOWER(column1) FROM (VALUES {', '.join(['(%s)'] * len(emails))}) AS emails",
+                emails,
+            )
+            self.email_keys = dict(cursor.fetchall())
+
+    def email_key(self, row):
+        return self.email_keys.get(row.get('email'))
+
+    def check_pending_invitations(self):
+        rows = [row for row in self.rows if 'unit' in row]
+        if not rows:
+            return
+        pending = set(
+            TenantInvitation.objects.filter(
+                unit_id__in={row['unit'].pk for row in rows}, status='pending', expires_at__gt=timezone.now(),
+            ).values_list('unit_id', Lower('email'))
+        )
+        for index, row in enumerate(self.rows):
+            if 'unit' in row and (row['unit'].pk, self.email_key(row)) in pending:
+                self.error(index, 'email', 'An invitation for this email and unit is already pending.')
+
+    def resolve_users(self):
+        # Existing accounts match whatever the case of the address in the row
+        keys = set(self.email_keys.values())
+        users = User.objects.filter(email_key__in=keys).only('id', 'email', 'email_key', 'role_flags') if keys else []
+        self.users = {user.email_key: user for user in users}
+        # Tenant is an exclusive role: an existing host, landlord or admin
+        # can't also become one
+        conflicting = Role.EXCLUSIVE ^ Role.BITS[Role.RoleName.TENANT]
+        for index, row in enumerate(self.rows):
+            user = self.users.get(self.email_key(row))
+            if user is not None and user.role_flags & conflicting:
+                roles = ', '.join(Role.names(user.role_flags & conflicting))
+                self.error(index, 'email', f'This account has the {roles} role and cannot also be a tenant.')
+
+    def create_invitations(self, valid):
+        expires_at = timezone.now() + timedelta(days=7)
+        invitations = []
+        for index in valid:
+            row = self.rows[index]
+            invitation = TenantInvitation(
+                landlord=self.landlord, unit=row['unit'], email=row['email'], phone=row.get('phone'),
+                message=row.get('message', ''), expires_at=expires_at,
+            )
+            # bulk_create skips TenantInvitation.save(), which normally sets the code
+            invitation.invitation_code = invitation.generate_invitation_code()
+            invitations.append(invitation)
+        TenantInvitation.objects.bulk_create(invitations, batch_size=500)
+        # bulk_create doesn't send post_save either
+        upsert_contacts(self.landlord.pk, [invitee_contact(invitation) for invitation in invitations], replace=False)
+        enqueue_emails([tenant_invitation_email(invitation) for invitation in invitations])
+        for index, invitation in zip(valid, invitations):
+            self.results[index].update(status='created', id=invitation.pk)
+
+    def create_tenancies(self, valid):
+        tenant_bit = Role.BITS[Role.RoleName.TENANT]
+        new_users = {}
+        for index in valid:
+            row = self.rows[index]
+            key = self.email_key(row)
+            if key not in self.users and key not in new_users:
+                user = User(
+                    email=row['email'], first_name=row['first_name'], last_name=row['last_name'], phone=row['phone'],
+                    role_flags=Role.BITS[Role.RoleName.REGULAR] | tenant_bit,
+                )
+                # Imported tenants sign in after resetting their password
+                user.set_unusable_password()
+                new_users[key] = user
+        User.objects.bulk_create(new_users.values(), batch_size=500)
+
+        existing_ids = {self.users[key].pk for key in map(self.email_key, (self.rows[index] for index in valid)) if key in self.users}
+        if existing_ids:
+            User.objects.filter(pk__in=existing_ids).exclude(
+                role_flags__in=Role.flag_values_with(Role.RoleName.TENANT)
+            ).update(role_flags=F('role_flags').bitor(tenant_bit), role_version=F('role_version') + 1)
+
+        users = {**self.users, **new_users}
+        tenants = []
+        for index in valid:
+            row = self.rows[index]
+            tenants.append(Tenant(
+                user=users[self.email_key(row)], unit=row['unit'], first_name=row['first_name'], last_name=row['last_name'],
+                email=row['email'], phone=row['phone'], lease_type=row.get('lease_type', 'rental'),
+                start_date=row['start_date'], end_date=row.get('end_date'),
+                emergency_contact_name=row.get('emergency_contact_name', ''),
+                emergency_contact_phone=row.get('emergency_contact_phone', ''),
+                emergency_contact_relationship=row.get('emergency_contact_relationship', ''),
+            ))
+        Tenant.objects.bulk_create(tenants, batch_size=500)
+        upsert_contacts(self.landlord.pk, [tenant_contact(tenant) for tenant in tenants])
+        Unit.objects.filter(pk__in=[tenant.unit_id for tenant in tenants]).update(status='occupied', updated_at=timezone.now())
+        bump_generation(self.landlord.pk)
+        for index, tenant in zip(valid, tenants):
+            self.results[index].update(status='created', id=tenant.pk)
@@ -0,0 +1,170 @@
+"""
+Conditional GET (ETag / Last-Modified) for list and detail views.
+
+ConditionalGetMixin answers If-None-Match / If-Modified-Since with 304 Not
+Modified before the queryset is serialized. The validator is one query
+over the view's scoped queryset: COUNT and MAX(updated_at) of the rows,
+and the same of the rows of every relation the serializer reads, taken
+from the view's query plan (edoAPI.query_plans). An edit to any
+serialized row moves a MAX, and an insert or delete moves a COUNT, so
+every model a validator reads must have an updated_at field. Each
+relation is aggregated on its own, over the related rows whose keys the
+scoped queryset reaches (a semi-join), and the parts are combined with
+UNION ALL: relations are never joined to one another, so nested to-many
+relations don't multiply rows for a COUNT(DISTINCT) to undo.
+
+The ETag is weak and also covers the request path (filters, page cursor),
+the user, the negotiated format and the current date (for fields such as
+days_since_created). Last-Modified is only sent for single objects without
+serialized relations: a MAX can't see a deleted related row, so elsewhere
+If-Modified-Since alone would be unsafe and the ETag is the validator.
+Responses are marked private and must be revalidated (Cache-Control:
+private, no-cache), so clients always get a fresh answer, usually a 304.
+"""
+import hashlib
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Count, IntegerField, Max, Prefetch, Value
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+MODIFIED_FIELD = 'updated_at'
+
+
+def _join_paths(path):
+    # 'unit__property' reads both the unit and the property
+    parts = path.split('__')
+    return ['__'.join(parts[:end]) for end in range(1, len(parts) + 1)]
+
+
+def _flatten_select(select, prefix=''):
+    if not isinstance(select, dict):
+        return []
+    paths = []
+    for name, nested in select.items():
+        paths.append(f'{prefix}{name}')
+        paths += _flatten_select(nested, f'{prefix}{name}__')
+    return paths
+
+
+def relation_paths(plan):
+    """
+    Every relation path a QueryPlan joins, prefetches or annotates from,
+    nested prefetches included.
+    """
+    paths = []
+    for path in plan.select_related:
+        paths += _join_paths(path)
+    for lookup in plan.prefetch_related:
+        if not isinstance(lookup, Prefetch):
+            paths += _join_paths(lookup)
+            continue
+        root = lookup.prefetch_through
+        paths += _join_paths(root)
+        if lookup.queryset is not None:
+            inner = lookup.queryset
+            nested = _flatten_select(inner.query.select_related)
+            for inner_lookup in inner._prefetch_related_lookups:
+                nested += _join_paths(inner_lookup.prefetch_through if isinstance(inner_lookup, Prefetch) else inner_lookup)
+            paths += [f'{root}__{path}' for path in nested]
+    for path in plan.annotation_paths:
+        paths += _join_paths(path)
+    return list(dict.fromkeys(paths))
+
+
+def _related_model(model, path):
+    for name in path.split('__'):
+        model = model._meta.get_field(name).related_model
+    return model
+
+
+def _check_modified_field(model):
+    try:
+        model._meta.get_field(MODIFIED_FIELD)
+    except FieldDoesNotExist:
+        raise ImproperlyConfigured(
+            f'{model.__name__} has no {MODIFIED_FIELD} field, so edits to it could not change the ETag.'
+        ) from None
+
+
+def _validator_part(number, rows, count):
+    # One (number, count, modified) row; Value(number) isn't grouped by, so
+    # this is an aggregate over all of rows
+    _check_modified_field(rows.model)
+    return rows.annotate(part=Value(number, output_field=IntegerField())).values('part').annotate(
+        count=count, modified=Max(MODIFIED_FIELD),
+    ).values_list('part', 'count', 'modified').order_by()
+
+
+def queryset_validator(queryset, paths=()):
+    """The counts and latest changes identifying the current state of a queryset's rows and relations."""
+    queryset = queryset.select_related(None).prefetch_related(None).order_by()
+    if any(annotation.contains_aggregate for annotation in queryset.query.annotations.values()):
+        # Aggregating over aggregate annotations (with_occupancy) would compute
+        # them all in a subquery first; compare the same rows without them
+        queryset = queryset.model._base_manager.filter(pk__in=queryset.values('pk'))
+    parts = [_validator_part(0, queryset, Count('pk', distinct=True))]
+    for number, path in enumerate(paths, start=1):
+        related = _related_model(queryset.model, path)
+        rows = related._base_manager.filter(pk__in=queryset.values(path))
+        parts.append(_validator_part(number, rows, Count('pk')))
+    # Parts over no rows at all (e.g. queryset.none()) are left out
+    return sorted(parts[0].union(*parts[1:], all=True))
+
+
+def make_etag(request, validator):
+    accepted = getattr(request, 'accepted_media_type', '')
+    parts = [request.get_full_path(), request.user.pk, accepted, timezone.localdate().isoformat(), validator]
+    return f'W/"{hashlib.sha1(repr(parts).encode()).hexdigest()}"'
+
+
+def conditional_response(request, compute, validator, last_modified=None):
+    """compute()'s response, or 304/412 when the request's preconditions say so."""
+    etag = make_etag(request, validator)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = compute()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for list() and retrieve() (see module
+    docstring). Needs QueryPlanMixin, whose plan names the serialized
+    relations.
+    """
+
+    def validator_paths(self):
+        plan = self.get_query_plan()
+        return relation_paths(plan) if plan else []
+
+    def list(self, request, *args, **kwargs):
+        validator = queryset_validator(self.filter_queryset(self.get_queryset()), self.validator_paths())
+        return conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs), validator)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Permissions are checked on the object before anything is compared
+        instance = self.get_object()
+        paths = self.validator_paths()
+        # A sparse fieldset may have left the column unloaded
+        modified_loaded = MODIFIED_FIELD not in instance.get_deferred_fields()
+        last_modified = getattr(instance, MODIFIED_FIELD, None) if modified_loaded else None
+        if paths or last_modified is None:
+            validator = queryset_validator(self.get_queryset().filter(pk=instance.pk), paths)
+            last_modified = None
+        else:
+            validator = [('modified', last_modified)]
+        return conditional_response(
+            request, lambda: Response(self.get_serializer(instance).data), validator, last_modified,
+        )
@@ -0,0 +1,145 @@
+"""
+WebSocket endpoint for real-time chat, mounted by edo/asgi.py at
+/ws/v1/chat/ as a plain ASGI application.
+
+Browsers can't set headers on WebSocket requests, so clients authenticate
+with their JWT access token in the query string (?token=...). Once
+connected, the server pushes:
+    {"type": "chat.message", "message": {...ChatMessageSerializer data}}
+    {"type": "presence", "user": 7, "online": true, "last_seen": "..."}
+    {"type": "resync", "dropped": 3}   the client fell behind; re-fetch
+                                       /api/v1/chat-messages/ over REST
+and accepts:
+    {"type": "ping"}                            -> {"type": "pong"}
+    {"type": "presence.watch", "users": [7, 9]} -> current presence of the
+        listed chat partners, then a push whenever it changes
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .models import ChatMessage
+from .pubsub import get_layer, presence_group, user_group
+
+CHAT_PATH = '/ws/v1/chat/'
+MAX_WATCHED_USERS = 200
+
+# Application close codes (4000-4999 are reserved for applications)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+def authenticate_token(raw_token):
+    """Resolve a JWT access token to an active user, or None."""
+    if not raw_token:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def chat_partners(user_id, candidate_ids):
+    """The subset of candidate_ids that have exchanged chat messages with the user."""
+    sent = ChatMessage.objects.filter(sender_id=user_id, recipient_id__in=candidate_ids).values_list('recipient_id', flat=True)
+    received = ChatMessage.objects.filter(recipient_id=user_id, sender_id__in=candidate_ids).values_list('sender_id', flat=True)
+    return set(sent.union(received))
+
+
+class ChatConnection:
+    """One accepted WebSocket: forwards layer messages and answers the client."""
+
+    def __init__(self, layer, user, receive, send):
+        self.layer = layer
+        self.user = user
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.subscription = None
+
+    async def send_json(self, payload):
+        async with self._send_lock:
+            await self._send({'type': 'websocket.send', 'text': json.dumps(payload, cls=JSONEncoder)})
+
+    async def run(self):
+        self.subscription = self.layer.subscribe(user_group(self.user.id))
+        self.layer.connect(self.user.id)
+        tasks = {asyncio.ensure_future(self.read()), asyncio.ensure_future(self.write())}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.layer.unsubscribe(self.subscription)
+            self.layer.disconnect(self.user.id)
+
+    async def write(self):
+        while True:
+            message = await self.subscription.get()
+            dropped = self.subscription.take_dropped()
+            if dropped:
+                await self.send_json({'type': 'resync', 'dropped': dropped})
+            await self.send_json(message)
+
+    async def read(self):
+        while True:
+            event = await self.receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+            try:
+                message = json.loads(event.get('text') or event.get('bytes') or '')
+                kind = message['type']
+            except (ValueError, TypeError, KeyError):
+                await self.send_json({'type': 'error', 'error': 'Expected a JSON object with a "type".'})
+                continue
+            if kind == 'ping':
+                await self.send_json({'type': 'pong'})
+            elif kind == 'presence.watch':
+                await self.watch_presence(message.get('users'))
+            else:
+                await self.send_json({'type': 'error', 'error': f'Unknown message type "{kind}".'})
+
+    async def watch_presence(self, user_ids):
+        if not isinstance(user_ids, list) or len(user_ids) > MAX_WATCHED_USERS:
+            await self.send_json({'type': 'error', 'error': f'"users" must be a list of at most {MAX_WATCHED_USERS} ids.'})
+            return
+        candidates = {user_id for user_id in user_ids if isinstance(user_id, int)}
+        # Presence is only shared between users who have chatted
+        partners = await sync_to_async(chat_partners)(self.user.id, candidates) if candidates else set()
+        self.layer.add_groups(self.subscription, *(presence_group(user_id) for user_id in partners))
+        for user_id in sorted(partners):
+            await self.send_json(self.layer.presence(user_id))
+
+
+class ChatSocket:
+    """ASGI application for WebSocket scopes."""
+
+    def __init__(self, layer=None):
+        self._layer = layer
+
+    @property
+    def layer(self):
+        return self._layer or get_layer()
+
+    async def __call__(self, scope, receive, send):
+        event = await receive()
+        if event['type'] != 'websocket.connect':
+            return
+        if scope['path'] != CHAT_PATH:
+            await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+            return
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        user = await sync_to_async(authenticate_token)(query.get('token', [None])[0])
+        if user is None:
+            await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+            return
+        await send({'type': 'websocket.accept'})
+        await ChatConnection(self.layer, user, receive, send).run()
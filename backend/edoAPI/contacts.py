@@ -0,0 +1,234 @@
+"""
+Landlord contact directory and email/name autocomplete.
+
+LandlordContact holds, per landlord, the people they are allowed to look up
+(their tenants and invitees) with lowercased email, full-name and last-name
+keys. Tenancies and invitations upsert their contact as they are saved
+(edoAPI.signals; bulk imports call upsert_contacts directly).
+
+Autocomplete ranks an exact email first, then email prefixes, then name
+prefixes, then (for 3+ characters) substrings. It is served from an
+in-process ContactIndex - sorted key arrays searched with bisect - kept per
+landlord for CONTACT_INDEX['TTL'] seconds and dropped when one of the
+landlord's contacts changes in this process. Landlords with more than
+MAX_CONTACTS contacts are searched in the database instead, with index
+range scans on the same keys. On PostgreSQL, whose collations don't order
+strings the way the range bounds assume, prefixes are matched with LIKE
+'p%' against varchar_pattern_ops indexes and substrings use pg_trgm GIN
+indexes (install_indexes(), run by migration 0032).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Collate
+from .models import LandlordContact
+
+DEFAULTS = {
+    'TTL': 60,
+    'MAX_LANDLORDS': 256,
+    'MAX_CONTACTS': 50000,
+}
+
+MIN_SUBSTRING = 3
+
+RANK_EXACT, RANK_EMAIL_PREFIX, RANK_NAME_PREFIX, RANK_SUBSTRING = range(4)
+MATCH_NAMES = {
+    RANK_EXACT: 'exact',
+    RANK_EMAIL_PREFIX: 'prefix',
+    RANK_NAME_PREFIX: 'name',
+    RANK_SUBSTRING: 'substring',
+}
+
+CONTACT_FIELDS = ('id', 'user_id', 'tenant_id', 'kind', 'email', 'first_name', 'last_name', 'phone', 'email_key', 'name_key', 'last_name_key')
+
+
+def _postgresql_indexes():
+    table = LandlordContact._meta.db_table
+    statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    for key in ('email_key', 'name_key', 'last_name_key'):
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS contact_{key}_pattern_idx ON "{table}" (landlord_id, {key} varchar_pattern_ops)'
+        )
+    for key in ('email_key', 'name_key'):
+        statements.append(f'CREATE INDEX IF NOT EXISTS contact_{key}_trgm_idx ON "{table}" USING gin ({key} gin_trgm_ops)')
+    return statements
+
+
+def install_indexes(connection=default_connection):
+    """Create the PostgreSQL-only prefix and trigram indexes (idempotent)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for statement in _postgresql_indexes():
+            cursor.execute(statement)
+
+
+def contact_setting(name):
+    return getattr(settings, 'CONTACT_INDEX', {}).get(name, DEFAULTS[name])
+
+
+def successor(prefix):
+    """The smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def normalize(query):
+    return ' '.join((query or '').split()).lower()
+
+
+# Maintenance
+
+def upsert_contacts(landlord_id, contacts, replace=True):
+    """
+    Insert or refresh LandlordContact rows (unsaved instances) for one
+    landlord in a single statement. With replace=False existing contacts
+    are left as they are - an invitation shouldn't blank a tenant's name.
+    """
+    # One row per email: ON CONFLICT can't touch the same row twice in a statement
+    contacts = list({contact.set_keys().email_key: contact for contact in contacts}.values())
+    if not contacts:
+        return
+    for contact in contacts:
+        contact.landlord_id = landlord_id
+    if replace:
+        LandlordContact.objects.bulk_create(
+            contacts, batch_size=500, update_conflicts=True, unique_fields=['landlord', 'email_key'],
+            update_fields=['user', 'tenant', 'kind', 'email', 'first_name', 'last_name', 'phone', 'name_key', 'last_name_key', 'updated_at'],
+        )
+    else:
+        LandlordContact.objects.bulk_create(contacts, batch_size=500, ignore_conflicts=True)
+    invalidate(landlord_id)
+    # Rebuilds that raced the transaction may have cached the old contacts
+    transaction.on_commit(lambda: invalidate(landlord_id))
+
+
+def tenant_contact(tenant):
+    return LandlordContact(
+        user_id=tenant.user_id, tenant_id=tenant.pk, kind='tenant', email=tenant.email,
+        first_name=tenant.first_name, last_name=tenant.last_name, phone=tenant.phone or '',
+    )
+
+
+def invitee_contact(invitation):
+    return LandlordContact(kind='invitee', email=invitation.email, phone=invitation.phone or '')
+
+
+# In-process index
+
+class ContactIndex:
+    """One landlord's contacts as sorted key arrays for bisect prefix lookups."""
+
+    def __init__(self, contacts):
+        self.contacts = contacts
+        self.built_at = time.monotonic()
+        self.by_email = self._sorted('email_key')
+        self.by_name = self._sorted('name_key') + self._sorted('last_name_key')
+        self.by_name.sort()
+
+    def _sorted(self, key):
+        return sorted((contact[key], position) for position, contact in enumerate(self.contacts) if contact[key])
+
+    @staticmethod
+    def _prefixed(entries, prefix):
+        start = bisect_left(entries, (prefix,))
+        end = bisect_left(entries, (successor(prefix),))
+        return entries[start:end]
+
+    def search(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        ranked = {}
+        # Email matches come out in email order, the exact match (if any) first
+        for key, position in self._prefixed(self.by_email, prefix)[:limit]:
+            ranked[position] = RANK_EXACT if key == prefix else RANK_EMAIL_PREFIX
+        if len(ranked) < limit:
+            for _, position in self._prefixed(self.by_name, prefix):
+                ranked.setdefault(position, RANK_NAME_PREFIX)
+        if len(ranked) < limit and len(prefix) >= MIN_SUBSTRING:
+            for position, contact in enumerate(self.contacts):
+                if position not in ranked and (prefix in contact['email_key'] or prefix in contact['name_key']):
+                    ranked[position] = RANK_SUBSTRING
+                    if len(ranked) >= limit:
+                        break
+        best = sorted(ranked.items(), key=lambda item: (item[1], self.contacts[item[0]]['email_key']))[:limit]
+        return [dict(self.contacts[position], rank=rank) for position, rank in best]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate(landlord_id):
+    with _lock:
+        _indexes.pop(landlord_id, None)
+
+
+def clear_indexes():
+    with _lock:
+        _indexes.clear()
+
+
+def get_index(landlord_id):
+    """The landlord's ContactIndex, (re)built if missing or stale; None if too large to hold."""
+    with _lock:
+        index = _indexes.get(landlord_id)
+        if index is not None and time.monotonic() - index.built_at < contact_setting('TTL'):
+            _indexes.move_to_end(landlord_id)
+            return index
+    limit = contact_setting('MAX_CONTACTS')
+    contacts = list(LandlordContact.objects.filter(landlord_id=landlord_id).values(*CONTACT_FIELDS)[:limit + 1])
+    if len(contacts) > limit:
+        return None
+    index = ContactIndex(contacts)
+    with _lock:
+        _indexes[landlord_id] = index
+        while len(_indexes) > contact_setting('MAX_LANDLORDS'):
+            _indexes.popitem(last=False)
+    return index
+
+
+# Search
+
+def search_contacts_db(landlord_id, query, limit=10):
+    """The same ranking as ContactIndex.search, as one indexed query."""
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    if default_connection.vendor == 'postgresql':
+        def starts(key):
+            return Q(**{f'{key}__startswith': prefix})
+    else:
+        end = successor(prefix)
+
+        def starts(key):
+            return Q(**{f'{key}__gte': prefix, f'{key}__lt': end})
+    email_prefix = starts('email_key')
+    name_prefix = starts('name_key') | starts('last_name_key')
+    condition = email_prefix | name_prefix
+    if len(prefix) >= MIN_SUBSTRING:
+        condition |= Q(email_key__contains=prefix) | Q(name_key__contains=prefix)
+    return list(
+        LandlordContact.objects.filter(condition, landlord_id=landlord_id)
+        .annotate(rank=Case(
+            When(email_key=prefix, then=Value(RANK_EXACT)),
+            When(email_prefix, then=Value(RANK_EMAIL_PREFIX)),
+            When(name_prefix, then=Value(RANK_NAME_PREFIX)),
+            default=Value(RANK_SUBSTRING),
+            output_field=IntegerField(),
+        ))
+        # Codepoint order, as in ContactIndex, whatever the column's collation
+        .order_by('rank', Collate('email_key', 'C') if default_connection.vendor == 'postgresql' else 'email_key')
+        .values(*CONTACT_FIELDS, 'rank')[:limit]
+    )
+
+
+def search_contacts(landlord_id, query, limit=10):
+    index = get_index(landlord_id)
+    if index is None:
+        return search_contacts_db(landlord_id, query, limit)
+    return index.search(query, limit)
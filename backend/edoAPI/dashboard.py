@@ -0,0 +1,174 @@
+"""
+The landlord dashboard in one response.
+
+landlord_dashboard() answers the screen landlords open first - occupancy,
+the rent roll, open maintenance, vacate requests and recent activity -
+with a fixed number of aggregate queries, whatever the size of the
+portfolio:
+
+1. units GROUP BY property (LandlordProperty.objects.with_occupancy():
+   per-property occupancy and rent, and totals);
+2. this month's payments (SUM/COUNT);
+3. maintenance requests GROUP BY status, priority;
+4. vacate requests GROUP BY status;
+5. the next pending move-outs;
+6. recent activity, one UNION ALL over maintenance requests, vacate
+   requests, payments, new tenancies and notices.
+"""
+from decimal import Decimal
+from django.db import connections
+from django.db.models import CharField, Count, F, Sum, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+from .models import LandlordMaintenance, LandlordProperty, Notice, Payment, Tenant, VacateRequest
+from .replicas import current_read_alias
+
+OPEN_MAINTENANCE = ('pending', 'in_progress')
+UPCOMING_MOVE_OUTS = 5
+RECENT_ACTIVITY = 10
+
+ZERO = Decimal('0.00')
+
+
+def money(value):
+    return f'{(value or ZERO).quantize(ZERO)}'
+
+
+def rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def occupancy(landlord):
+    # The same annotations as the property list; collected_rent is left out
+    # of values(), so its subquery isn't run
+    properties = list(
+        LandlordProperty.objects.filter(landlord=landlord).with_occupancy()
+        .values('id', 'name', 'unit_count', 'occupied_units', 'potential_rent', 'occupied_rent')
+        .order_by('name', 'id')
+    )
+    units = sum(row['unit_count'] for row in properties)
+    occupied = sum(row['occupied_units'] for row in properties)
+    totals = {
+        'properties': len(properties),
+        'units': units,
+        'occupied': occupied,
+        'vacant': units - occupied,
+        'occupancy_rate': rate(occupied, units),
+    }
+    breakdown = [{
+        'id': row['id'],
+        'name': row['name'],
+        'units': row['unit_count'],
+        'occupied': row['occupied_units'],
+        'vacant': row['unit_count'] - row['occupied_units'],
+        'occupancy_rate': rate(row['occupied_units'], row['unit_count']),
+    } for row in properties]
+    potential = sum((row['potential_rent'] for row in properties), ZERO)
+    expected = sum((row['occupied_rent'] for row in properties), ZERO)
+    return totals, breakdown, potential, expected
+
+
+def rent_roll(landlord, today, potential, expected):
+    month_start = today.replace(day=1)
+    payments = Payment.objects.filter(
+        unit__property__landlord=landlord, payment_date__gte=month_start, payment_date__lte=today,
+    ).aggregate(collected=Sum('amount'), count=Count('id'))
+    collected = payments['collected'] or ZERO
+    return {
+        'month': month_start.strftime('%Y-%m'),
+        # Monthly rent of every unit, and of the occupied ones
+        'potential': money(potential),
+        'expected': money(expected),
+        'collected': money(collected),
+        'outstanding': money(max(expected - collected, ZERO)),
+        'payments': payments['count'],
+        'collection_rate': rate(float(collected), float(expected)),
+    }
+
+
+def maintenance(landlord):
+    rows = (
+        LandlordMaintenance.objects.filter(property__landlord=landlord)
+        .values('status', 'priority').annotate(count=Count('id')).order_by()
+    )
+    by_status = dict.fromkeys((value for value, _ in LandlordMaintenance.STATUS_CHOICES), 0)
+    open_by_priority = dict.fromkeys((value for value, _ in LandlordMaintenance.PRIORITY_CHOICES), 0)
+    for row in rows:
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['count']
+        if row['status'] in OPEN_MAINTENANCE:
+            open_by_priority[row['priority']] = open_by_priority.get(row['priority'], 0) + row['count']
+    return {
+        'open': sum(by_status.get(value, 0) for value in OPEN_MAINTENANCE),
+        'by_status': by_status,
+        'open_by_priority': open_by_priority,
+    }
+
+
+def vacate_requests(landlord, today):
+    counts = dict(
+        VacateRequest.objects.filter(property__landlord=landlord)
+        .values_list('status').annotate(count=Count('id')).order_by()
+    )
+    upcoming = (
+        VacateRequest.objects.filter(property__landlord=landlord, status='pending', move_out_date__gte=today)
+        .select_related('tenant', 'unit', 'property').order_by('move_out_date', 'id')[:UPCOMING_MOVE_OUTS]
+    )
+    return {
+        'pending': counts.get('pending', 0),
+        'by_status': {value: counts.get(value, 0) for value, _ in VacateRequest.STATUS_CHOICES},
+        'upcoming': [{
+            'id': request.id,
+            'tenant_name': f'{request.tenant.first_name} {request.tenant.last_name}',
+            'property_name': request.property.name,
+            'unit_number': request.unit.unit_id,
+            'move_out_date': request.move_out_date.isoformat(),
+        } for request in upcoming],
+    }
+
+
+def _activity(queryset, kind, summary, property_name):
+    return queryset.annotate(
+        kind=Value(kind, output_field=CharField()),
+        summary=summary,
+        property_name=property_name,
+        at=F('created_at'),
+    ).values('kind', 'id', 'summary', 'property_name', 'at').order_by()
+
+
+def recent_activity(landlord):
+    full_name = Concat('tenant__first_name', Value(' '), 'tenant__last_name', output_field=CharField())
+    branches = [
+        _activity(LandlordMaintenance.objects.filter(property__landlord=landlord), 'maintenance', F('subject'), F('property__name')),
+        _activity(VacateRequest.objects.filter(property__landlord=landlord), 'vacate_request', full_name, F('property__name')),
+        _activity(Payment.objects.filter(unit__property__landlord=landlord), 'payment', full_name, F('unit__property__name')),
+        _activity(
+            Tenant.objects.filter(unit__property__landlord=landlord), 'tenant',
+            Concat('first_name', Value(' '), 'last_name', output_field=CharField()), F('unit__property__name'),
+        ),
+        _activity(Notice.objects.filter(sender=landlord), 'notice', F('title'), Coalesce('property__name', Value(''))),
+    ]
+    if connections[current_read_alias()].features.supports_slicing_ordering_in_compound:
+        # Each branch stops at its own newest rows before they are merged
+        branches = [branch.order_by('-at')[:RECENT_ACTIVITY] for branch in branches]
+    first, *rest = branches
+    rows = first.union(*rest, all=True).order_by('-at', 'kind', '-id')[:RECENT_ACTIVITY]
+    return [{
+        'type': row['kind'],
+        'id': row['id'],
+        'summary': row['summary'],
+        'property_name': row['property_name'] or None,
+        'at': row['at'].isoformat(),
+    } for row in rows]
+
+
+def landlord_dashboard(landlord, today=None):
+    today = today or timezone.localdate()
+    totals, properties, potential, expected = occupancy(landlord)
+    return {
+        'occupancy': totals,
+        'properties': properties,
+        'rent_roll': rent_roll(landlord, today, potential, expected),
+        'maintenance': maintenance(landlord),
+        'vacate_requests': vacate_requests(landlord, today),
+        'recent_activity': recent_activity(landlord),
+    }
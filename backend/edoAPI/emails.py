@@ -0,0 +1,69 @@
+"""
+Email content for the outbox (see edoAPI.outbox).
+"""
+from django.conf import settings
+from .outbox import build_email
+
+
+def tenant_invitation_email(invitation):
+    """
+    Build (unsaved) the invitation email with both account creation and
+    quick approval options
+    """
+    subject = f"Tenant Invitation - {invitation.unit.property.name} Unit {invitation.unit.unit_id}"
+    
+    # Create invitation URLs
+    base_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
+    create_account_url = f"{base_url}/accept-invitation/{invitation.invitation_code}?action=create_account"
+    quick_approve_url = f"{base_url}/accept-invitation/{invitation.invitation_code}?action=approve"
+    
+    message = f"""
+Hello,
+
+You have been invited to become a tenant at {invitation.unit.property.name} Unit {invitation.unit.unit_id}.
+
+Property Details:
+- Property: {invitation.unit.property.name}
+- Unit: {invitation.unit.unit_id}
+- Monthly Rent: ${invitation.unit.rent_amount}
+- Landlord: {invitation.landlord.get_full_name()}
+
+You have two options to accept this invitation:
+
+1. CREATE ACCOUNT (Recommended):
+   - Access the full tenant portal
+   - Submit maintenance requests
+   - Pay rent online
+   - Message your landlord
+   - View your rental information
+   
+   Click here: {create_account_url}
+
+2. QUICK APPROVE:
+   - Simple approval without creating an account
+   - Basic tenant record created
+   - No platform access required
+   
+   Click here: {quick_approve_url}
+
+{f"Personal Message from your landlord: {invitation.message}" if invitation.message else ""}
+
+This invitation expires on {invitation.expires_at.strftime('%B %d, %Y')}.
+
+If you have any questions, please contact your landlord.
+
+Best regards,
+The Edo Real Estate Team
+    """
+    
+    return build_email(subject, message, [invitation.email], kind='tenant_invitation')
+
+
+def queue_tenant_invitation_email(invitation):
+    """
+    Queue the invitation email on the outbox; call inside the transaction
+    that saves the invitation
+    """
+    email = tenant_invitation_email(invitation)
+    email.save()
+    return email
@@ -0,0 +1,118 @@
+"""
+Sparse fieldsets and opt-in expansion of nested serializers.
+
+A GET request may name the fields it renders with `?fields=` and the
+nested relations it wants embedded with `?expand=`, both comma-separated
+and dotted for nested serializers:
+
+    ?fields=id,subject,status,messages.message
+    ?expand=properties.units
+
+Without either parameter responses are unchanged. Once a request uses one,
+a SparseFieldsetSerializer renders only the named fields (all of them when
+`fields` isn't given) and leaves out the relations listed in its
+Meta.expandable_fields unless they are expanded or named in `fields`.
+
+The view's query plan (edoAPI.query_plans) is derived from the narrowed
+serializer, so relations that aren't rendered are neither joined nor
+prefetched, and the columns are narrowed with .only(). Columns are taken
+from field sources; fields whose source isn't a model field (method fields,
+get_FOO_display, annotations) name the attributes they read in
+Meta.field_sources, and a serializer rendering a field it can't account for
+loads every column.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(value):
+    """'id,unit.unit_id,unit.rent_amount' -> {'id': {}, 'unit': {'unit_id': {}, 'rent_amount': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def requested_fieldset(request):
+    """(fields, expand) trees from a GET request, fields None for every field; None unless requested."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+        return None
+    fields = parse_paths(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+    return fields, parse_paths(params.get(EXPAND_PARAM, ''))
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer honouring ?fields= and ?expand= (see module docstring).
+    The top-level serializer reads them from the request in its context and
+    hands each nested SparseFieldsetSerializer its part.
+    """
+    # (fields, expand) set by the parent serializer
+    fieldset = None
+
+    def get_fieldset(self):
+        if self.fieldset is not None:
+            return self.fieldset
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            # Nested under a serializer rendering it whole
+            return None
+        return requested_fieldset(self.context.get('request'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+        only, expand = fieldset
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        selected = {}
+        for name, field in fields.items():
+            if only is not None:
+                if name not in only and name not in expand:
+                    continue
+            elif name in expandable and name not in expand:
+                continue
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, SparseFieldsetSerializer):
+                nested.fieldset = ((only or {}).get(name) or None, expand.get(name, {}))
+            selected[name] = field
+        return selected
+
+    def get_columns(self):
+        """
+        Local field names read by the selected fields, or None when one of
+        them reads something that can't be narrowed to columns.
+        """
+        model = self.Meta.model
+        sources = getattr(self.Meta, 'field_sources', {})
+        columns = [model._meta.pk.name]
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                attrs = sources[name]
+            elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+                return None
+            else:
+                attrs = field.source_attrs[:1]
+            for attr in attrs:
+                try:
+                    model_field = model._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    return None
+                # Reverse and many-to-many relations are prefetched by primary key
+                if model_field.concrete and not model_field.many_to_many:
+                    columns.append(model_field.name)
+        return list(dict.fromkeys(columns))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from edoAPI.archive import archivable, archive_chat_messages, archive_horizon, archive_setting, restore_chat_messages
+from edoAPI.models import ArchivedChatMessage, ChatMessage
+
+
+class Command(BaseCommand):
+    help = (
+        'Move read chat messages older than CHAT_ARCHIVE["AFTER_DAYS"] into the archive table in batches. '
+        'Unread messages and each conversation\'s latest message stay in the hot table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Archive messages older than this many days (never less than AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages moved per transaction (default: CHAT_ARCHIVE["BATCH_SIZE"]).')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches.')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many messages would be archived.')
+        parser.add_argument('--restore', action='store_true', help='Move archived messages newer than the horizon back (after raising AFTER_DAYS).')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days']) if options['days'] else archive_horizon()
+        if options['restore']:
+            restored = restore_chat_messages(archive_horizon(), batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Restored {restored} messages newer than {archive_horizon():%Y-%m-%d}.'))
+            return
+        if options['dry_run']:
+            self.stdout.write(f'{archivable(min(cutoff, archive_horizon())).count()} messages would be archived.')
+            return
+
+        result = archive_chat_messages(
+            cutoff=cutoff, batch_size=options['batch_size'], max_batches=options['max_batches'], pause=options['pause'],
+        )
+        rate = result.moved / result.seconds if result.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.moved} messages in {result.batches} batches '
+            f'({result.seconds:.1f}s, {rate:.0f}/s, batch size {options["batch_size"] or archive_setting("BATCH_SIZE")}).'
+        ))
+        self.stdout.write(f'hot: {ChatMessage.objects.count()}, archived: {ArchivedChatMessage.objects.count()}')
@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from edoAPI import search
+from edoAPI.models import ChatMessage, User
+
+VOCABULARY = (
+    'rent invoice deposit lease renewal kitchen sink leaking plumber electrician water heater boiler '
+    'window door lock key parking gate noise neighbour inspection painting roof gutter mould damp '
+    'payment receipt late fee balance internet router garbage collection elevator stairs laundry'
+).split()
+# Filler so the domain words above are as rare as they'd be in real chat
+FILLER = [f'{a}{b}{c}' for a in ('ba', 'ke', 'mi', 'so', 'tu') for b in ('ra', 'le', 'ni', 'po', 'gu', 'de') for c in ('n', 'l', 's', 't', 'ka', 'mo', 'ri')]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time full-text message search against the icontains scan it replaces. Seeds synthetic chat '
+        'messages inside a transaction that is rolled back afterwards (unless --keep).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=100000, help='Synthetic messages to seed.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+        parser.add_argument('--limit', type=int, default=20, help='Results fetched per query.')
+        parser.add_argument('--terms', nargs='*', default=['plumber', 'leaking sink', 'late fee', 'mould', 'insp'])
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded messages instead of rolling back.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['messages'])
+            scope = search.scoped_querysets(user)['chat']
+            self.stdout.write(f'{connection.vendor}: {options["messages"]} messages, {options["repeat"]} runs per query\n')
+            self.stdout.write(f'{"query":<16}{"icontains ms":>14}{"fts ms":>10}{"speedup":>10}{"hits":>8}')
+            for query in options['terms']:
+                terms = search.search_terms(query)
+                baseline = scope
+                for term in terms:
+                    baseline = baseline.filter(message__icontains=term)
+                baseline = baseline.order_by('-timestamp', '-id')[:options['limit']]
+                indexed = search.ranked(scope, terms)[:options['limit']]
+                slow = self.time(baseline, options['repeat'])
+                fast = self.time(indexed, options['repeat'])
+                self.stdout.write(
+                    f'{query:<16}{slow:>14.2f}{fast:>10.2f}{slow / fast if fast else 0:>9.1f}x{len(list(indexed)):>8}'
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, count):
+        rng = random.Random(14)
+        sender = User.objects.create(email=f'search-bench-{time.time_ns()}@example.com')
+        recipient = User.objects.create(email=f'search-bench-peer-{time.time_ns()}@example.com')
+        started = time.perf_counter()
+        ChatMessage.objects.bulk_create((
+            ChatMessage(
+                sender=sender, recipient=recipient,
+                message=' '.join(
+                    rng.choice(VOCABULARY if rng.random() < 0.1 else FILLER) for _ in range(rng.randint(5, 30))
+                ),
+            )
+            for _ in range(count)
+        ), batch_size=2000)
+        self.stdout.write(f'seeded and indexed in {time.perf_counter() - started:.1f}s')
+        return sender
+
+    def time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
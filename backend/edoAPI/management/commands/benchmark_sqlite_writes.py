@@ -0,0 +1,133 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import override_settings
+from django.utils import timezone
+from edoAPI.sqlite import DEFAULTS, is_locked, retry_on_locked, sqlite_setting
+
+ALIAS = 'sqlite_write_bench'
+ACCOUNTS = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent write throughput on SQLite with Django\'s defaults against the production '
+        'profile (edoAPI.sqlite). Each run uses a scratch database file; the configured database is '
+        'not touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Threads running write transactions.')
+        parser.add_argument('--readers', type=int, default=4, help='Threads running read queries alongside them.')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{options["writers"]} writers, {options["readers"]} readers, {options["seconds"]:.0f}s per run\n'
+        )
+        self.stdout.write(f'{"profile":<10}{"writes/s":>10}{"failed":>8}{"p50 ms":>9}{"p95 ms":>9}{"reads/s":>10}')
+        for name, enabled in (('default', False), ('tuned', True)):
+            result = self.run(enabled, options['writers'], options['readers'], options['seconds'])
+            latencies = sorted(result['latencies']) or [0]
+            self.stdout.write(
+                f'{name:<10}{len(result["latencies"]) / options["seconds"]:>10.0f}{result["failed"]:>8}'
+                f'{statistics.median(latencies):>9.1f}{latencies[int(len(latencies) * 0.95)]:>9.1f}'
+                f'{result["reads"] / options["seconds"]:>10.0f}'
+            )
+
+    def run(self, enabled, writers, readers, seconds):
+        with tempfile.TemporaryDirectory() as directory:
+            options = {'transaction_mode': 'IMMEDIATE', 'timeout': sqlite_setting('BUSY_TIMEOUT') / 1000} if enabled else {}
+            connections.settings[ALIAS] = {
+                **connections.settings[DEFAULT_DB_ALIAS],
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(directory, 'bench.sqlite3'),
+                'OPTIONS': options,
+            }
+            profile = {**DEFAULTS, **getattr(settings, 'SQLITE_PROFILE', {}), 'ENABLED': enabled}
+            try:
+                with override_settings(SQLITE_PROFILE=profile):
+                    self.create_schema()
+                    return self.load(writers, readers, seconds, enabled)
+            finally:
+                connections[ALIAS].close()
+                # Drop this thread's wrapper so the next run opens the new file
+                del connections[ALIAS]
+                del connections.settings[ALIAS]
+
+    def create_schema(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('CREATE TABLE bench_account (id INTEGER PRIMARY KEY, balance INTEGER NOT NULL)')
+            cursor.execute(
+                'CREATE TABLE bench_event (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, '
+                'balance INTEGER NOT NULL, created_at TEXT NOT NULL)'
+            )
+            cursor.execute('CREATE INDEX bench_event_account ON bench_event (account_id)')
+            cursor.executemany('INSERT INTO bench_account (id, balance) VALUES (%s, 0)', [(n,) for n in range(ACCOUNTS)])
+
+    def load(self, writers, readers, seconds, enabled):
+        result = {'latencies': [], 'failed': 0, 'reads': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def write(account_id):
+            # The shape of a typical write view: read, then insert and update
+            with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cursor:
+                cursor.execute('SELECT balance FROM bench_account WHERE id = %s', [account_id])
+                balance = cursor.fetchone()[0]
+                cursor.execute(
+                    'INSERT INTO bench_event (account_id, balance, created_at) VALUES (%s, %s, %s)',
+                    [account_id, balance + 1, timezone.now().isoformat()],
+                )
+                cursor.execute('UPDATE bench_account SET balance = %s WHERE id = %s', [balance + 1, account_id])
+
+        operation = retry_on_locked(write, using=ALIAS) if enabled else write
+
+        def writer(number):
+            latencies, failed, count = [], 0, 0
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        operation((number * 7919 + count) % ACCOUNTS)
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    except OperationalError as exc:
+                        if not is_locked(exc):
+                            raise
+                        failed += 1
+                    count += 1
+            finally:
+                connections[ALIAS].close()
+            with lock:
+                result['latencies'] += latencies
+                result['failed'] += failed
+
+        def reader():
+            reads = 0
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        with connections[ALIAS].cursor() as cursor:
+                            cursor.execute('SELECT account_id, COUNT(*) FROM bench_event GROUP BY account_id')
+                            cursor.fetchall()
+                        reads += 1
+                    except OperationalError as exc:
+                        if not is_locked(exc):
+                            raise
+            finally:
+                connections[ALIAS].close()
+            with lock:
+                result['reads'] += reads
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from edoAPI import contacts
+from edoAPI.models import LandlordContact, Tenant, User
+
+FIRST_NAMES = 'amina brian carol daniel esther felix grace hassan irene james kevin lucy mercy noah olivia peter'.split()
+LAST_NAMES = 'achieng barasa chege duma egesa fundi gitau hamisi irungu juma kamau langat mwangi njoroge otieno wafula'.split()
+DOMAINS = ['example.com', 'mail.example.org', 'tenants.example.net']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time invitation-form autocomplete: the old icontains scan over every user and tenant against '
+        'the landlord-scoped contact prefix query and the in-process contact index. Seeds synthetic '
+        'users inside a transaction that is rolled back afterwards (unless --keep).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000, help='Synthetic platform users to seed.')
+        parser.add_argument('--contacts', type=int, default=2000, help='How many of them are the landlord\'s contacts.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+        parser.add_argument('--queries', nargs='*', default=['a', 'gr', 'kam', 'peter.m', 'otieno', 'mail.ex'])
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling back.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            landlord = self.seed(options['users'], options['contacts'])
+            started = time.perf_counter()
+            index = contacts.ContactIndex(list(
+                LandlordContact.objects.filter(landlord=landlord).values(*contacts.CONTACT_FIELDS)
+            ))
+            self.stdout.write(f'contact index built in {(time.perf_counter() - started) * 1000:.1f}ms')
+            self.stdout.write(
+                f'{connection.vendor}: {options["users"]} users, {options["contacts"]} contacts, '
+                f'{options["repeat"]} runs per query (ms, median)\n'
+            )
+            self.stdout.write(f'{"query":<12}{"icontains":>12}{"prefix db":>12}{"index":>10}{"hits":>6}')
+            for query in options['queries']:
+                legacy = self.time(lambda: (
+                    list(User.objects.filter(email__icontains=query).values('id', 'email')[:10]),
+                    list(Tenant.objects.filter(email__icontains=query).values('id', 'email')[:10]),
+                ), options['repeat'])
+                database = self.time(lambda: contacts.search_contacts_db(landlord.pk, query), options['repeat'])
+                memory = self.time(lambda: index.search(query), options['repeat'])
+                self.stdout.write(
+                    f'{query:<12}{legacy:>12.2f}{database:>12.2f}{memory:>10.3f}{len(index.search(query)):>6}'
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, count, contact_count):
+        rng = random.Random(16)
+        run = time.time_ns()
+        landlord = User.objects.create(email=f'contact-bench-{run}@example.com')
+        started = time.perf_counter()
+        people = []
+        # bulk_create materializes its input; feed it a chunk at a time
+        for chunk in range(0, count, 5000):
+            users = []
+            for number in range(chunk, min(chunk + 5000, count)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                users.append(User(
+                    email=f'{first}.{last}{number}-{run}@{rng.choice(DOMAINS)}',
+                    first_name=first.title(), last_name=last.title(),
+                ))
+                if len(people) < contact_count and rng.random() < contact_count * 2 / count:
+                    people.append(users[-1])
+            User.objects.bulk_create(users)
+        contacts.upsert_contacts(landlord.pk, [
+            LandlordContact(kind='invitee', email=user.email, first_name=user.first_name, last_name=user.last_name)
+            for user in people
+        ])
+        self.stdout.write(f'seeded in {time.perf_counter() - started:.1f}s')
+        return landlord
+
+    def time(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
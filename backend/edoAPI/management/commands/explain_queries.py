@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+from edoAPI.models import (
+    User, Role, LandlordProperty, Unit, Tenant, Notice, LandlordMaintenance,
+    ChatMessage, ConversationParticipant, TenantInvitation, VacateRequest, OutboundEmail,
+)
+
+
+class Command(BaseCommand):
+    help = "Print the database query plan (EXPLAIN / EXPLAIN QUERY PLAN) for each API endpoint's main query."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', type=int, help='Landlord user id to plan for (default: first landlord).')
+        parser.add_argument('--tenant', type=int, help='Tenant record id to plan for (default: first tenant).')
+        parser.add_argument('--page-size', type=int, default=50, help='LIMIT applied to list queries.')
+        parser.add_argument('--only', help='Only explain queries whose label contains this text.')
+
+    def handle(self, *args, **options):
+        landlord_id = options['landlord'] or User.objects.with_role(Role.RoleName.LANDLORD).values_list('pk', flat=True).first() or 1
+        tenant = Tenant.objects.filter(pk=options['tenant']).first() if options['tenant'] else Tenant.objects.first()
+        tenant_id = tenant.pk if tenant else 1
+        tenant_user_id = tenant.user_id if tenant else 1
+        property_id = LandlordProperty.objects.filter(landlord_id=landlord_id).values_list('pk', flat=True).first() or 1
+        limit = options['page_size'] + 1
+        now = timezone.now()
+
+        queries = [
+            ('landlord properties', LandlordProperty.objects.filter(landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('units (UnitViewSet)', Unit.objects.filter(property__landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('unit by (property, unit_id)', Unit.objects.filter(property_id=property_id, unit_id='A1', property__landlord_id=landlord_id)),
+            ('tenants (TenantViewSet)', Tenant.objects.filter(unit__property__landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('landlord maintenance', LandlordMaintenance.objects.filter(property__landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('tenant maintenance', LandlordMaintenance.objects.filter(tenant_id=tenant_id).order_by('-created_at', '-id')[:limit]),
+            ('chat inbox (sender OR recipient)', ChatMessage.objects.filter(
+                Q(sender_id=tenant_user_id) | Q(recipient_id=tenant_user_id)
+            ).order_by('-timestamp', '-id')[:limit]),
+            ('conversation inbox', ConversationParticipant.objects.filter(user_id=tenant_user_id).select_related(
+                'conversation__user_a', 'conversation__user_b', 'conversation__last_message',
+            ).order_by('-last_activity', '-id')[:limit]),
+            ('conversation thread', ChatMessage.objects.filter(conversation_id=1).order_by('-timestamp', '-id')[:limit]),
+            ('notices (landlord)', Notice.objects.filter(sender_id=landlord_id).order_by('-date_sent', '-id')[:limit]),
+            ('notices since (tenant)', Notice.objects.filter(
+                deliveries__recipient_id=tenant_user_id, deliveries__delivered_at__gt=now - timedelta(days=7)
+            ).order_by('-date_sent', '-id')[:limit]),
+            ('vacate requests (landlord)', VacateRequest.objects.filter(property__landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('vacate pending check', VacateRequest.objects.filter(tenant_id=tenant_id, property_id=property_id, status='pending')),
+            ('vacate 24h rate limit', VacateRequest.objects.filter(
+                tenant_id=tenant_id, property_id=property_id, created_at__gte=now - timedelta(hours=24)
+            )),
+            ('expired pending invitations', TenantInvitation.objects.filter(status='pending', expires_at__lt=now)),
+            ('landlord invitations', TenantInvitation.objects.filter(landlord_id=landlord_id).order_by('-created_at', '-id')[:limit]),
+            ('due outbox emails', OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')[:limit]),
+            ('users with landlord role', User.objects.with_role(Role.RoleName.LANDLORD).order_by('-created_at', '-id')[:limit]),
+        ]
+
+        only = options.get('only')
+        self.stdout.write(f'Database vendor: {connection.vendor}\n')
+        for label, queryset in queries:
+            if only and only.lower() not in label.lower():
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,69 @@
+import time
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from edoAPI.outbox import drain_outbox, outbox_setting, outbox_stats
+
+
+def _summary(seconds):
+    if not seconds:
+        return '-'
+    ordered = sorted(seconds)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f'avg {sum(ordered) / len(ordered) * 1000:.1f}ms p95 {p95 * 1000:.1f}ms max {ordered[-1] * 1000:.1f}ms'
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued outbox emails in batches over one reused mail connection, retrying failures '
+        'with exponential backoff and dead-lettering messages that exhaust their attempts. '
+        'For local testing point EMAIL_HOST/EMAIL_PORT at an SMTP stand-in, or set '
+        'EMAIL_BACKEND to the console backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages claimed per batch (default: EMAIL_OUTBOX["BATCH_SIZE"]).')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages instead of exiting when the queue is drained.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls in --loop mode.')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches.')
+        parser.add_argument('--stats', action='store_true', help='Only print queue depth and exit.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_stats()
+            return
+
+        batch_size = options['batch_size'] or outbox_setting('BATCH_SIZE')
+        batches = 0
+        connection = None
+        try:
+            while options['max_batches'] is None or batches < options['max_batches']:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                result = drain_outbox(batch_size=batch_size, connection=connection)
+                if not result.claimed:
+                    # Don't hold an idle SMTP session open between polls
+                    connection.close()
+                    connection = None
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                batches += 1
+                self.stdout.write(
+                    f'batch {batches}: claimed {result.claimed}, sent {result.sent}, '
+                    f'retrying {result.retried}, dead {result.dead}; '
+                    f'send latency {_summary(result.send_seconds)}; queue latency {_summary(result.queue_seconds)}'
+                )
+        finally:
+            if connection is not None:
+                connection.close()
+        self.print_stats()
+
+    def print_stats(self):
+        stats = outbox_stats()
+        depth = ', '.join(f'{status} {count}' for status, count in stats['depth'].items())
+        oldest = stats['oldest_pending_seconds']
+        self.stdout.write(
+            f'outbox depth: {depth}; due now {stats["due"]}; '
+            f'oldest undelivered {"-" if oldest is None else f"{oldest:.0f}s"}'
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from edoAPI import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes over chat and maintenance messages from their tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recreate', action='store_true', help='Drop and recreate the index tables and triggers first.')
+        parser.add_argument('--no-optimize', action='store_true', help='Skip merging FTS5 segments after the rebuild (SQLite).')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(f'No full-text index on {connection.vendor}; search uses icontains.'))
+            return
+        if options['recreate']:
+            search.uninstall(connection)
+        search.rebuild(connection, optimize=not options['no_optimize'])
+        for kind, models in search.INDEXED_MODELS.items():
+            self.stdout.write(f'{kind}: {sum(model.objects.count() for model in models)} messages indexed')
+        self.stdout.write(self.style.SUCCESS('Search indexes rebuilt.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from edoAPI.response_cache import cache_stats, reset_stats, response_cache_setting
+
+
+class Command(BaseCommand):
+    help = (
+        'Print hits, misses and waits (requests answered by another request\'s computation) of the '
+        'per-landlord response cache, by endpoint, for tuning RESPONSE_CACHE["TTL"].'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them.')
+
+    def handle(self, *args, **options):
+        if not response_cache_setting('ENABLED'):
+            self.stdout.write('Response cache is disabled (RESPONSE_CACHE["ENABLED"]).')
+        self.stdout.write(f'TTL {response_cache_setting("TTL")}s, cache {response_cache_setting("CACHE")!r}')
+        self.stdout.write(f'{"endpoint":<24}{"hits":>10}{"misses":>10}{"waits":>10}{"hit %":>8}')
+        for endpoint, counts in cache_stats().items():
+            ratio = '-' if counts['hit_ratio'] is None else f'{counts["hit_ratio"] * 100:.1f}'
+            self.stdout.write(f'{endpoint:<24}{counts["hits"]:>10}{counts["misses"]:>10}{counts["waits"]:>10}{ratio:>8}')
+        if options['reset']:
+            reset_stats()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0020_alter_vacaterequest_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='role_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
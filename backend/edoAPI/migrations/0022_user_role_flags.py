@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+# Mirrors Role.BITS at the time of this migration
+ROLE_BITS = {
+    'host': 1 << 0,
+    'tenant': 1 << 1,
+    'landlord': 1 << 2,
+    'admin': 1 << 3,
+    'regular': 1 << 4,
+}
+REGULAR = ROLE_BITS['regular']
+
+
+def roles_to_flags(apps, schema_editor):
+    User = apps.get_model('edoAPI', 'User')
+    Through = User.roles.through
+    flags_by_user = {}
+    for user_id, role_name in Through.objects.values_list('user_id', 'role__name').iterator():
+        flags_by_user[user_id] = flags_by_user.get(user_id, 0) | ROLE_BITS.get((role_name or '').lower(), 0)
+    # Group users by resulting mask so the backfill is one UPDATE per distinct mask
+    users_by_flags = {}
+    for user_id, flags in flags_by_user.items():
+        users_by_flags.setdefault(flags | REGULAR, []).append(user_id)
+    for flags, user_ids in users_by_flags.items():
+        User.objects.filter(pk__in=user_ids).update(role_flags=flags)
+
+
+def flags_to_roles(apps, schema_editor):
+    User = apps.get_model('edoAPI', 'User')
+    Role = apps.get_model('edoAPI', 'Role')
+    Through = User.roles.through
+    roles = {name: Role.objects.get_or_create(name=name)[0] for name in ROLE_BITS}
+    links = []
+    for user_id, flags in User.objects.values_list('pk', 'role_flags').iterator():
+        for name, bit in ROLE_BITS.items():
+            if flags & bit:
+                links.append(Through(user_id=user_id, role_id=roles[name].pk))
+    Through.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0021_user_role_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='role_flags',
+            field=models.PositiveSmallIntegerField(db_index=True, default=16),
+        ),
+        migrations.RunPython(roles_to_flags, flags_to_roles),
+        migrations.RemoveField(
+            model_name='user',
+            name='roles',
+        ),
+        migrations.DeleteModel(
+            name='Role',
+        ),
+    ]
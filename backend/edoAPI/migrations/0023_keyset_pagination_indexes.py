@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('edoAPI', '0022_user_role_flags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['-timestamp', '-id'], name='chat_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landlordmaintenance',
+            index=models.Index(fields=['-created_at', '-id'], name='maint_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['-date_sent', '-id'], name='notice_sent_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['-created_at', '-id'], name='tenant_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantinvitation',
+            index=models.Index(fields=['-created_at', '-id'], name='invite_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacaterequest',
+            index=models.Index(fields=['-created_at', '-id'], name='vacate_created_id_idx'),
+        ),
+    ]
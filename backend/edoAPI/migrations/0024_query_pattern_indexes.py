@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_units(apps, schema_editor):
+    """Refuse to add the constraint over units numbered twice in one property."""
+    Unit = apps.get_model('edoAPI', 'Unit')
+    duplicates = list(
+        Unit.objects.values('property_id', 'unit_id').annotate(units=Count('id')).filter(units__gt=1)
+        .order_by('property_id', 'unit_id').values_list('property_id', 'unit_id', 'units')[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'These unit numbers are used more than once in the same property; '
+            'renumber or merge them before migrating: '
+            + ', '.join(f'property {property_id} unit {unit_id!r} ({units} rows)' for property_id, unit_id, units in duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0023_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_units, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['sender', '-timestamp', '-id'], name='chat_sender_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['recipient', '-timestamp', '-id'], name='chat_recipient_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landlordmaintenance',
+            index=models.Index(fields=['property', '-created_at', '-id'], name='maint_property_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landlordmaintenance',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='maint_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landlordproperty',
+            index=models.Index(fields=['landlord', '-created_at', '-id'], name='property_landlord_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantinvitation',
+            index=models.Index(fields=['landlord', '-created_at', '-id'], name='invite_landlord_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantinvitation',
+            index=models.Index(fields=['status', 'expires_at'], name='invite_status_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacaterequest',
+            index=models.Index(fields=['tenant', 'property', 'status'], name='vacate_tenant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacaterequest',
+            index=models.Index(fields=['tenant', 'property', 'created_at'], name='vacate_tenant_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='unit',
+            constraint=models.UniqueConstraint(fields=('property', 'unit_id'), name='unique_unit_per_property'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_notice_scope(apps, schema_editor):
+    Notice = apps.get_model('edoAPI', 'Notice')
+    Unit = apps.get_model('edoAPI', 'Unit')
+    Tenant = apps.get_model('edoAPI', 'Tenant')
+    LandlordProperty = apps.get_model('edoAPI', 'LandlordProperty')
+    NoticeDelivery = apps.get_model('edoAPI', 'NoticeDelivery')
+
+    # Owning property from the targeted unit / tenancy, sender from its landlord
+    Notice.objects.filter(property__isnull=True, unit__isnull=False).update(
+        property_id=Subquery(Unit.objects.filter(pk=OuterRef('unit_id')).values('property_id')[:1])
+    )
+    Notice.objects.filter(property__isnull=True, tenant__isnull=False).update(
+        property_id=Subquery(Tenant.objects.filter(pk=OuterRef('tenant_id')).values('unit__property_id')[:1])
+    )
+    Notice.objects.filter(sender__isnull=True, property__isnull=False).update(
+        sender_id=Subquery(LandlordProperty.objects.filter(pk=OuterRef('property_id')).values('landlord_id')[:1])
+    )
+
+    # Mirrors Notice.resolve_recipients / Notice.deliver
+    deliveries = []
+    for notice in Notice.objects.filter(property__isnull=False).iterator():
+        if notice.tenant_id:
+            tenants = Tenant.objects.filter(pk=notice.tenant_id)
+        elif notice.unit_id:
+            tenants = Tenant.objects.filter(unit_id=notice.unit_id)
+        else:
+            tenants = Tenant.objects.filter(unit__property_id=notice.property_id)
+        recipients = {}
+        for tenant_id, user_id in tenants.values_list('id', 'user_id'):
+            recipients.setdefault(user_id, tenant_id)
+        deliveries.extend(
+            NoticeDelivery(notice_id=notice.pk, tenant_id=tenant_id, recipient_id=user_id, delivered_at=notice.date_sent)
+            for user_id, tenant_id in recipients.items()
+        )
+    NoticeDelivery.objects.bulk_create(deliveries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0024_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoticeDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivered_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='property',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notices', to='edoAPI.landlordproperty'),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sent_notices', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['sender', '-date_sent', '-id'], name='notice_sender_sent_idx'),
+        ),
+        migrations.AddField(
+            model_name='noticedelivery',
+            name='notice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='edoAPI.notice'),
+        ),
+        migrations.AddField(
+            model_name='noticedelivery',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notice_deliveries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='noticedelivery',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notice_deliveries', to='edoAPI.tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='noticedelivery',
+            index=models.Index(fields=['recipient', '-delivered_at'], name='notice_delivery_recipient_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='noticedelivery',
+            constraint=models.UniqueConstraint(fields=('notice', 'recipient'), name='unique_notice_recipient'),
+        ),
+        migrations.RunPython(backfill_notice_scope, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:18
+
+import django.db.models.deletion
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def attach_existing_messages(apps, schema_editor):
+    # Historical models don't carry Conversation.attach(); same steps inline
+    ChatMessage = apps.get_model('edoAPI', 'ChatMessage')
+    Conversation = apps.get_model('edoAPI', 'Conversation')
+    ConversationParticipant = apps.get_model('edoAPI', 'ConversationParticipant')
+    threads = {}
+    rows = ChatMessage.objects.values_list('pk', 'sender_id', 'recipient_id', 'unit_id', 'property_id', 'unit__property_id')
+    for pk, sender_id, recipient_id, unit_id, property_id, unit_property_id in rows.iterator():
+        if unit_id:
+            property_id = unit_property_id
+        low, high = sorted((sender_id, recipient_id))
+        context = f'u{unit_id}' if unit_id else f'p{property_id}' if property_id else ''
+        thread = threads.setdefault(f'{low}:{high}:{context}', {'users': sorted({low, high}), 'unit_id': unit_id, 'property_id': property_id, 'ids': []})
+        thread['ids'].append(pk)
+    Conversation.objects.bulk_create([
+        Conversation(key=key, user_a_id=thread['users'][0], user_b_id=thread['users'][-1],
+                     unit_id=thread['unit_id'], property_id=thread['property_id'])
+        for key, thread in threads.items()
+    ], batch_size=500)
+    ids = dict(Conversation.objects.values_list('key', 'pk'))
+    ConversationParticipant.objects.bulk_create([
+        ConversationParticipant(conversation_id=ids[key], user_id=user_id)
+        for key, thread in threads.items() for user_id in thread['users']
+    ], batch_size=500)
+    for key, thread in threads.items():
+        ChatMessage.objects.filter(pk__in=thread['ids']).update(conversation_id=ids[key])
+
+    latest = ChatMessage.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+    Conversation.objects.update(
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_activity=Coalesce(Subquery(latest.values('timestamp')[:1]), F('created_at')),
+    )
+    unread = (
+        ChatMessage.objects.filter(conversation=OuterRef('conversation'), recipient=OuterRef('user'), is_read=False)
+        .order_by().values('conversation').annotate(count=Count('pk')).values('count')
+    )
+    ConversationParticipant.objects.update(
+        unread_count=Coalesce(Subquery(unread), 0, output_field=models.PositiveIntegerField()),
+        last_activity=Subquery(Conversation.objects.filter(pk=OuterRef('conversation')).values('last_activity')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0026_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edoAPI.chatmessage')),
+                ('property', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='edoAPI.landlordproperty')),
+                ('unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='edoAPI.unit')),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='edoAPI.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', '-timestamp', '-id'], name='chat_conversation_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='edoAPI.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_activity', '-id'], name='conversation_inbox_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationparticipant',
+            constraint=models.UniqueConstraint(fields=('conversation', 'user'), name='unique_conversation_participant'),
+        ),
+        migrations.RunPython(attach_existing_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def indexed_here():
+    # The tables that exist at this point; the chat archive is indexed in 0034
+    from edoAPI.models import ChatMessage, MaintenanceMessage
+    return [ChatMessage, MaintenanceMessage]
+
+
+def install_search(apps, schema_editor):
+    from edoAPI import search
+    search.install(schema_editor.connection, indexed_here())
+    search.rebuild(schema_editor.connection, optimize=False, models=indexed_here())
+
+
+def uninstall_search(apps, schema_editor):
+    from edoAPI import search
+    search.uninstall(schema_editor.connection, indexed_here())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0027_conversations'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
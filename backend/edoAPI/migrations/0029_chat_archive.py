@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0028_message_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedChatMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('timestamp', models.DateTimeField()),
+                ('is_read', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conversation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='edoAPI.conversation')),
+                ('property', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edoAPI.landlordproperty')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edoAPI.unit')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sender', '-timestamp', '-id'], name='chat_archive_sender_ts_idx'), models.Index(fields=['recipient', '-timestamp', '-id'], name='chat_archive_recipient_ts_idx'), models.Index(fields=['conversation', '-timestamp', '-id'], name='chat_archive_conv_ts_idx')],
+            },
+        ),
+    ]
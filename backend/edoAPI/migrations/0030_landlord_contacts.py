@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_contacts(apps, schema_editor):
+    Tenant = apps.get_model('edoAPI', 'Tenant')
+    TenantInvitation = apps.get_model('edoAPI', 'TenantInvitation')
+    LandlordContact = apps.get_model('edoAPI', 'LandlordContact')
+
+    def contact(landlord_id, email, **fields):
+        first_name, last_name = fields.get('first_name', ''), fields.get('last_name', '')
+        return LandlordContact(
+            landlord_id=landlord_id, email=email, email_key=email.strip().lower(),
+            name_key=f'{first_name} {last_name}'.strip().lower(), last_name_key=last_name.strip().lower(), **fields,
+        )
+
+    # Tenants first so they win over invitations for the same email
+    tenants = Tenant.objects.values_list(
+        'unit__property__landlord_id', 'email', 'user_id', 'id', 'first_name', 'last_name', 'phone',
+    ).order_by('-created_at')
+    LandlordContact.objects.bulk_create([
+        contact(landlord_id, email, user_id=user_id, tenant_id=tenant_id, kind='tenant',
+                first_name=first_name, last_name=last_name, phone=phone or '')
+        for landlord_id, email, user_id, tenant_id, first_name, last_name, phone in tenants.iterator()
+    ], batch_size=500, ignore_conflicts=True)
+    invitations = TenantInvitation.objects.values_list('landlord_id', 'email', 'phone')
+    LandlordContact.objects.bulk_create([
+        contact(landlord_id, email, kind='invitee', phone=phone or '')
+        for landlord_id, email, phone in invitations.iterator()
+    ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0029_chat_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LandlordContact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tenant', 'Tenant'), ('invitee', 'Invitee')], max_length=10)),
+                ('email', models.EmailField(max_length=254)),
+                ('first_name', models.CharField(blank=True, max_length=100)),
+                ('last_name', models.CharField(blank=True, max_length=100)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('email_key', models.CharField(max_length=254)),
+                ('name_key', models.CharField(blank=True, max_length=201)),
+                ('last_name_key', models.CharField(blank=True, max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('landlord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contacts', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='edoAPI.tenant')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['landlord', 'name_key'], name='contact_name_key_idx'), models.Index(fields=['landlord', 'last_name_key'], name='contact_last_name_key_idx')],
+                'constraints': [models.UniqueConstraint(fields=('landlord', 'email_key'), name='unique_landlord_contact_email')],
+            },
+        ),
+        migrations.RunPython(backfill_contacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:35
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """Refuse to add the constraint over accounts that differ only in case."""
+    User = apps.get_model('edoAPI', 'User')
+    duplicates = list(
+        User.objects.annotate(key=Lower('email')).values('key')
+        .annotate(accounts=Count('id')).filter(accounts__gt=1).values_list('key', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'These emails belong to more than one account when compared case-insensitively; '
+            f'merge or rename them before migrating: {", ".join(duplicates)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('edoAPI', '0030_landlord_contacts'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='tenant',
+            name='email_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='email_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['email_key'], name='tenant_email_key_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(fields=('email_key',), name='unique_user_email_key'),
+        ),
+    ]
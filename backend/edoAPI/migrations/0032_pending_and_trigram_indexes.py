@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+def install_contact_indexes(apps, schema_editor):
+    from edoAPI import contacts
+    contacts.install_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0031_normalized_email'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tenantinvitation',
+            name='invite_status_expires_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vacaterequest',
+            name='vacate_tenant_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tenantinvitation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['expires_at'], name='invite_pending_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantinvitation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['unit', 'expires_at'], name='invite_pending_unit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacaterequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['tenant', 'property'], name='vacate_pending_idx'),
+        ),
+        # PostgreSQL only; a no-op elsewhere
+        migrations.RunPython(install_contact_indexes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing messages were last changed when they were sent
+    MaintenanceMessage = apps.get_model('edoAPI', 'MaintenanceMessage')
+    MaintenanceMessage.objects.update(updated_at=models.F('timestamp'))
+
+
+def reinstall_search(apps, schema_editor):
+    # SQLite adds and drops the column by remaking the table, which drops the
+    # search triggers with it
+    from edoAPI import search
+    from edoAPI.models import MaintenanceMessage
+    search.install(schema_editor.connection, [MaintenanceMessage])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0032_pending_and_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search),
+        migrations.AddField(
+            model_name='maintenancemessage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+    ]
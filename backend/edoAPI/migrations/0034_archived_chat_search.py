@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    # Archiving moves a message out of the chat index; index the archive so
+    # search still finds it
+    from edoAPI import search
+    from edoAPI.models import ArchivedChatMessage
+    search.rebuild(schema_editor.connection, optimize=False, models=[ArchivedChatMessage])
+
+
+def uninstall_search(apps, schema_editor):
+    from edoAPI import search
+    from edoAPI.models import ArchivedChatMessage
+    search.uninstall(schema_editor.connection, [ArchivedChatMessage])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edoAPI', '0033_maintenancemessage_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Lower
 from django.contrib.auth.models import AbstractUser, Group, Permission, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -10,22 +12,67 @@ logger = logging.getLogger(__name__)
 
 # Role is for business logic (e.g., dashboard display, feature access)
 # Django groups/permissions are for internal system access control
-class Role(models.Model):
+class Role:
+    """
+    Business roles, stored on User.role_flags as a bitmask so role checks and
+    role filters are single-column operations instead of joins.
+    """
     class RoleName(models.TextChoices):
         HOST = 'host', _('host')
         TENANT = 'tenant', _('tenant')
         LANDLORD = 'landlord', _('landlord')
         ADMIN = 'admin', _('admin')
         REGULAR = 'regular', _('regular')
-    # Remove choices constraint to allow dynamic roles
-    name = models.CharField(max_length=20, unique=True)
 
-    def __str__(self):
-        # If using TextChoices, get label, else fallback to name
-        try:
-            return str(self.RoleName(self.name).label)
-        except ValueError:
-            return str(self.name)
+    # Bit positions are persisted in the database; never renumber them
+    BITS = {
+        RoleName.HOST: 1 << 0,
+        RoleName.TENANT: 1 << 1,
+        RoleName.LANDLORD: 1 << 2,
+        RoleName.ADMIN: 1 << 3,
+        RoleName.REGULAR: 1 << 4,
+    }
+    ALL = sum(BITS.values())
+    # Only one of these may be held at a time (see User.clean); every user
+    # also holds 'regular' (User.save), so it can't be one of them
+    EXCLUSIVE = ALL ^ BITS[RoleName.REGULAR]
+
+    @classmethod
+    def bit(cls, role_name):
+        """Return the bit for a role name, or 0 for an unknown role."""
+        return cls.BITS.get(str(role_name).lower(), 0)
+
+    @classmethod
+    def names(cls, flags):
+        """Return the role names set in a bitmask, in declaration order."""
+        return [str(name) for name, bit in cls.BITS.items() if flags & bit]
+
+    @classmethod
+    def flag_values_with(cls, role_name):
+        """
+        Every bitmask value that includes the given role. Filtering with
+        role_flags__in=... lets the database use the role_flags index.
+        """
+        bit = cls.bit(role_name)
+        if not bit:
+            return []
+        return [flags for flags in range(cls.ALL + 1) if flags & bit]
+
+def email_key(email):
+    """
+    The canonical form of an email for lookups against an `email_key` column.
+    Lowercased by the database, like the column itself, so both sides agree
+    on every backend (SQLite's LOWER() only folds ASCII).
+    """
+    return Lower(Value((email or '').strip(), output_field=models.CharField()))
+
+
+def email_key_field():
+    # Computed by the database, so bulk_create() and update() keep it in step
+    return models.GeneratedField(
+        expression=Lower('email'), output_field=models.CharField(max_length=254), db_persist=True,
+    )
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -56,6 +103,14 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def with_role(self, role_name):
+        """Users holding the given role."""
+        return self.filter(role_flags__in=Role.flag_values_with(role_name))
+
+    def by_email(self, email):
+        """Case-insensitive email match on the indexed email_key column."""
+        return self.filter(email_key=email_key(email))
+
 def validate_profile_image(image):
     # Validate file type
     valid_mime_types = ['image/jpeg', 'image/png']
@@ -76,10 +131,11 @@ class User(AbstractUser):
     # Override username field to use email instead
     username = None
     email = models.EmailField(_('email address'), unique=True)
+    email_key = email_key_field()
     
     # Additional fields from the forms
     phone = models.CharField(max_length=20, null=True, blank=True)
-    roles = models.ManyToManyField(Role, related_name='users')
+    role_flags = models.PositiveSmallIntegerField(default=Role.BITS[Role.RoleName.REGULAR], db_index=True)
     user_type = models.CharField(max_length=20, choices=[
         ('individual', 'Individual'),
         ('company', 'Company')
@@ -96,6 +152,9 @@ class User(AbstractUser):
         ('verified', 'Verified')
     ], default='unverified')
     profile_image = models.ImageField(upload_to='profile_images/', null=True, blank=True, validators=[validate_profile_image])
+    # Bumped whenever the user's roles change so role claims embedded in
+    # previously issued access tokens can be recognised as stale
+    role_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -106,6 +165,16 @@ class User(AbstractUser):
     # Use custom manager
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination order for UserListView
+            models.Index(fields=['-created_at', '-id'], name='user_created_id_idx'),
+        ]
+        constraints = [
+            # One account per address, whatever its case
+            models.UniqueConstraint(fields=['email_key'], name='unique_user_email_key'),
+        ]
+
     groups = models.ManyToManyField(
         Group,
         related_name='edoapi_user_set',
@@ -124,18 +193,52 @@ class User(AbstractUser):
     def clean(self):
         super().clean()
         # Prevent conflicting roles (e.g., both tenant and landlord)
-        role_names = set(self.roles.values_list('name', flat=True))
-        exclusive_roles = {Role.RoleName.HOST, Role.RoleName.TENANT, Role.RoleName.LANDLORD, Role.RoleName.ADMIN, Role.RoleName.REGULAR}
         # Only allow one exclusive role at a time
-        if len(role_names & exclusive_roles) > 1:
-            raise ValidationError('A user cannot have more than one of the following roles: host, tenant, landlord, admin, regular.')
+        if bin(self.role_flags & Role.EXCLUSIVE).count('1') > 1:
+            raise ValidationError('A user cannot have more than one of the following roles: host, tenant, landlord, admin.')
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
 
     def has_role(self, role_name):
         """Check if the user has a specific role by name (string or Role.RoleName)."""
-        return self.roles.filter(name=role_name).exists()
+        return bool(self.role_flags & Role.bit(role_name))
+
+    def role_names(self):
+        """Return the names of all roles assigned to the user."""
+        return Role.names(self.role_flags)
+
+    def _update_role_flags(self, flags_expression):
+        # Atomic single-row UPDATE; also bumps role_version so role claims in
+        # outstanding access tokens are recognised as stale
+        User.objects.filter(pk=self.pk).update(
+            role_flags=flags_expression,
+            role_version=models.F('role_version') + 1,
+        )
+        self.refresh_from_db(fields=['role_flags', 'role_version'])
+
+    def add_role(self, role_name):
+        bit = Role.bit(role_name)
+        if not bit:
+            raise ValueError(f'Unknown role "{role_name}"')
+        self._update_role_flags(models.F('role_flags').bitor(bit))
+
+    def remove_role(self, role_name):
+        bit = Role.bit(role_name)
+        if not bit:
+            raise ValueError(f'Unknown role "{role_name}"')
+        # 'regular' is held by every user and is never removed
+        self._update_role_flags(models.F('role_flags').bitand(Role.ALL ^ (bit & Role.EXCLUSIVE)))
+
+    def set_roles(self, role_names):
+        # Every user is regular, whatever else they hold
+        flags = Role.BITS[Role.RoleName.REGULAR]
+        for role_name in role_names:
+            bit = Role.bit(role_name)
+            if not bit:
+                raise ValueError(f'Unknown role "{role_name}"')
+            flags |= bit
+        self._update_role_flags(flags)
 
     def is_landlord(self):
         return self.has_role(Role.RoleName.LANDLORD)
@@ -153,10 +256,33 @@ class User(AbstractUser):
         return self.has_role(Role.RoleName.REGULAR)
 
     def save(self, *args, **kwargs):
+        # Every user keeps the 'regular' role
+        self.role_flags |= Role.BITS[Role.RoleName.REGULAR]
         super().save(*args, **kwargs)
-        regular_role, _ = Role.objects.get_or_create(name='regular')
-        if not self.roles.filter(name='regular').exists():
-            self.roles.add(regular_role)
+
+class LandlordPropertyQuerySet(models.QuerySet):
+    def with_occupancy(self, today=None):
+        """
+        Annotate unit counts, occupancy and the month's rent in the same query:
+        unit_count, occupied_units, potential_rent (every unit), occupied_rent
+        and collected_rent (payments from the 1st of the month up to today).
+        """
+        today = today or timezone.localdate()
+        collected = (
+            Payment.objects.filter(
+                unit__property=OuterRef('pk'), payment_date__gte=today.replace(day=1), payment_date__lte=today,
+            )
+            .order_by().values('unit__property').annotate(total=Sum('amount')).values('total')
+        )
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+        return self.annotate(
+            unit_count=Count('units'),
+            occupied_units=Count('units', filter=Q(units__status='occupied')),
+            potential_rent=Coalesce(Sum('units__rent_amount'), Value(0), output_field=money),
+            occupied_rent=Coalesce(Sum('units__rent_amount', filter=Q(units__status='occupied')), Value(0), output_field=money),
+            # A subquery: joining payments as well would multiply the unit sums
+            collected_rent=Coalesce(Subquery(collected), Value(0), output_field=money),
+        )
 
 class LandlordProperty(models.Model):
     PROPERTY_TYPES = [
@@ -179,6 +305,13 @@ class LandlordProperty(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LandlordPropertyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['landlord', '-created_at', '-id'], name='property_landlord_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.city}, {self.state})"
 
@@ -195,6 +328,12 @@ class Unit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # Unit IDs are per property; also serves (property, unit_id) lookups
+            models.UniqueConstraint(fields=['property', 'unit_id'], name='unique_unit_per_property'),
+        ]
+
     def __str__(self):
         return f"Unit {self.unit_id} - {self.property.name}"
 
@@ -204,6 +343,7 @@ class Tenant(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField()
+    email_key = email_key_field()
     phone = models.CharField(max_length=20)
     lease_type = models.CharField(max_length=20, choices=[('rental', 'Rental'), ('lease', 'Lease')], default='rental')
     start_date = models.DateField()
@@ -214,6 +354,12 @@ class Tenant(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='tenant_created_id_idx'),
+            models.Index(fields=['email_key'], name='tenant_email_key_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} (Unit {self.unit.unit_id})"
 
@@ -232,6 +378,14 @@ class Payment(models.Model):
         return f"Payment {self.amount} for Unit {self.unit.unit_id} by {self.tenant.first_name}"
 
 class Notice(models.Model):
+    """
+    A notice from a landlord. It targets a tenant, a unit, or (with both
+    unset) every tenant of `property` - or of all the sender's properties
+    when no property is given. Recipients are resolved once, at send time,
+    into NoticeDelivery rows.
+    """
+    sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sent_notices')
+    property = models.ForeignKey(LandlordProperty, on_delete=models.CASCADE, related_name='notices', null=True, blank=True)
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name='notices', null=True, blank=True)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='notices', null=True, blank=True)
     notice_type = models.CharField(max_length=50)
@@ -242,9 +396,77 @@ class Notice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date_sent', '-id'], name='notice_sent_id_idx'),
+            # Landlord notice lists, newest first
+            models.Index(fields=['sender', '-date_sent', '-id'], name='notice_sender_sent_idx'),
+        ]
+
     def __str__(self):
         return f"Notice: {self.title} to {self.tenant.first_name if self.tenant else 'All'} (Unit {self.unit.unit_id if self.unit else 'All'})"
 
+    def save(self, *args, **kwargs):
+        # Targeted notices belong to the property of their unit / tenancy
+        if self.property_id is None:
+            if self.unit_id:
+                self.property_id = self.unit.property_id
+            elif self.tenant_id:
+                self.property_id = self.tenant.unit.property_id
+        super().save(*args, **kwargs)
+
+    def resolve_recipients(self):
+        """Tenancies this notice is addressed to, as a single queryset."""
+        if self.tenant_id:
+            return Tenant.objects.filter(pk=self.tenant_id)
+        if self.unit_id:
+            return Tenant.objects.filter(unit_id=self.unit_id)
+        if self.property_id:
+            return Tenant.objects.filter(unit__property_id=self.property_id)
+        if self.sender_id:
+            return Tenant.objects.filter(unit__property__landlord_id=self.sender_id)
+        return Tenant.objects.none()
+
+    def deliver(self):
+        """
+        Fan the notice out to its recipients: one SELECT resolves them and
+        one INSERT writes their deliveries. Safe to call again; users who
+        already have a delivery are skipped.
+        """
+        recipients = {}
+        for tenant_id, user_id in self.resolve_recipients().values_list('id', 'user_id'):
+            # A user renting several units still gets the notice once
+            recipients.setdefault(user_id, tenant_id)
+        return NoticeDelivery.objects.bulk_create([
+            NoticeDelivery(notice=self, tenant_id=tenant_id, recipient_id=user_id, delivered_at=self.date_sent)
+            for user_id, tenant_id in recipients.items()
+        ], ignore_conflicts=True)
+
+    def redeliver(self):
+        """Replace the deliveries after the notice's targeting has changed."""
+        self.deliveries.all().delete()
+        return self.deliver()
+
+class NoticeDelivery(models.Model):
+    """A notice as received by one tenant user."""
+    notice = models.ForeignKey(Notice, on_delete=models.CASCADE, related_name='deliveries')
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='notice_deliveries')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notice_deliveries')
+    # Copy of notice.date_sent, so a tenant's notices (and "notices since X")
+    # are one range scan on the recipient index
+    delivered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notice', 'recipient'], name='unique_notice_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-delivered_at'], name='notice_delivery_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.notice.title} -> {self.recipient.email}"
+
 class LandlordMaintenance(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -274,6 +496,14 @@ class LandlordMaintenance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='maint_created_id_idx'),
+            # Landlord (via property) and tenant maintenance lists, newest first
+            models.Index(fields=['property', '-created_at', '-id'], name='maint_property_created_idx'),
+            models.Index(fields=['tenant', '-created_at', '-id'], name='maint_tenant_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.subject} ({self.get_status_display()})"
 
@@ -282,11 +512,13 @@ class MaintenanceMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='maintenance_messages')
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Message by {self.sender.email} on {self.timestamp}"
 
 class ChatMessage(models.Model):
+    conversation = models.ForeignKey('Conversation', on_delete=models.CASCADE, null=True, blank=True, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_chat_messages')
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_chat_messages')
     unit = models.ForeignKey(Unit, on_delete=models.SET_NULL, null=True, blank=True, related_name='chat_messages')
@@ -295,9 +527,233 @@ class ChatMessage(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='chat_timestamp_id_idx'),
+            # sender OR recipient inbox queries, one index per side of the OR
+            models.Index(fields=['sender', '-timestamp', '-id'], name='chat_sender_ts_idx'),
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='chat_recipient_ts_idx'),
+            # A conversation's thread, newest first
+            models.Index(fields=['conversation', '-timestamp', '-id'], name='chat_conversation_ts_idx'),
+        ]
+
     def __str__(self):
         return f"Chat from {self.sender.email} to {self.recipient.email} at {self.timestamp}"
 
+    def save(self, *args, **kwargs):
+        # New messages join (or start) their conversation and update its
+        # summary in the same transaction
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.conversation_id is None:
+                self.conversation = Conversation.for_message(self)
+            super().save(*args, **kwargs)
+            self.conversation.record_message(self)
+
+class Conversation(models.Model):
+    """
+    A chat thread between two users, optionally about a unit or property.
+    The latest message and each participant's unread count are kept up to
+    date as messages are sent and read, so inboxes and unread badges never
+    scan ChatMessage.
+    """
+    # Participants are stored lowest user id first; `key` identifies the
+    # pair plus context so concurrent first messages can't open two threads
+    key = models.CharField(max_length=100, unique=True)
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    unit = models.ForeignKey(Unit, on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations')
+    property = models.ForeignKey(LandlordProperty, on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations')
+    last_message = models.ForeignKey(ChatMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Conversation {self.key}"
+
+    @staticmethod
+    def key_for(sender_id, recipient_id, unit_id=None, property_id=None):
+        low, high = sorted((sender_id, recipient_id))
+        context = f'u{unit_id}' if unit_id else f'p{property_id}' if property_id else ''
+        return f'{low}:{high}:{context}'
+
+    @classmethod
+    def for_message(cls, message):
+        """The conversation an unsaved message belongs to, created if needed."""
+        property_id = message.unit.property_id if message.unit_id else message.property_id
+        key = cls.key_for(message.sender_id, message.recipient_id, message.unit_id, property_id)
+        conversation = cls.objects.filter(key=key).first()
+        if conversation is not None:
+            return conversation
+        low, high = sorted((message.sender_id, message.recipient_id))
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(
+                    key=key, user_a_id=low, user_b_id=high, unit_id=message.unit_id, property_id=property_id,
+                )
+                ConversationParticipant.objects.bulk_create([
+                    ConversationParticipant(conversation=conversation, user_id=user_id) for user_id in {low, high}
+                ])
+        except IntegrityError:
+            # Another request opened it first
+            conversation = cls.objects.get(key=key)
+        return conversation
+
+    @classmethod
+    def attach(cls, messages):
+        """
+        Assign conversations to messages saved without ChatMessage.save()
+        (bulk_create, imports) and bring those conversations up to date.
+        Returns the number of messages attached.
+        """
+        threads = {}
+        rows = messages.filter(conversation__isnull=True).values_list(
+            'pk', 'sender_id', 'recipient_id', 'unit_id', 'property_id', 'unit__property_id',
+        )
+        for pk, sender_id, recipient_id, unit_id, property_id, unit_property_id in rows:
+            if unit_id:
+                property_id = unit_property_id
+            key = cls.key_for(sender_id, recipient_id, unit_id, property_id)
+            thread = threads.setdefault(key, {'users': sorted({sender_id, recipient_id}), 'unit_id': unit_id, 'property_id': property_id, 'ids': []})
+            thread['ids'].append(pk)
+        if not threads:
+            return 0
+        with transaction.atomic():
+            cls.objects.bulk_create([
+                cls(key=key, user_a_id=thread['users'][0], user_b_id=thread['users'][-1],
+                    unit_id=thread['unit_id'], property_id=thread['property_id'])
+                for key, thread in threads.items()
+            ], ignore_conflicts=True)
+            ids = dict(cls.objects.filter(key__in=threads).values_list('key', 'pk'))
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation_id=ids[key], user_id=user_id)
+                for key, thread in threads.items() for user_id in thread['users']
+            ], ignore_conflicts=True)
+            for key, thread in threads.items():
+                ChatMessage.objects.filter(pk__in=thread['ids']).update(conversation_id=ids[key])
+            cls.refresh(ids.values())
+        return sum(len(thread['ids']) for thread in threads.values())
+
+    def record_message(self, message):
+        """Make a just-saved message the latest and count it unread for its recipient."""
+        Conversation.objects.filter(pk=self.pk, last_activity__lte=message.timestamp).update(
+            last_message=message, last_activity=message.timestamp,
+        )
+        unread = not message.is_read and message.recipient_id != message.sender_id
+        self.participants.update(
+            last_activity=Greatest(F('last_activity'), message.timestamp),
+            unread_count=Case(
+                When(user_id=message.recipient_id, then=F('unread_count') + int(unread)),
+                default=F('unread_count'),
+                output_field=models.PositiveIntegerField(),
+            ),
+        )
+
+    def mark_read(self, user, up_to_id=None, until=None):
+        """
+        Mark the user's unread messages in this conversation read - all of
+        them, or only those up to a message id and/or timestamp - with one
+        UPDATE. Returns how many changed.
+        """
+        messages = self.messages.filter(recipient=user, is_read=False)
+        if up_to_id is not None:
+            messages = messages.filter(pk__lte=up_to_id)
+        if until is not None:
+            messages = messages.filter(timestamp__lte=until)
+        with transaction.atomic():
+            count = messages.update(is_read=True)
+            # Subtract rather than zero: a message committed meanwhile stays unread
+            self.participants.filter(user=user).update(
+                unread_count=Greatest(F('unread_count') - count, 0, output_field=models.PositiveIntegerField()), last_read_at=timezone.now(),
+            )
+        return count
+
+    @classmethod
+    def delete_messages(cls, messages):
+        """
+        Delete a ChatMessage queryset with a single DELETE, skipping the ORM
+        collector (which loads every row first), then repair the affected
+        conversations. Returns the number of messages deleted.
+        """
+        with transaction.atomic():
+            conversation_ids = list(messages.exclude(conversation=None).order_by().values_list('conversation_id', flat=True).distinct())
+            # The collector would have SET_NULL'ed this reference; do it in bulk
+            cls.objects.filter(last_message__in=messages.values('pk')).update(last_message=None)
+            deleted = messages._raw_delete(messages.db)
+            if conversation_ids:
+                cls.refresh(conversation_ids)
+        return deleted
+
+    @classmethod
+    def refresh(cls, conversation_ids):
+        """
+        Recompute the latest message and unread counts of the given
+        conversations from their messages, in one UPDATE per table. Used
+        after messages are deleted or changed outside ChatMessage.save().
+        """
+        latest = ChatMessage.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+        cls.objects.filter(pk__in=conversation_ids).update(
+            last_message=Subquery(latest.values('pk')[:1]),
+            last_activity=Coalesce(Subquery(latest.values('timestamp')[:1]), F('created_at')),
+        )
+        unread = (
+            ChatMessage.objects.filter(conversation=OuterRef('conversation'), recipient=OuterRef('user'), is_read=False)
+            .order_by().values('conversation').annotate(count=Count('pk')).values('count')
+        )
+        ConversationParticipant.objects.filter(conversation__in=conversation_ids).update(
+            unread_count=Coalesce(Subquery(unread), 0, output_field=models.PositiveIntegerField()),
+            last_activity=Subquery(cls.objects.filter(pk=OuterRef('conversation')).values('last_activity')[:1]),
+        )
+
+class ConversationParticipant(models.Model):
+    """One user's side of a conversation: their inbox entry and unread count."""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    # Copy of conversation.last_activity, so an inbox is one range scan on
+    # the user's index
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_activity', '-id'], name='conversation_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} in {self.conversation.key}"
+
+class ArchivedChatMessage(models.Model):
+    """
+    Cold storage for old chat messages (see edoAPI.archive). Rows keep their
+    ChatMessage id and columns, so they serialize and paginate exactly like
+    the hot rows they were moved from.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    unit = models.ForeignKey(Unit, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    property = models.ForeignKey(LandlordProperty, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    message = models.TextField()
+    timestamp = models.DateTimeField()
+    is_read = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', '-timestamp', '-id'], name='chat_archive_sender_ts_idx'),
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='chat_archive_recipient_ts_idx'),
+            models.Index(fields=['conversation', '-timestamp', '-id'], name='chat_archive_conv_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived chat {self.id} at {self.timestamp}"
+
 class TenantInvitation(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -317,6 +773,16 @@ class TenantInvitation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='invite_created_id_idx'),
+            models.Index(fields=['landlord', '-created_at', '-id'], name='invite_landlord_created_idx'),
+            # Partial indexes only hold pending invitations, the only ones
+            # these lookups want: expiry sweeps, and duplicate checks per unit
+            models.Index(fields=['expires_at'], condition=models.Q(status='pending'), name='invite_pending_expires_idx'),
+            models.Index(fields=['unit', 'expires_at'], condition=models.Q(status='pending'), name='invite_pending_unit_idx'),
+        ]
+
     def __str__(self):
         return f"Invitation for {self.email} - {self.unit.property.name} Unit {self.unit.unit_id}"
     
@@ -334,6 +800,54 @@ class TenantInvitation(models.Model):
         return secrets.token_urlsafe(32)
 
 
+class LandlordContact(models.Model):
+    """
+    Someone a landlord may look up in the invitation form: their tenants,
+    past and present, and people they have invited. Maintained by
+    edoAPI.contacts; the *_key columns are lowercased so autocomplete is an
+    index range scan (key >= prefix AND key < successor(prefix)).
+    """
+    KIND_CHOICES = [
+        ('tenant', 'Tenant'),
+        ('invitee', 'Invitee'),
+    ]
+
+    landlord = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacts')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    tenant = models.ForeignKey(Tenant, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    email = models.EmailField()
+    first_name = models.CharField(max_length=100, blank=True)
+    last_name = models.CharField(max_length=100, blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    email_key = models.CharField(max_length=254)
+    name_key = models.CharField(max_length=201, blank=True)
+    last_name_key = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also the (landlord, email_key) prefix index
+            models.UniqueConstraint(fields=['landlord', 'email_key'], name='unique_landlord_contact_email'),
+        ]
+        indexes = [
+            models.Index(fields=['landlord', 'name_key'], name='contact_name_key_idx'),
+            models.Index(fields=['landlord', 'last_name_key'], name='contact_last_name_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.kind} of landlord {self.landlord_id})"
+
+    def set_keys(self):
+        self.email_key = self.email.strip().lower()
+        self.name_key = f'{self.first_name} {self.last_name}'.strip().lower()
+        self.last_name_key = self.last_name.strip().lower()
+        return self
+
+    def save(self, *args, **kwargs):
+        self.set_keys()
+        super().save(*args, **kwargs)
+
 class VacateRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -355,6 +869,51 @@ class VacateRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='vacate_created_id_idx'),
+            # Pending-request check and 24h rate limit in VacateRequestViewSet.perform_create
+            models.Index(fields=['tenant', 'property'], condition=models.Q(status='pending'), name='vacate_pending_idx'),
+            models.Index(fields=['tenant', 'property', 'created_at'], name='vacate_tenant_created_idx'),
+        ]
     
     def __str__(self):
         return f"Vacate Request by {self.tenant.first_name} {self.tenant.last_name} for Unit {self.unit.unit_id}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox. Rows are written in the same transaction as
+    the change that triggers the email and delivered later by the
+    process_outbox command (see edoAPI.outbox).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    kind = models.CharField(max_length=50, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a worker holds the row; rows whose lease lapsed are reclaimed
+    claim_token = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker claim order: due pending rows, oldest first
+            models.Index(fields=['status', 'next_attempt_at', 'id'], name='outbox_due_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,205 @@
+"""
+Transactional email outbox.
+
+Views call enqueue_email() inside the transaction that creates the record an
+email is about, so the email is queued if and only if that change commits and
+SMTP latency never lands on the HTTP request. The process_outbox management
+command drains the queue with drain_outbox(), sending each batch over one
+reused mail connection.
+
+Delivery is at-least-once: a worker that dies between sending and recording
+the result leaves its rows leased, and they are retried once the lease lapses.
+Attempts are counted when rows are claimed, so a message that keeps taking
+its worker down is dead-lettered after MAX_ATTEMPTS like any other failure.
+"""
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    # Attempts before a message is dead-lettered
+    'MAX_ATTEMPTS': 5,
+    # Retry n waits BACKOFF_SECONDS * 2**(n-1), capped at MAX_BACKOFF_SECONDS
+    'BACKOFF_SECONDS': 60,
+    'MAX_BACKOFF_SECONDS': 3600,
+    # How long a worker may hold a claimed batch before others reclaim it
+    'LEASE_SECONDS': 300,
+}
+
+
+def outbox_setting(name):
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(name, DEFAULTS[name])
+
+
+def build_email(subject, body, to, from_email=None, kind=''):
+    """An unsaved outbox row; queue many at once with enqueue_emails()."""
+    if isinstance(to, str):
+        to = [to]
+    return OutboundEmail(
+        kind=kind, subject=subject, body=body, to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def enqueue_email(subject, body, to, from_email=None, kind=''):
+    """
+    Queue an email for the outbox worker. Call inside the transaction that
+    makes the change the email reports.
+    """
+    email = build_email(subject, body, to, from_email=from_email, kind=kind)
+    email.save()
+    return email
+
+
+def enqueue_emails(emails):
+    """Queue unsaved outbox rows from build_email() with a single INSERT."""
+    return OutboundEmail.objects.bulk_create(emails, batch_size=500)
+
+
+def backoff_delay(attempts):
+    """Delay before retrying a message that has failed `attempts` times."""
+    seconds = outbox_setting('BACKOFF_SECONDS') * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, outbox_setting('MAX_BACKOFF_SECONDS')))
+
+
+def _due(now):
+    return Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', leased_until__lt=now)
+
+
+def claim_batch(batch_size, now=None):
+    """
+    Lease up to `batch_size` due messages to this worker, counting an attempt
+    for each. The claiming UPDATE re-checks that each row is still due, so
+    concurrent workers never send the same row twice. Rows whose lease lapsed
+    on their last allowed attempt are dead-lettered instead of reclaimed.
+
+    Returns (claimed rows, number of rows dead-lettered).
+    """
+    now = now or timezone.now()
+    due = list(
+        OutboundEmail.objects.filter(_due(now))
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', 'status', 'attempts')[:batch_size]
+    )
+    max_attempts = outbox_setting('MAX_ATTEMPTS')
+    exhausted = {pk for pk, status, attempts in due if status == 'sending' and attempts >= max_attempts}
+    dead = 0
+    if exhausted:
+        dead = OutboundEmail.objects.filter(_due(now), pk__in=exhausted).update(
+            status='dead', claim_token='', leased_until=None,
+            last_error='Lease expired: the worker stopped before recording a result',
+        )
+        logger.error('Outbox emails %s dead-lettered after %s attempts: lease expired', sorted(exhausted), max_attempts)
+    ids = [pk for pk, _, _ in due if pk not in exhausted]
+    if not ids:
+        return [], dead
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(_due(now), pk__in=ids).update(
+        status='sending', claim_token=token, attempts=F('attempts') + 1,
+        leased_until=now + timedelta(seconds=outbox_setting('LEASE_SECONDS')),
+    )
+    return list(OutboundEmail.objects.filter(claim_token=token).order_by('next_attempt_at', 'id')), dead
+
+
+@dataclass
+class DrainResult:
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead: int = 0
+    # Per sent message: time spent in the SMTP exchange, and time from
+    # enqueue to delivery
+    send_seconds: list = field(default_factory=list)
+    queue_seconds: list = field(default_factory=list)
+
+
+def drain_outbox(batch_size=None, connection=None, now=None):
+    """
+    Claim and send one batch. A caller-supplied connection is reused and left
+    open, so a worker can keep one SMTP session across batches; otherwise a
+    connection is opened for the batch and closed afterwards.
+    """
+    batch, dead = claim_batch(batch_size or outbox_setting('BATCH_SIZE'), now=now)
+    result = DrainResult(claimed=len(batch), dead=dead)
+    if not batch:
+        return result
+
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection(fail_silently=False)
+    sent, failed = [], []
+    try:
+        connection.open()
+    except Exception as exc:
+        # Server unreachable: the whole batch counts as one failed attempt
+        failed = [(message, exc) for message in batch]
+    else:
+        try:
+            for message in batch:
+                started = time.perf_counter()
+                try:
+                    EmailMessage(
+                        message.subject, message.body, message.from_email, message.to, connection=connection,
+                    ).send()
+                except Exception as exc:
+                    failed.append((message, exc))
+                else:
+                    result.send_seconds.append(time.perf_counter() - started)
+                    sent.append(message)
+        finally:
+            if owns_connection:
+                connection.close()
+
+    finished = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(pk__in=[message.pk for message in sent]).update(
+            status='sent', sent_at=finished, claim_token='', leased_until=None, last_error='',
+        )
+        result.sent = len(sent)
+        result.queue_seconds = [(finished - message.created_at).total_seconds() for message in sent]
+    if failed:
+        max_attempts = outbox_setting('MAX_ATTEMPTS')
+        for message, exc in failed:
+            # The attempt was counted when the batch was claimed
+            message.last_error = f'{type(exc).__name__}: {exc}'
+            message.claim_token = ''
+            message.leased_until = None
+            if message.attempts >= max_attempts:
+                message.status = 'dead'
+                result.dead += 1
+                logger.error('Outbox email %s dead-lettered after %s attempts: %s',
+                             message.pk, message.attempts, message.last_error)
+            else:
+                message.status = 'pending'
+                message.next_attempt_at = finished + backoff_delay(message.attempts)
+                result.retried += 1
+                logger.warning('Outbox email %s failed (attempt %s), retrying at %s: %s',
+                               message.pk, message.attempts, message.next_attempt_at, message.last_error)
+        OutboundEmail.objects.bulk_update(
+            [message for message, _ in failed],
+            ['status', 'next_attempt_at', 'last_error', 'claim_token', 'leased_until'],
+        )
+    return result
+
+
+def outbox_stats(now=None):
+    """Queue depth by status, plus the age of the oldest undelivered message."""
+    now = now or timezone.now()
+    depth = dict(OutboundEmail.objects.values_list('status').annotate(count=Count('id')).order_by())
+    oldest = OutboundEmail.objects.filter(status__in=['pending', 'sending']).aggregate(oldest=Min('created_at'))['oldest']
+    due = OutboundEmail.objects.filter(_due(now)).count()
+    return {
+        'depth': {status: depth.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES},
+        'due': due,
+        'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else None,
+    }
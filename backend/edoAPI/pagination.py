@@ -0,0 +1,156 @@
+import base64
+import json
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a composite, unique ordering such as
+    (created_at, id). Each page is a single indexed range scan
+    (`WHERE (created_at, id) < (:ts, :id) ORDER BY created_at DESC, id DESC
+    LIMIT n`), so cost stays flat however deep the client pages and rows
+    inserted between requests never shift or duplicate results.
+
+    Views choose their key with a `cursor_ordering` attribute; the last
+    field must be unique (normally 'id' / '-id').
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'cursor_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        model = queryset.model
+        self.fields = [model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+        results = self.fetch(queryset, ordering, cursor)
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def fetch(self, queryset, ordering, cursor):
+        """Up to page_size + 1 rows after the cursor, in `ordering`."""
+        queryset = queryset.order_by(*ordering)
+        names, deferred = queryset.query.deferred_loading
+        if names and not deferred:
+            # Narrowed by .only() (sparse fieldsets): the cursor still reads its keys
+            queryset = queryset.only(*names, *(field.name for field in self.fields))
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(ordering, cursor['position']))
+        return list(queryset[:self.page_size + 1])
+
+    def keyset_filter(self, ordering, position):
+        """
+        Rows strictly after `position` in `ordering`, expanded into the
+        portable form (a < x) OR (a = x AND b < y) ...
+        """
+        condition = Q()
+        equal = {}
+        for name, field, value in zip(ordering, self.fields, position):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        position = [field.value_to_string(obj) for field in self.fields]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            raw_position = payload['p']
+            if len(raw_position) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, raw_position)]
+            return {'position': position, 'reverse': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def paginate(request, queryset, serializer_class, ordering=None, **serializer_kwargs):
+    """Keyset-paginated response for function-based list views."""
+    paginator = KeysetPagination()
+    if ordering:
+        paginator.ordering = ordering
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        serializer = serializer_class(queryset, many=True, context={'request': request}, **serializer_kwargs)
+        return Response(serializer.data)
+    serializer = serializer_class(page, many=True, context={'request': request}, **serializer_kwargs)
+    return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,170 @@
+"""
+Publish/subscribe layer for real-time pushes (see edoAPI.consumers).
+
+Publishers are ordinary synchronous Django code (signal handlers, views);
+subscribers are WebSocket connections running on the ASGI event loop. The
+layer in use is settings.REALTIME['LAYER'], a dotted path to a class with the
+InMemoryPubSub interface, so the process-local default can be swapped for a
+broker-backed layer (e.g. Redis pub/sub) when running several ASGI workers.
+
+Each subscription buffers at most QUEUE_SIZE messages. When a subscriber
+falls that far behind, further messages are dropped for it and counted, and
+its connection tells the client to resync over REST, so one slow client can
+never grow server memory without bound.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    'LAYER': 'edoAPI.pubsub.InMemoryPubSub',
+    'QUEUE_SIZE': 100,
+}
+
+
+def realtime_setting(name):
+    return getattr(settings, 'REALTIME', {}).get(name, DEFAULTS[name])
+
+
+def user_group(user_id):
+    return f'user.{user_id}'
+
+
+def presence_group(user_id):
+    return f'presence.{user_id}'
+
+
+class Subscription:
+    """A subscriber's bounded inbox, bound to the event loop that reads it."""
+
+    def __init__(self, layer, groups, queue_size):
+        self.layer = layer
+        self.groups = set(groups)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def deliver(self, message):
+        # Publishers may run in another thread (sync views, signal handlers)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(message)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class InMemoryPubSub:
+    """
+    Process-local pub/sub and presence. Safe to publish from any thread;
+    subscriptions must be created on the event loop that will consume them.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or realtime_setting('QUEUE_SIZE')
+        self._lock = threading.Lock()
+        self._groups = defaultdict(set)
+        self._connections = defaultdict(int)
+        self._last_seen = {}
+
+    # Pub/sub
+
+    def subscribe(self, *groups):
+        subscription = Subscription(self, groups, self.queue_size)
+        with self._lock:
+            for group in groups:
+                self._groups[group].add(subscription)
+        return subscription
+
+    def add_groups(self, subscription, *groups):
+        with self._lock:
+            for group in groups:
+                subscription.groups.add(group)
+                self._groups[group].add(subscription)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for group in subscription.groups:
+                members = self._groups.get(group)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self._groups[group]
+
+    def publish(self, group, message):
+        """Deliver a message to every subscriber of a group; returns how many."""
+        with self._lock:
+            subscribers = list(self._groups.get(group, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    # Presence
+
+    def connect(self, user_id):
+        """Record a new connection for a user; returns True if they just came online."""
+        with self._lock:
+            self._connections[user_id] += 1
+            self._last_seen[user_id] = timezone.now()
+            came_online = self._connections[user_id] == 1
+        if came_online:
+            self.publish(presence_group(user_id), self.presence(user_id))
+        return came_online
+
+    def disconnect(self, user_id):
+        """Record a closed connection; returns True if the user went offline."""
+        with self._lock:
+            remaining = self._connections.get(user_id, 0) - 1
+            if remaining > 0:
+                self._connections[user_id] = remaining
+            else:
+                self._connections.pop(user_id, None)
+            self._last_seen[user_id] = timezone.now()
+            went_offline = remaining <= 0
+        if went_offline:
+            self.publish(presence_group(user_id), self.presence(user_id))
+        return went_offline
+
+    def is_online(self, user_id):
+        return self._connections.get(user_id, 0) > 0
+
+    def presence(self, user_id):
+        last_seen = self._last_seen.get(user_id)
+        return {
+            'type': 'presence',
+            'user': user_id,
+            'online': self.is_online(user_id),
+            'last_seen': last_seen.isoformat() if last_seen else None,
+        }
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_layer():
+    """The process-wide layer configured by settings.REALTIME['LAYER']."""
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                _layer = import_string(realtime_setting('LAYER'))()
+    return _layer
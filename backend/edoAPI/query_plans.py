@@ -0,0 +1,196 @@
+"""
+Join/prefetch plans for serializer-driven querysets.
+
+A plan is derived from a serializer's field source paths: dotted sources
+(e.g. 'unit.property.name') and nested serializers over forward relations
+become select_related joins, nested many=True serializers over reverse or
+many-to-many relations become Prefetch objects whose querysets carry the
+child serializer's own plan. Relations only walked inside
+SerializerMethodFields can't be discovered this way, so a serializer may
+list them on its Meta as `select_related` / `prefetch_related`.
+
+Fields backed by queryset annotations name the QuerySet methods adding
+them on Meta as `annotate`, and the relations those read as
+`annotation_paths` (so conditional GETs see changes to them). Annotations
+follow nested many=True serializers into their Prefetch querysets.
+
+A request using sparse fieldsets (edoAPI.fieldsets) gets a plan of its
+own, derived from the narrowed serializer and limited with .only() to the
+columns it reads.
+"""
+import copy
+from rest_framework import serializers
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from .fieldsets import SparseFieldsetSerializer, requested_fieldset
+
+
+class QueryPlan:
+    def __init__(self, select_related=(), prefetch_related=(), annotate=(), annotation_paths=(), only=()):
+        self.select_related = tuple(dict.fromkeys(select_related))
+        self.prefetch_related = tuple(prefetch_related)
+        self.annotate = tuple(annotate)
+        self.annotation_paths = tuple(dict.fromkeys(annotation_paths))
+        self.only = tuple(dict.fromkeys(only))
+
+    def apply(self, queryset):
+        for method in self.annotate:
+            queryset = getattr(queryset, method)()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*(_fresh(lookup) for lookup in self.prefetch_related))
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    def __bool__(self):
+        return bool(self.select_related or self.prefetch_related or self.annotate or self.only)
+
+
+def _fresh(lookup):
+    # Plans are cached per serializer class; hand each queryset its own copy
+    # of a Prefetch so prefetching never mutates the shared inner queryset
+    if isinstance(lookup, Prefetch) and lookup.queryset is not None:
+        lookup = copy.copy(lookup)
+        lookup.queryset = lookup.queryset.all()
+    return lookup
+
+
+_plan_cache = {}
+
+
+def get_serializer_query_plan(serializer_class, request=None):
+    """
+    Return the (cached) QueryPlan for a ModelSerializer class, or the plan
+    for the sparse fieldset the request asks for.
+    """
+    if request is not None and issubclass(serializer_class, SparseFieldsetSerializer) \
+            and requested_fieldset(request) is not None:
+        # Depends on the query string, so it isn't cached
+        return _derive_plan(serializer_class(context={'request': request}))
+    plan = _plan_cache.get(serializer_class)
+    if plan is None:
+        plan = _derive_plan(serializer_class())
+        _plan_cache[serializer_class] = plan
+    return plan
+
+
+def with_query_plan(queryset, serializer_class, request=None):
+    """Apply the serializer's plan to a queryset that will be serialized with it."""
+    return get_serializer_query_plan(serializer_class, request).apply(queryset)
+
+
+def _nested_plan(serializer):
+    # A nested serializer narrowed by its parent's fieldset plans for itself
+    if isinstance(serializer, SparseFieldsetSerializer) and serializer.fieldset is not None:
+        return _derive_plan(serializer)
+    return get_serializer_query_plan(type(serializer))
+
+
+def _prefetch_join_column(model, prefetch_path):
+    """The foreign key a reverse-FK prefetch matches its rows on (None for many-to-many)."""
+    for name in prefetch_path.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return field.field.name if field.one_to_many else None
+
+
+def _relation_path(model, source_attrs):
+    """
+    Walk source attributes across model relations. Returns
+    (select_related path, prefetch path, related model): forward to-one hops
+    build the select path; the first to-many hop ends the walk.
+    """
+    path = []
+    for attr in source_attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        # 'unit_id' resolves to the unit FK but reads the local column
+        if not field.is_relation or attr != field.name:
+            break
+        if field.many_to_many or field.one_to_many:
+            return '__'.join(path), '__'.join(path + [attr]), field.related_model
+        path.append(attr)
+        model = field.related_model
+    return '__'.join(path), None, model
+
+
+def _derive_plan(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return QueryPlan()
+
+    select_related = list(getattr(meta, 'select_related', ()))
+    prefetch_related = list(getattr(meta, 'prefetch_related', ()))
+    annotation_paths = list(getattr(meta, 'annotation_paths', ()))
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            select_path, prefetch_path, related_model = _relation_path(model, field.source_attrs)
+            if prefetch_path:
+                child_plan = _nested_plan(field.child)
+                queryset = child_plan.apply(related_model._default_manager.all())
+                join_column = _prefetch_join_column(model, prefetch_path)
+                if child_plan.only and join_column:
+                    queryset = queryset.only(*child_plan.only, join_column)
+                prefetch_related.append(Prefetch(prefetch_path, queryset=queryset))
+                annotation_paths.extend(f'{prefetch_path}__{path}' for path in child_plan.annotation_paths)
+            continue
+        if isinstance(field, serializers.ModelSerializer):
+            select_path, _, _ = _relation_path(model, field.source_attrs)
+            if select_path:
+                child_plan = _nested_plan(field)
+                select_related.append(select_path)
+                # Nested to-one serializers extend the join; their own
+                # to-many prefetches are re-rooted under this relation
+                select_related.extend(f'{select_path}__{path}' for path in child_plan.select_related)
+                prefetch_related.extend(
+                    f'{select_path}__{lookup}' for lookup in child_plan.prefetch_related
+                    if isinstance(lookup, str)
+                )
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Primary keys of to-one relations come from the local FK column
+            continue
+        if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) or len(field.source_attrs) > 1:
+            select_path, prefetch_path, _ = _relation_path(model, field.source_attrs)
+            if select_path:
+                select_related.append(select_path)
+            if prefetch_path:
+                prefetch_related.append(prefetch_path)
+
+    only = ()
+    if isinstance(serializer, SparseFieldsetSerializer) and serializer.get_fieldset() is not None:
+        columns = serializer.get_columns()
+        if columns:
+            # Joined relations need their foreign keys loaded
+            only = columns + [path.split('__')[0] for path in select_related]
+    return QueryPlan(select_related, prefetch_related, getattr(meta, 'annotate', ()), annotation_paths, only)
+
+
+class QueryPlanMixin:
+    """
+    Applies a join/prefetch plan to the querysets a generic view serializes.
+
+    By default the plan is derived from the action's serializer class; set
+    `query_plans` to map action names to an explicit QueryPlan (or None to
+    skip planning for that action).
+    """
+    query_plans = {}
+
+    def get_query_plan(self):
+        action = getattr(self, 'action', None)
+        if action in self.query_plans:
+            return self.query_plans[action]
+        return get_serializer_query_plan(self.get_serializer_class(), self.request)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = self.get_query_plan()
+        return plan.apply(queryset) if plan else queryset
@@ -0,0 +1,174 @@
+"""
+Read replicas for read-heavy GET endpoints.
+
+Nothing is routed to a replica implicitly. Views opt in with
+ReplicaReadMixin (class-based) or @read_from_replica (function views);
+for a GET/HEAD/OPTIONS request they pick a replica from
+DB_REPLICATION['REPLICAS'] and ReplicaRouter sends that request's reads
+there. Writes, migrations and every other request stay on 'default'.
+
+A replica is skipped when:
+- the requesting user wrote something in the last PIN_SECONDS
+  (ReplicaPinMiddleware records writes in the cache), so they read their
+  own writes from the primary;
+- its replication lag exceeds MAX_LAG_SECONDS, or it can't be reached.
+  Lag is sampled at most every LAG_CHECK_SECONDS per replica and process.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'PIN_SECONDS': 5,
+    'MAX_LAG_SECONDS': 10,
+    'LAG_CHECK_SECONDS': 5,
+}
+
+_read_alias = ContextVar('edo_read_alias', default=None)
+_lag_samples = {}
+_lag_lock = threading.Lock()
+
+
+def replication_setting(name):
+    return getattr(settings, 'DB_REPLICATION', {}).get(name, DEFAULTS[name])
+
+
+def pin_key(user_id):
+    return f'edo:replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Serve the user's reads from the primary for the next PIN_SECONDS."""
+    cache.set(pin_key(user_id), True, timeout=replication_setting('PIN_SECONDS'))
+
+
+def is_pinned(user_id):
+    return bool(cache.get(pin_key(user_id)))
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary (0 where it can't be measured)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        # Fully replayed replicas report 0 even when the primary is idle
+        cursor.execute(
+            'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+            'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+        )
+        return float(cursor.fetchone()[0] or 0)
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    with _lag_lock:
+        sample = _lag_samples.get(alias)
+    if sample is not None and now - sample[0] < replication_setting('LAG_CHECK_SECONDS'):
+        return sample[1]
+    try:
+        healthy = replica_lag(alias) <= replication_setting('MAX_LAG_SECONDS')
+    except DatabaseError:
+        healthy = False
+    with _lag_lock:
+        _lag_samples[alias] = (now, healthy)
+    return healthy
+
+
+def reset_lag_samples():
+    with _lag_lock:
+        _lag_samples.clear()
+
+
+def choose_read_alias(request):
+    """The database a safe request should read from."""
+    replicas = replication_setting('REPLICAS')
+    if not replicas or request.method not in SAFE_METHODS:
+        return DEFAULT_DB_ALIAS
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and is_pinned(user.pk):
+        return DEFAULT_DB_ALIAS
+    healthy = [alias for alias in replicas if is_healthy(alias)]
+    return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+
+def current_read_alias():
+    """The alias reads are routed to right now."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def reads_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the current request, if any."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replication_setting('REPLICAS'):
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve a view's safe requests from a replica (see module docstring)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, so pinning can look at the user
+        self._read_token = _read_alias.set(choose_read_alias(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_token', None)
+        if token is not None:
+            self._read_token = None
+            _read_alias.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def read_from_replica(view):
+    """@read_from_replica for function views, below @api_view."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reads_from(choose_read_alias(request)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Pins users to the primary after a successful write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replication_setting('REPLICAS'):
+            # DRF copies the authenticated (e.g. JWT) user onto the request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
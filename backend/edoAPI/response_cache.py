@@ -0,0 +1,226 @@
+"""
+Per-landlord response cache for dashboard list endpoints.
+
+A landlord's dashboard lists (properties, tenants, maintenance requests,
+vacate requests) and dashboard summary only change when one of their rows
+does, so responses are cached under a key that includes a per-landlord
+generation counter. Saving or deleting a LandlordProperty, Unit, Tenant,
+LandlordMaintenance, MaintenanceMessage, VacateRequest, Payment or Notice
+bumps the owning landlord's generation (edoAPI.signals; bulk writes call
+bump_generation directly), which retires every cached response of that landlord at once -
+nothing has to be found and deleted. Entries otherwise expire after TTL
+seconds, which also bounds fields derived from the clock or from User rows
+(days_since_created, requester names).
+
+When several requests miss the same entry, the first takes a short lock
+(cache.add) and computes it; the others poll for the result for up to
+WAIT_SECONDS before computing it themselves. This relies on an atomic
+add(): locmem, memcached, redis and database caches have one, the
+file-based cache doesn't and can let two requests compute.
+
+Hits, misses and waits are counted per endpoint in the cache and reported
+by `manage.py response_cache_stats`. The cache is off unless
+RESPONSE_CACHE['ENABLED']; with several processes it needs a shared
+backend (CACHES), or one process would keep serving a generation another
+has retired.
+"""
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import status
+from rest_framework.response import Response
+from .replicas import current_read_alias, replication_setting
+
+DEFAULTS = {
+    'ENABLED': False,
+    'CACHE': 'default',
+    'TTL': 300,
+    # Stampede protection: how long a computation holds the lock, how long
+    # other requests wait for it, and how often they look
+    'LOCK_SECONDS': 10,
+    'WAIT_SECONDS': 2,
+    'POLL_SECONDS': 0.05,
+}
+
+EVENTS = ('hits', 'misses', 'waits')
+
+# Endpoint names registered by cached_per_landlord / LandlordCachedListMixin
+ENDPOINTS = set()
+
+
+def response_cache_setting(name):
+    return getattr(settings, 'RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return caches[response_cache_setting('CACHE')]
+
+
+def generation_key(landlord_id):
+    return f'edo:resp:gen:{landlord_id}'
+
+
+def stats_key(endpoint, event):
+    return f'edo:resp:stats:{endpoint}:{event}'
+
+
+def _incr(cache, key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted. add() loses to a concurrent add, so retry incr
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def _seed():
+    # A restarted counter starts above any value it can have held before, so
+    # entries cached under an evicted generation never come back
+    return time.time_ns()
+
+
+def generation(landlord_id):
+    cache = get_cache()
+    key = generation_key(landlord_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _seed(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(landlord_id):
+    """Retire the landlord's cached responses, now and again once the transaction commits."""
+    if landlord_id is None or not response_cache_setting('ENABLED'):
+        return
+
+    def bump():
+        _incr(get_cache(), generation_key(landlord_id), _seed())
+
+    bump()
+    # A request reading between the first bump and the commit still sees the
+    # old rows, and would cache them under the new generation
+    transaction.on_commit(bump)
+
+
+def record(endpoint, event):
+    _incr(get_cache(), stats_key(endpoint, event), 1)
+
+
+def cache_stats():
+    """{endpoint: {'hits', 'misses', 'waits', 'hit_ratio'}} for the registered endpoints."""
+    cache = get_cache()
+    keys = {stats_key(endpoint, event): (endpoint, event) for endpoint in ENDPOINTS for event in EVENTS}
+    values = cache.get_many(list(keys))
+    stats = {endpoint: dict.fromkeys(EVENTS, 0) for endpoint in sorted(ENDPOINTS)}
+    for key, value in values.items():
+        endpoint, event = keys[key]
+        stats[endpoint][event] = value
+    for counts in stats.values():
+        served = counts['hits'] + counts['misses'] + counts['waits']
+        # Waits are answered from the cache too
+        counts['hit_ratio'] = (counts['hits'] + counts['waits']) / served if served else None
+    return stats
+
+
+def reset_stats():
+    get_cache().delete_many([stats_key(endpoint, event) for endpoint in ENDPOINTS for event in EVENTS])
+
+
+def response_key(endpoint, landlord_id, request):
+    # The absolute URI covers the page cursor, filters and the host used in image URLs
+    digest = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f'edo:resp:{endpoint}:{landlord_id}:{generation(landlord_id)}:{digest}'
+
+
+def _timeout():
+    timeout = response_cache_setting('TTL')
+    if current_read_alias() != DEFAULT_DB_ALIAS:
+        # Computed from a replica, which may be behind the generation bump
+        timeout = min(timeout, replication_setting('MAX_LAG_SECONDS'))
+    return timeout
+
+
+def _respond(entry, state):
+    response = Response(entry)
+    response['X-Cache'] = state
+    return response
+
+
+def cached_response(endpoint, landlord_id, request, compute):
+    """The response of compute() (a view handler) for this request, through the cache."""
+    cache = get_cache()
+    key = response_key(endpoint, landlord_id, request)
+    entry = cache.get(key)
+    if entry is not None:
+        record(endpoint, 'hits')
+        return _respond(entry, 'HIT')
+
+    lock = f'{key}:lock'
+    locked = cache.add(lock, 1, timeout=response_cache_setting('LOCK_SECONDS'))
+    if not locked:
+        deadline = time.monotonic() + response_cache_setting('WAIT_SECONDS')
+        while time.monotonic() < deadline:
+            time.sleep(response_cache_setting('POLL_SECONDS'))
+            entry = cache.get(key)
+            if entry is not None:
+                record(endpoint, 'waits')
+                return _respond(entry, 'HIT')
+        # The computation is slow or died holding the lock: don't wait longer
+    record(endpoint, 'misses')
+    try:
+        response = compute()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=_timeout())
+            response['X-Cache'] = 'MISS'
+        return response
+    finally:
+        if locked:
+            cache.delete(lock)
+
+
+def cached_per_landlord(endpoint):
+    """
+    @cached_per_landlord('name') for function views listing the requesting
+    landlord's rows, below @api_view (and any @read_from_replica).
+    """
+    ENDPOINTS.add(endpoint)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not response_cache_setting('ENABLED') or request.method != 'GET':
+                return view(request, *args, **kwargs)
+            return cached_response(endpoint, request.user.pk, request, lambda: view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class LandlordCachedListMixin:
+    """
+    Serves list() through the response cache, scoped to the requesting
+    landlord. Set cache_endpoint; override cache_landlord_id to return None
+    for requests that aren't a landlord's view of their own rows.
+    """
+    cache_endpoint = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_endpoint:
+            ENDPOINTS.add(cls.cache_endpoint)
+
+    def cache_landlord_id(self, request):
+        return request.user.pk
+
+    def list(self, request, *args, **kwargs):
+        landlord_id = self.cache_landlord_id(request) if response_cache_setting('ENABLED') else None
+        if landlord_id is None:
+            return super().list(request, *args, **kwargs)
+        return cached_response(
+            self.cache_endpoint, landlord_id, request,
+            lambda: super(LandlordCachedListMixin, self).list(request, *args, **kwargs),
+        )
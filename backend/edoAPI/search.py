@@ -0,0 +1,218 @@
+"""
+Full-text search over chat and maintenance messages.
+
+On SQLite each model gets an external-content FTS5 table (porter-stemmed
+unicode61 tokens) kept in sync by AFTER INSERT/UPDATE/DELETE triggers, so
+rows written by bulk_create, queryset.update() and raw deletes are indexed
+too, not only those saved through the ORM. On PostgreSQL the same role is
+played by a GIN index on to_tsvector(SEARCH_CONFIG, message), which the
+database maintains itself. Other backends fall back to icontains scans.
+
+Results are ranked (bm25 on SQLite, ts_rank on PostgreSQL; higher is better
+in both) and carry an HTML-escaped snippet with matches wrapped in <mark>.
+
+Archived chat messages (edoAPI.archive) are indexed in their own table and
+searched with the hot ones. Archiving deletes a row from the hot table and
+inserts it into the archive, so the triggers move it between the indexes.
+"""
+import html
+import re
+from django.db import connection as default_connection
+from django.db.models import F, FloatField, Q, Value
+from .models import ArchivedChatMessage, ChatMessage, MaintenanceMessage
+
+SEARCH_CONFIG = 'english'
+MAX_TERMS = 10
+SNIPPET_TOKENS = 16
+
+# Match markers inside snippets; control characters can't collide with
+# message text once it has been escaped, and are swapped for <mark> after
+START_MARK, END_MARK = '\x02', '\x03'
+
+# Message kinds and the tables each is searched in
+INDEXED_MODELS = {
+    'chat': (ChatMessage, ArchivedChatMessage),
+    'maintenance': (MaintenanceMessage,),
+}
+
+
+def indexed_models():
+    return [model for models in INDEXED_MODELS.values() for model in models]
+
+
+def fts_table(model):
+    return f'{model._meta.db_table.lower()}_fts'
+
+
+def gin_index(model):
+    return f'{model._meta.db_table.lower()}_search_idx'
+
+
+def _sqlite_ddl(model):
+    table, fts = model._meta.db_table, fts_table(model)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            message, content='{table}', content_rowid='id', tokenize='porter unicode61'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO {fts}(rowid, message) VALUES (new.id, new.message);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO {fts}({fts}, rowid, message) VALUES ('delete', old.id, old.message);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF message ON "{table}" BEGIN
+            INSERT INTO {fts}({fts}, rowid, message) VALUES ('delete', old.id, old.message);
+            INSERT INTO {fts}(rowid, message) VALUES (new.id, new.message);
+        END""",
+    ]
+
+
+def _postgresql_ddl(model):
+    # Must match the expression SearchVector('message', config=...) compiles
+    # to, or the planner won't use the index
+    return [
+        f"""CREATE INDEX IF NOT EXISTS {gin_index(model)} ON "{model._meta.db_table}"
+            USING gin (to_tsvector('{SEARCH_CONFIG}'::regconfig, COALESCE("message", '')))""",
+    ]
+
+
+def install(connection=default_connection, models=None):
+    """Create the search tables/indexes and triggers (idempotent)."""
+    with connection.cursor() as cursor:
+        for model in models or indexed_models():
+            if connection.vendor == 'sqlite':
+                statements = _sqlite_ddl(model)
+            elif connection.vendor == 'postgresql':
+                statements = _postgresql_ddl(model)
+            else:
+                statements = []
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def uninstall(connection=default_connection, models=None):
+    with connection.cursor() as cursor:
+        for model in models or indexed_models():
+            if connection.vendor == 'sqlite':
+                fts = fts_table(model)
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {gin_index(model)}')
+
+
+def rebuild(connection=default_connection, optimize=True, models=None):
+    """Rebuild every search index (or those of `models`) from its base table."""
+    install(connection, models)
+    with connection.cursor() as cursor:
+        for model in models or indexed_models():
+            if connection.vendor == 'sqlite':
+                fts = fts_table(model)
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                if optimize:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'REINDEX INDEX {gin_index(model)}')
+
+
+def search_terms(query):
+    """Split free text into at most MAX_TERMS word tokens; operators are ignored."""
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def _fts5_match(terms):
+    # Every term must match; the last one as a prefix, for search-as-you-type
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _tsquery(terms):
+    return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+
+def scoped_querysets(user):
+    """
+    Messages the user may search, by kind: their conversations (hot and
+    archived) and maintenance threads.
+    """
+    participant = Q(sender=user) | Q(recipient=user)
+    return {
+        'chat': [ChatMessage.objects.filter(participant), ArchivedChatMessage.objects.filter(participant)],
+        'maintenance': [MaintenanceMessage.objects.filter(
+            Q(maintenance__property__landlord=user)
+            | Q(maintenance__tenant__user=user)
+            | Q(maintenance__requested_by=user)
+        )],
+    }
+
+
+def ranked(queryset, terms, vendor=None):
+    """
+    Narrow a ChatMessage/ArchivedChatMessage/MaintenanceMessage queryset to rows matching every
+    term, annotated with `rank` and a marked-up `snippet`, best first.
+    """
+    vendor = vendor or default_connection.vendor
+    if vendor == 'sqlite':
+        fts = fts_table(queryset.model)
+        return queryset.extra(
+            tables=[fts],
+            where=[f'{fts}.rowid = "{queryset.model._meta.db_table}"."id"', f'{fts} MATCH %s'],
+            params=[_fts5_match(terms)],
+            select={
+                # bm25() is lower-is-better; flip it so every backend ranks descending
+                'rank': f'-bm25({fts})',
+                'snippet': f"snippet({fts}, 0, %s, %s, '…', {SNIPPET_TOKENS})",
+            },
+            select_params=[START_MARK, END_MARK],
+        ).order_by('-rank', '-id')
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+        query = SearchQuery(_tsquery(terms), config=SEARCH_CONFIG, search_type='raw')
+        return queryset.annotate(
+            document=SearchVector('message', config=SEARCH_CONFIG),
+        ).filter(document=query).annotate(
+            rank=SearchRank(F('document'), query),
+            snippet=SearchHeadline(
+                'message', query, config=SEARCH_CONFIG, start_sel=START_MARK, stop_sel=END_MARK,
+                max_words=SNIPPET_TOKENS, min_words=SNIPPET_TOKENS // 2,
+            ),
+        ).order_by('-rank', '-id')
+    for term in terms:
+        queryset = queryset.filter(message__icontains=term)
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField()), snippet=F('message')).order_by('-timestamp', '-id')
+
+
+def render_snippet(snippet, terms=()):
+    """HTML-escape a snippet and turn its match markers into <mark> tags."""
+    if START_MARK not in snippet and terms:
+        # icontains fallback: mark the terms ourselves
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        snippet = pattern.sub(lambda match: f'{START_MARK}{match.group(0)}{END_MARK}', snippet)
+    return html.escape(snippet).replace(START_MARK, '<mark>').replace(END_MARK, '</mark>')
+
+
+def find_messages(user, query, kinds=tuple(INDEXED_MODELS), limit=20):
+    """
+    Search the user's chat and/or maintenance messages. Returns up to `limit`
+    results, best first, with one query per table searched.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    querysets = scoped_querysets(user)
+    results = []
+    for kind in ('chat', 'maintenance'):
+        if kind not in kinds:
+            continue
+        for queryset in querysets[kind]:
+            for message in ranked(queryset, terms)[:limit]:
+                results.append({
+                    'type': kind, 'id': message.id,
+                    'thread': message.conversation_id if kind == 'chat' else message.maintenance_id,
+                    'sender': message.sender_id, 'timestamp': message.timestamp, 'rank': message.rank,
+                    'snippet': render_snippet(message.snippet, terms),
+                })
+    results.sort(key=lambda result: (result['rank'], result['timestamp']), reverse=True)
+    return results[:limit]
@@ -1,11 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Role, LandlordProperty, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage, TenantInvitation, VacateRequest
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import User, Role, LandlordProperty, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage, ConversationParticipant, TenantInvitation, VacateRequest
 import re
+import string
 from django.utils import timezone
+from .tokens import add_role_claims, ROLE_VERSION_CLAIM
+from .fieldsets import SparseFieldsetSerializer
 
 class UserSerializer(serializers.ModelSerializer):
-    roles = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    roles = serializers.ListField(source='role_names', child=serializers.CharField(), read_only=True)
     profile_image = serializers.ImageField(required=False, allow_null=True, write_only=True)
     profile_image_url = serializers.SerializerMethodField(read_only=True)
 
@@ -35,16 +40,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = [
             'email', 'first_name', 'last_name', 'phone', 'password', 'user_type', 'company_name'
         ]
+        # Replaced by validate_email's case-insensitive check
+        extra_kwargs = {'email': {'validators': []}}
+
+    def validate_email(self, value):
+        if User.objects.by_email(value).exists():
+            raise serializers.ValidationError('user with this email address already exists.')
+        return value
 
     def create(self, validated_data):
         try:
             password = validated_data.pop('password')
             user = User(**validated_data)
             user.set_password(password)
-            user.save()  # Save first so user has an id
-            # Only assign the 'regular' role at registration
-            role, _ = Role.objects.get_or_create(name='regular')
-            user.roles.set([role])  # Ensure only 'regular' is assigned
+            # Only the 'regular' role is assigned at registration (the default)
+            user.role_flags = Role.BITS[Role.RoleName.REGULAR]
+            user.save()
             return user
         except Exception as e:
             print(f"User creation error: {e}")
@@ -70,7 +81,30 @@ class UserLoginSerializer(serializers.Serializer):
 
         return attrs
 
-class UnitSerializer(serializers.ModelSerializer):
+class RoleClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair serializer that embeds the user's roles and role version in
+    the tokens so permission classes can authorize without a roles query.
+    """
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
+
+class RoleClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that re-stamps role claims when the user's roles have
+    changed since the refresh token was issued.
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None and refresh.payload.get(ROLE_VERSION_CLAIM) != user.role_version:
+            add_role_claims(refresh, user)
+            attrs['refresh'] = str(refresh)
+        return super().validate(attrs)
+
+class UnitSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Unit
         fields = ['id', 'property', 'unit_id', 'floor', 'bedrooms', 'bathrooms', 'size', 'rent_amount', 'security_deposit', 'status', 'created_at', 'updated_at']
@@ -79,7 +113,7 @@ class UnitSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Make unit_id read-only for updates
-        if self.instance is not None:  # This is an update
+        if self.instance is not None and 'unit_id' in self.fields:  # This is an update
             self.fields['unit_id'].read_only = True
     
     def create(self, validated_data):
@@ -91,19 +125,114 @@ class UnitSerializer(serializers.ModelSerializer):
         validated_data.pop('unit_id', None)
         return super().update(instance, validated_data)
 
-class LandlordPropertySerializer(serializers.ModelSerializer):
-    units = UnitSerializer(many=True, read_only=True)
-    total_units = serializers.SerializerMethodField()
+class UnitBulkItemSerializer(UnitSerializer):
+    """
+    One unit in a bulk create/update. Validated entirely in memory: the view
+    checks property ownership once and (property, unit_id) uniqueness with a
+    single set-based query instead of a validator query per row.
+    """
+    class Meta(UnitSerializer.Meta):
+        fields = [name for name in UnitSerializer.Meta.fields if name != 'property']
+        validators = []
+
+class UnitRangeSerializer(serializers.Serializer):
+    """
+    Generates unit IDs from a floor/number pattern, e.g. floors 1-10 and
+    numbers 1-30 with '{floor}{number:02d}' give 101 ... 1030.
+    Other keys in a range entry are unit fields applied to every unit in it.
+    """
+    RANGE_FIELDS = ('pattern', 'floor_start', 'floor_end', 'number_start', 'number_end')
+    MAX_UNITS = 2000
+
+    pattern = serializers.CharField(max_length=50, default='{floor}{number:02d}')
+    floor_start = serializers.IntegerField(min_value=0, required=False)
+    floor_end = serializers.IntegerField(min_value=0, required=False)
+    number_start = serializers.IntegerField(min_value=0)
+    number_end = serializers.IntegerField(min_value=0)
+
+    def validate_pattern(self, value):
+        names = {name for _, name, _, _ in string.Formatter().parse(value) if name is not None}
+        if 'number' not in names or names - {'floor', 'number'}:
+            raise serializers.ValidationError('Pattern must contain {number} and may contain {floor}, e.g. "{floor}{number:02d}".')
+        try:
+            value.format(floor=1, number=1)
+        except (ValueError, KeyError, IndexError):
+            raise serializers.ValidationError('Invalid pattern.')
+        return value
+
+    def validate(self, attrs):
+        has_floors = 'floor_start' in attrs or 'floor_end' in attrs
+        if has_floors and not ('floor_start' in attrs and 'floor_end' in attrs):
+            raise serializers.ValidationError('Give both floor_start and floor_end.')
+        if '{floor' in attrs['pattern'] and not has_floors:
+            raise serializers.ValidationError('Pattern uses {floor}; give floor_start and floor_end.')
+        if attrs['number_end'] < attrs['number_start'] or (has_floors and attrs['floor_end'] < attrs['floor_start']):
+            raise serializers.ValidationError('Range ends must not be before their starts.')
+        floors = attrs['floor_end'] - attrs['floor_start'] + 1 if has_floors else 1
+        if floors * (attrs['number_end'] - attrs['number_start'] + 1) > self.MAX_UNITS:
+            raise serializers.ValidationError(f'A range may generate at most {self.MAX_UNITS} units.')
+        return attrs
+
+    def generate(self):
+        """Yield (unit_id, floor) for every unit in the validated range."""
+        data = self.validated_data
+        floors = range(data['floor_start'], data['floor_end'] + 1) if 'floor_start' in data else [None]
+        for floor in floors:
+            for number in range(data['number_start'], data['number_end'] + 1):
+                yield data['pattern'].format(floor=floor, number=number), '' if floor is None else str(floor)
+
+OCCUPANCY_FIELDS = ['unit_count', 'occupied_units', 'potential_rent', 'occupied_rent', 'collected_rent']
+
+class LandlordPropertySummarySerializer(SparseFieldsetSerializer):
+    """
+    A property with its occupancy and this month's rent, without its units.
+    The figures are annotations of LandlordProperty.objects.with_occupancy().
+    """
+    total_units = serializers.IntegerField(source='unit_count', read_only=True)
+    occupied_units = serializers.IntegerField(read_only=True)
+    vacant_units = serializers.SerializerMethodField()
+    occupancy_rate = serializers.SerializerMethodField()
+    vacancy_rate = serializers.SerializerMethodField()
+    potential_rent = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    collected_rent = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = LandlordProperty
         fields = '__all__'
         read_only_fields = ['landlord']
+        # Queryset annotations the fields read (see query_plans)
+        annotate = ['with_occupancy']
+        annotation_paths = ['units', 'units__payments']
+        # Read from the annotations, not from columns (see fieldsets)
+        field_sources = dict.fromkeys([
+            'total_units', 'occupied_units', 'vacant_units', 'occupancy_rate',
+            'vacancy_rate', 'potential_rent', 'collected_rent',
+        ], [])
+
+    def to_representation(self, instance):
+        if not hasattr(instance, 'unit_count'):
+            # Just created, or loaded without the annotations
+            annotated = LandlordProperty.objects.with_occupancy().values(*OCCUPANCY_FIELDS).get(pk=instance.pk)
+            for name, value in annotated.items():
+                setattr(instance, name, value)
+        return super().to_representation(instance)
+
+    def get_vacant_units(self, obj):
+        return obj.unit_count - obj.occupied_units
+
+    def get_occupancy_rate(self, obj):
+        return round(obj.occupied_units / obj.unit_count, 4) if obj.unit_count else None
+
+    def get_vacancy_rate(self, obj):
+        return round(1 - obj.occupied_units / obj.unit_count, 4) if obj.unit_count else None
+
+class LandlordPropertySerializer(LandlordPropertySummarySerializer):
+    units = UnitSerializer(many=True, read_only=True)
 
-    def get_total_units(self, obj):
-        return obj.units.count()
+    class Meta(LandlordPropertySummarySerializer.Meta):
+        expandable_fields = ['units']
 
-class TenantSerializer(serializers.ModelSerializer):
+class TenantSerializer(SparseFieldsetSerializer):
     unit = UnitSerializer(read_only=True)
     unit_id = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all(), source='unit', write_only=True)
     
@@ -128,6 +257,18 @@ class TenantSerializer(serializers.ModelSerializer):
             'name', 'property', 'unit_number', 'rent', 'status', 'agreementType', 'leaseStart', 'emergencyContact'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Relations walked by the method fields (see query_plans)
+        select_related = ['unit__property']
+        expandable_fields = ['unit']
+        # What the method fields read (see fieldsets)
+        field_sources = {
+            'name': ['first_name', 'last_name'],
+            'property': ['unit'],
+            'unit_number': ['unit'],
+            'rent': ['unit'],
+            'status': ['start_date', 'end_date'],
+            'emergencyContact': ['emergency_contact_name', 'emergency_contact_phone'],
+        }
 
     def get_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
@@ -170,15 +311,27 @@ class NoticeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notice
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at', 'date_sent']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'date_sent', 'sender']
 
-class MaintenanceMessageSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        unit = attrs.get('unit', getattr(self.instance, 'unit', None))
+        tenant = attrs.get('tenant', getattr(self.instance, 'tenant', None))
+        property_obj = attrs.get('property', getattr(self.instance, 'property', None))
+        if tenant and unit and tenant.unit_id != unit.id:
+            raise serializers.ValidationError({'tenant': 'Tenant does not occupy the given unit.'})
+        target_unit = unit or (tenant.unit if tenant else None)
+        if target_unit and property_obj and target_unit.property_id != property_obj.id:
+            raise serializers.ValidationError({'unit': 'Unit does not belong to the given property.'})
+        return attrs
+
+class MaintenanceMessageSerializer(SparseFieldsetSerializer):
     sender_email = serializers.EmailField(source='sender.email', read_only=True)
     class Meta:
         model = MaintenanceMessage
         fields = '__all__'
 
-class LandlordMaintenanceSerializer(serializers.ModelSerializer):
+class LandlordMaintenanceSerializer(SparseFieldsetSerializer):
     messages = MaintenanceMessageSerializer(many=True, read_only=True)
     property_name = serializers.CharField(source='property.name', read_only=True)
     unit_number = serializers.CharField(source='unit.unit_id', read_only=True)
@@ -201,6 +354,19 @@ class LandlordMaintenanceSerializer(serializers.ModelSerializer):
             'messages', 'days_since_created'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'property_name', 'unit_number', 'tenant_name', 'requested_by_name', 'assigned_to_name', 'status_display', 'priority_display', 'days_since_created', 'image_url']
+        # Relations walked by the method fields (see query_plans)
+        select_related = ['tenant', 'requested_by', 'assigned_to']
+        expandable_fields = ['messages']
+        # What the method and display fields read (see fieldsets)
+        field_sources = {
+            'tenant_name': ['tenant'],
+            'requested_by_name': ['requested_by'],
+            'assigned_to_name': ['assigned_to', 'assignee_name'],
+            'status_display': ['status'],
+            'priority_display': ['priority'],
+            'days_since_created': ['created_at'],
+            'image_url': ['image'],
+        }
 
     def get_tenant_name(self, obj):
         if obj.tenant:
@@ -262,7 +428,70 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatMessage
         fields = '__all__'
-        read_only_fields = ['sender']
+        read_only_fields = ['sender', 'conversation']
+
+class ChatMessageRangeSerializer(serializers.Serializer):
+    """
+    Selects chat messages for bulk actions: explicit ids, or a conversation
+    narrowed by an id range and/or a time window (all bounds inclusive).
+    """
+    MAX_IDS = 5000
+
+    conversation = serializers.IntegerField(required=False)
+    message_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_IDS)
+    from_id = serializers.IntegerField(required=False)
+    to_id = serializers.IntegerField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('message_ids') and 'conversation' not in attrs:
+            raise serializers.ValidationError('Provide message_ids or a conversation.')
+        return attrs
+
+    def apply(self, queryset):
+        data = self.validated_data
+        lookups = {
+            'pk__in': data.get('message_ids'),
+            'conversation_id': data.get('conversation'),
+            'pk__gte': data.get('from_id'),
+            'pk__lte': data.get('to_id'),
+            'timestamp__gte': data.get('since'),
+            'timestamp__lte': data.get('until'),
+        }
+        return queryset.filter(**{lookup: value for lookup, value in lookups.items() if value is not None})
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """An inbox entry: a conversation as seen by one of its participants."""
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    participant = serializers.SerializerMethodField()
+    unit = serializers.IntegerField(source='conversation.unit_id', read_only=True)
+    unit_number = serializers.CharField(source='conversation.unit.unit_id', read_only=True, default=None)
+    property = serializers.IntegerField(source='conversation.property_id', read_only=True)
+    property_name = serializers.CharField(source='conversation.property.name', read_only=True, default=None)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ConversationParticipant
+        fields = [
+            'id', 'participant', 'unit', 'unit_number', 'property', 'property_name',
+            'last_message', 'last_activity', 'unread_count', 'last_read_at',
+        ]
+        select_related = ['conversation__user_a', 'conversation__user_b', 'conversation__last_message']
+
+    def get_participant(self, obj):
+        conversation = obj.conversation
+        other = conversation.user_b if conversation.user_a_id == obj.user_id else conversation.user_a
+        return {'id': other.id, 'email': other.email, 'first_name': other.first_name, 'last_name': other.last_name}
+
+    def get_last_message(self, obj):
+        message = obj.conversation.last_message
+        if message is None:
+            return None
+        return {
+            'id': message.id, 'sender': message.sender_id, 'message': message.message,
+            'timestamp': serializers.DateTimeField().to_representation(message.timestamp), 'is_read': message.is_read,
+        }
 
 class TenantInvitationSerializer(serializers.ModelSerializer):
     landlord_name = serializers.CharField(source='landlord.get_full_name', read_only=True)
@@ -278,6 +507,8 @@ class TenantInvitationSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'invitation_url'
         ]
         read_only_fields = ['id', 'landlord', 'invitation_code', 'status', 'created_at', 'updated_at']
+        # Filled in by TenantInvitation.save() when not supplied
+        extra_kwargs = {'expires_at': {'required': False}}
     
     def get_invitation_url(self, obj):
         # This would be the frontend URL where tenants can accept invitations
@@ -300,12 +531,15 @@ class LandlordListSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'first_name', 'last_name', 'full_name', 'property_count']
     
     def get_property_count(self, obj):
+        # LandlordListView annotates the count; fall back to a query otherwise
+        if hasattr(obj, 'property_count'):
+            return obj.property_count
         return obj.landlord_properties.count()
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
-class LandlordDetailSerializer(serializers.ModelSerializer):
+class LandlordDetailSerializer(SparseFieldsetSerializer):
     """
     Serializer for landlord detail view that includes properties
     """
@@ -315,11 +549,18 @@ class LandlordDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'full_name', 'properties']
+        expandable_fields = ['properties']
+        field_sources = {'full_name': ['first_name', 'last_name']}
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
 
+class LandlordDetailSummarySerializer(LandlordDetailSerializer):
+    """A landlord with each property's occupancy figures but no units."""
+    properties = LandlordPropertySummarySerializer(source='landlord_properties', many=True, read_only=True)
+
+
 class VacateRequestSerializer(serializers.ModelSerializer):
     tenant_name = serializers.SerializerMethodField()
     property_name = serializers.CharField(source='property.name', read_only=True)
@@ -334,6 +575,8 @@ class VacateRequestSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'tenant_name', 'property_name', 'unit_number'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'status', 'tenant_name', 'property_name', 'unit_number', 'status_display', 'tenant', 'unit', 'property']
+        # Relations walked by the method fields (see query_plans)
+        select_related = ['tenant']
     
     def get_tenant_name(self, obj):
         return f"{obj.tenant.first_name} {obj.tenant.last_name}"
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import contacts
+from .models import (
+    ChatMessage, LandlordMaintenance, LandlordProperty, MaintenanceMessage, Notice, Payment, Tenant, TenantInvitation,
+    Unit, VacateRequest,
+)
+from .pubsub import get_layer, user_group
+from .response_cache import bump_generation, response_cache_setting
+from .serializers import ChatMessageSerializer
+from .sqlite import configure_connection
+
+connection_created.connect(configure_connection, dispatch_uid='configure_sqlite_connection')
+
+
+@receiver(post_save, sender=ChatMessage, dispatch_uid='push_chat_message')
+def push_chat_message(sender, instance, created, **kwargs):
+    """Push new chat messages to both participants' open sockets once committed."""
+    if not created:
+        return
+    payload = {'type': 'chat.message', 'message': ChatMessageSerializer(instance).data}
+
+    def publish():
+        layer = get_layer()
+        layer.publish(user_group(instance.recipient_id), payload)
+        if instance.sender_id != instance.recipient_id:
+            layer.publish(user_group(instance.sender_id), payload)
+
+    transaction.on_commit(publish)
+
+
+def _landlord_id(instance):
+    # Anything with a unit: tenancies and payments
+    if type(instance).unit.is_cached(instance) and Unit.property.is_cached(instance.unit):
+        return instance.unit.property.landlord_id
+    return Unit.objects.filter(pk=instance.unit_id).values_list('property__landlord_id', flat=True).first()
+
+
+@receiver(post_save, sender=Tenant, dispatch_uid='upsert_tenant_contact')
+def upsert_tenant_contact(sender, instance, **kwargs):
+    """Keep the landlord's contact entry for this tenant current."""
+    landlord_id = _landlord_id(instance)
+    if landlord_id is not None:
+        contacts.upsert_contacts(landlord_id, [contacts.tenant_contact(instance)])
+
+
+@receiver(post_save, sender=TenantInvitation, dispatch_uid='add_invitee_contact')
+def add_invitee_contact(sender, instance, created, **kwargs):
+    """New invitees become contacts of the inviting landlord (tenants take precedence)."""
+    if created:
+        contacts.upsert_contacts(instance.landlord_id, [contacts.invitee_contact(instance)], replace=False)
+
+
+def _property_landlord_id(instance):
+    if type(instance).property.is_cached(instance):
+        return instance.property.landlord_id
+    return LandlordProperty.objects.filter(pk=instance.property_id).values_list('landlord_id', flat=True).first()
+
+
+def _maintenance_landlord_id(message):
+    return LandlordMaintenance.objects.filter(pk=message.maintenance_id).values_list('property__landlord_id', flat=True).first()
+
+
+# Rows shown on landlord dashboards, and how to find their landlord. On a
+# cascading delete children go first, so their parents are still there.
+DASHBOARD_MODELS = {
+    LandlordProperty: lambda instance: instance.landlord_id,
+    Unit: _property_landlord_id,
+    Tenant: _landlord_id,
+    LandlordMaintenance: _property_landlord_id,
+    MaintenanceMessage: _maintenance_landlord_id,
+    VacateRequest: _property_landlord_id,
+    # Rent collected and recent activity on the dashboard
+    Payment: _landlord_id,
+    Notice: lambda instance: instance.sender_id,
+}
+
+
+def retire_cached_responses(sender, instance, **kwargs):
+    """Saving or deleting a dashboard row retires its landlord's cached responses."""
+    if response_cache_setting('ENABLED'):
+        bump_generation(DASHBOARD_MODELS[sender](instance))
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(retire_cached_responses, sender=model, dispatch_uid=f'retire_cached_responses_save_{model.__name__}')
+    post_delete.connect(retire_cached_responses, sender=model, dispatch_uid=f'retire_cached_responses_delete_{model.__name__}')
@@ -0,0 +1,116 @@
+"""
+Opt-in production profile for SQLite (SQLITE_PROFILE['ENABLED']).
+
+SQLite allows one writer at a time. In the default rollback-journal mode
+readers block the writer too, and a transaction that starts reading and
+later writes can fail with "database is locked" at once, without waiting
+out the busy timeout. The profile:
+
+- switches the journal to WAL, so readers never block the writer or each
+  other, with synchronous=NORMAL (durable at checkpoints, safe in WAL);
+- sizes the page cache and memory-maps the file for read-heavy pages;
+- waits up to BUSY_TIMEOUT ms for the write lock instead of failing;
+- opens transactions with BEGIN IMMEDIATE (the settings set
+  OPTIONS['transaction_mode']), taking the write lock up front so two
+  transactions can't both read and then deadlock upgrading to write.
+
+The PRAGMAs are applied to every new connection by configure_connection,
+hooked to connection_created in edoAPI.signals. Write views are wrapped in
+retry_on_locked, which runs the view in one transaction and re-runs it
+with backoff if the lock still couldn't be had.
+"""
+import random
+import time
+from functools import wraps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SYNCHRONOUS': 'NORMAL',
+    # Bytes of the database file to memory-map
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    # Negative values are KiB, so this is a 64 MiB page cache per connection
+    'CACHE_SIZE': -64 * 1024,
+    'BUSY_TIMEOUT': 5000,
+    # retry_on_locked: extra attempts, and the first backoff in seconds
+    'RETRIES': 3,
+    'BACKOFF': 0.05,
+}
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def sqlite_setting(name):
+    return getattr(settings, 'SQLITE_PROFILE', {}).get(name, DEFAULTS[name])
+
+
+def pragmas():
+    return [
+        'PRAGMA journal_mode=WAL',
+        f'PRAGMA synchronous={sqlite_setting("SYNCHRONOUS")}',
+        f'PRAGMA mmap_size={int(sqlite_setting("MMAP_SIZE"))}',
+        f'PRAGMA cache_size={int(sqlite_setting("CACHE_SIZE"))}',
+        f'PRAGMA busy_timeout={int(sqlite_setting("BUSY_TIMEOUT"))}',
+    ]
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created receiver applying the profile to SQLite connections."""
+    if connection.vendor != 'sqlite' or not sqlite_setting('ENABLED'):
+        return
+    with connection.cursor() as cursor:
+        for statement in pragmas():
+            cursor.execute(statement)
+
+
+def is_locked(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc).lower() for message in LOCKED_MESSAGES)
+
+
+def retry_on_locked(view=None, using=DEFAULT_DB_ALIAS):
+    """
+    Run a write view (function view or view method) in one transaction and
+    retry it with jittered exponential backoff while SQLite reports the
+    database locked. A failed attempt rolls back completely, so a retry
+    never repeats half-committed work. Does nothing unless the profile is
+    enabled, or when already inside a transaction (the outer call retries).
+
+    The view must let the locked OperationalError propagate (handlers
+    catching Exception re-raise it when is_locked), and must not depend on
+    request input that can only be read once, such as streamed row bodies.
+    """
+    if view is None:
+        return lambda view: retry_on_locked(view, using=using)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        connection = connections[using]
+        if connection.vendor != 'sqlite' or not sqlite_setting('ENABLED') or connection.in_atomic_block:
+            return view(*args, **kwargs)
+        retries, backoff = sqlite_setting('RETRIES'), sqlite_setting('BACKOFF')
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return view(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_locked(exc):
+                    raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
+
+
+class RetryOnLockedMixin:
+    """Applies retry_on_locked to a view's standard write handlers."""
+
+    @retry_on_locked
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @retry_on_locked
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @retry_on_locked
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,124 @@
+"""
+Seed data shared by the API test suites: a landlord with a realistic
+portfolio of properties, occupied units, tenants, maintenance threads,
+chat history, invitations, vacate requests and notices.
+"""
+import datetime
+from types import SimpleNamespace
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from edoAPI.contacts import tenant_contact, upsert_contacts
+from edoAPI.models import (
+    User, Role, LandlordProperty, Unit, Tenant, Notice, LandlordMaintenance,
+    MaintenanceMessage, ChatMessage, Conversation, TenantInvitation, VacateRequest,
+)
+
+PASSWORD = 'portfolio-pass-123'
+
+
+def seed_portfolio(prefix, properties=2, units_per_property=3, messages_per_thread=2):
+    """
+    Create one landlord's portfolio with every unit but one occupied. Returns a
+    namespace with the landlord, a tenant user and one instance of each
+    model so tests can address detail routes.
+    """
+    password = make_password(PASSWORD)
+    today = timezone.now().date()
+    landlord_flags = Role.BITS[Role.RoleName.REGULAR] | Role.BITS[Role.RoleName.LANDLORD]
+    tenant_flags = Role.BITS[Role.RoleName.REGULAR] | Role.BITS[Role.RoleName.TENANT]
+
+    landlord = User.objects.create(
+        email=f'{prefix}-landlord@example.com', password=password,
+        first_name='Lana', last_name=prefix.title(), role_flags=landlord_flags,
+    )
+    regular = User.objects.create(
+        email=f'{prefix}-regular@example.com', password=password,
+        first_name='Reggie', last_name=prefix.title(),
+    )
+
+    props = LandlordProperty.objects.bulk_create([
+        LandlordProperty(
+            landlord=landlord, name=f'{prefix} Court {p}', type='Apartment',
+            street=f'{p} Main St', city='Nairobi', state='Nairobi', zip_code='00100',
+        )
+        for p in range(properties)
+    ])
+    units = Unit.objects.bulk_create([
+        Unit(
+            property=prop, unit_id=f'{p}-{u:03d}', floor=str(u // 10),
+            rent_amount=1000 + u, security_deposit=1000, status='occupied',
+        )
+        for p, prop in enumerate(props)
+        for u in range(units_per_property)
+    ])
+    vacant_unit = Unit.objects.create(property=props[0], unit_id='vacant', rent_amount=900)
+    tenant_users = User.objects.bulk_create([
+        User(
+            email=f'{prefix}-tenant-{unit.unit_id}@example.com', password=password,
+            first_name='Tia', last_name=unit.unit_id, role_flags=tenant_flags,
+        )
+        for unit in units
+    ])
+    tenants = Tenant.objects.bulk_create([
+        Tenant(
+            user=user, unit=unit, first_name=user.first_name, last_name=user.last_name,
+            email=user.email, phone='0700000000', start_date=today - datetime.timedelta(days=90),
+        )
+        for user, unit in zip(tenant_users, units)
+    ])
+    # bulk_create skips the post_save that files tenants as landlord contacts
+    upsert_contacts(landlord.pk, [tenant_contact(tenant) for tenant in tenants])
+    maintenance = LandlordMaintenance.objects.bulk_create([
+        LandlordMaintenance(
+            property=unit.property, unit=unit, tenant=tenant, requested_by=tenant.user,
+            assigned_to=landlord, subject='Leaking tap', description='Kitchen tap drips',
+            priority=('low', 'medium', 'high')[i % 3],
+        )
+        for i, (unit, tenant) in enumerate(zip(units, tenants))
+    ])
+    MaintenanceMessage.objects.bulk_create([
+        MaintenanceMessage(maintenance=request, sender=sender, message=f'Update {m}')
+        for request in maintenance
+        for m, sender in enumerate([request.requested_by, landlord] * messages_per_thread)
+    ])
+    chat = ChatMessage.objects.bulk_create([
+        ChatMessage(
+            sender=sender, recipient=recipient, unit=tenant.unit, property=tenant.unit.property,
+            message=f'Message {m} about unit {tenant.unit.unit_id}',
+        )
+        for tenant in tenants
+        for m, (sender, recipient) in enumerate([(tenant.user, landlord), (landlord, tenant.user)] * messages_per_thread)
+    ])
+    Conversation.attach(ChatMessage.objects.filter(pk__in=[message.pk for message in chat]))
+    chat[0].refresh_from_db()
+    invitations = [
+        TenantInvitation.objects.create(landlord=landlord, unit=unit, email=f'{prefix}-invitee-{unit.unit_id}@example.com')
+        for unit in units
+    ]
+    vacate_requests = VacateRequest.objects.bulk_create([
+        VacateRequest(
+            tenant=tenant, unit=tenant.unit, property=tenant.unit.property,
+            move_out_date=today + datetime.timedelta(days=45), reason='Relocating',
+        )
+        for tenant in tenants
+    ])
+    notices = Notice.objects.bulk_create([
+        Notice(
+            sender=landlord, property=tenant.unit.property, unit=tenant.unit, tenant=tenant, notice_type='general',
+            title='Water shutdown', message='Water will be off on Saturday', effective_date=today,
+        )
+        for tenant in tenants
+    ])
+    notices.append(Notice.objects.create(
+        sender=landlord, property=props[0], notice_type='general', title='Painting',
+        message='Stairwells are being painted this week', effective_date=today,
+    ))
+    for notice in notices:
+        notice.deliver()
+
+    return SimpleNamespace(
+        landlord=landlord, regular=regular, tenant_user=tenant_users[0], tenant=tenants[0],
+        property=props[0], unit=units[0], vacant_unit=vacant_unit, maintenance=maintenance[0], chat_message=chat[0], conversation=chat[0].conversation,
+        invitation=invitations[0], vacate_request=vacate_requests[0], notice=notices[0],
+        unit_count=len(units),
+    )
@@ -0,0 +1,81 @@
+"""
+A minimal in-process SMTP server for exercising the real SMTP email backend.
+It accepts every message except those addressed to recipients containing
+`reject_marker`, and records sessions and delivered messages.
+"""
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        self.reply('220 localhost stand-in')
+        recipients = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if server.reject_marker in command:
+                    self.reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(command.split(':', 1)[1].strip(' <>'))
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line)
+                with server.lock:
+                    server.messages.append({'to': recipients, 'data': b''.join(lines)})
+                self.reply('250 OK queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, reject_marker='reject'):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.reject_marker = reject_marker
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.messages = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
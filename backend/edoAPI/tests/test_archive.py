@@ -0,0 +1,145 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.archive import archive_chat_messages, restore_chat_messages
+from edoAPI.models import ArchivedChatMessage, ChatMessage, Conversation, ConversationParticipant
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class ChatArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('cold', units_per_property=1)
+        cls.landlord, cls.tenant = cls.portfolio.landlord, cls.portfolio.tenant_user
+        now = timezone.now()
+        old = ChatMessage.objects.bulk_create([
+            ChatMessage(sender=cls.landlord, recipient=cls.tenant, unit=cls.portfolio.unit, message=f'Old {n}', is_read=True)
+            for n in range(40)
+        ])
+        # A year ago, one hour apart, oldest first
+        for n, message in enumerate(old):
+            ChatMessage.objects.filter(pk=message.pk).update(timestamp=now - timedelta(days=365, hours=40 - n))
+        cls.old_unread = ChatMessage.objects.create(sender=cls.landlord, recipient=cls.tenant, message='Old but unread')
+        ChatMessage.objects.filter(pk=cls.old_unread.pk).update(timestamp=now - timedelta(days=300))
+        Conversation.attach(ChatMessage.objects.filter(conversation=None))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.tenant)['access']}")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        return client
+
+    def walk(self, **params):
+        url, pages, seen = reverse('v1_chat-message-list'), 0, []
+        response = self.client.get(url, params)
+        while True:
+            pages += 1
+            seen.extend(message['id'] for message in response.data['results'])
+            if not response.data['next']:
+                return seen, pages
+            response = self.client.get(response.data['next'])
+
+    def test_batched_move_keeps_unread_and_latest_hot(self):
+        before, _ = self.walk(page_size=7)
+        unread = ConversationParticipant.objects.get(user=self.tenant, conversation=self.old_unread.conversation).unread_count
+
+        result = archive_chat_messages(batch_size=15)
+        self.assertEqual((result.moved, result.batches), (40, 3))
+        self.assertEqual(ArchivedChatMessage.objects.count(), 40)
+        self.assertTrue(ChatMessage.objects.filter(pk=self.old_unread.pk).exists())
+        self.assertFalse(ArchivedChatMessage.objects.filter(pk__in=Conversation.objects.values('last_message')).exists())
+        self.assertEqual(
+            ConversationParticipant.objects.get(user=self.tenant, conversation=self.old_unread.conversation).unread_count,
+            unread,
+        )
+        # Paging reads straight through into the archive, in the same order
+        after, _ = self.walk(page_size=7)
+        self.assertEqual(after, before)
+        archived = ArchivedChatMessage.objects.first()
+        self.assertEqual((archived.message[:4], archived.is_read), ('Old ', True))
+
+        # Backwards from deep in the archive returns the same rows too
+        response = self.client.get(reverse('v1_chat-message-list'), {'page_size': 7})
+        for _ in range(4):
+            response = self.client.get(response.data['next'])
+        back = self.client.get(response.data['previous'])
+        self.assertEqual([m['id'] for m in back.data['results']], after[21:28])
+
+    def test_recent_pages_skip_the_archive(self):
+        archive_chat_messages()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('v1_chat-message-list'), {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertFalse(any('archivedchatmessage' in q['sql'] for q in queries.captured_queries))
+
+    def test_restore_and_command(self):
+        archive_chat_messages()
+        with self.settings(CHAT_ARCHIVE={'AFTER_DAYS': 400}):
+            self.assertEqual(restore_chat_messages(timezone.now() - timedelta(days=400)), 40)
+        self.assertEqual(ArchivedChatMessage.objects.count(), 0)
+
+        out = StringIO()
+        call_command('archive_chat_messages', '--dry-run', stdout=out)
+        self.assertIn('40 messages would be archived', out.getvalue())
+        call_command('archive_chat_messages', '--batch-size', '25', stdout=out)
+        self.assertIn('Archived 40 messages in 2 batches', out.getvalue())
+
+    def test_archived_messages_read_through_by_id(self):
+        archive_chat_messages()
+        archived = ArchivedChatMessage.objects.order_by('id')
+        first, second, third = archived[0], archived[1], archived[2]
+        url = reverse('v1_chat-message-detail', kwargs={'pk': first.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        self.assertEqual((response.data['id'], response.data['message']), (first.pk, first.message))
+        # Edits are refused rather than 404ing
+        response = self.client.patch(url, {'is_read': False}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(ArchivedChatMessage.objects.get(pk=first.pk).is_read)
+
+        # Only the sender may delete, as for hot messages
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        sender = self.client_for(self.landlord)
+        self.assertEqual(sender.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        response = sender.post(reverse('v1_chat-message-delete-multiple'), {
+            'message_ids': [second.pk, third.pk, self.old_unread.pk],
+        }, format='json')
+        self.assertEqual(response.data['deleted'], 3)
+        self.assertFalse(ArchivedChatMessage.objects.filter(pk__in=[first.pk, second.pk, third.pk]).exists())
+        self.assertEqual(ArchivedChatMessage.objects.count(), 37)
+
+    @skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'No full-text index on this backend')
+    def test_archived_messages_are_searchable(self):
+        ChatMessage.objects.filter(message='Old 3').update(message='Old 3 about the broken boiler')
+
+        def search(client=self.client):
+            # Ranks depend on the rest of each index, so compare the hits
+            results = client.get(reverse('v1_search-messages'), {'q': 'boiler'}).data['results']
+            return [(result['id'], result['snippet']) for result in results]
+
+        before = search()
+        self.assertEqual(len(before), 1)
+        archive_chat_messages()
+        self.assertTrue(ArchivedChatMessage.objects.filter(pk=before[0][0]).exists())
+        self.assertEqual(search(), before)
+
+        # Restoring moves the row back into the hot index, not into both
+        with self.settings(CHAT_ARCHIVE={'AFTER_DAYS': 400}):
+            restore_chat_messages(timezone.now() - timedelta(days=400))
+        self.assertEqual(search(), before)
+        # Outsiders still see nothing
+        self.assertEqual(search(self.client_for(seed_portfolio('nosy', units_per_property=1).landlord)), [])
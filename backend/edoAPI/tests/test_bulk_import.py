@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import time
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.models import LandlordProperty, OutboundEmail, Role, Tenant, TenantInvitation, Unit, User
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+BUILDING_UNITS = 1000
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkTenantImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('bulk', units_per_property=2)
+        cls.building = LandlordProperty.objects.create(
+            landlord=cls.portfolio.landlord, name='Tower', type='Apartment',
+            street='1 High St', city='Nairobi', state='Nairobi', zip_code='00100',
+        )
+        Unit.objects.bulk_create([
+            Unit(property=cls.building, unit_id=f'T{n:04d}', rent_amount=1200) for n in range(BUILDING_UNITS)
+        ])
+        cls.existing = User.objects.create(email='existing@example.com', first_name='Ex', last_name='Isting')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.url = reverse('v1_bulk-import-tenants')
+
+    def tenant_rows(self, count):
+        return [{
+            'unit_id': f'T{n:04d}', 'property_id': self.building.pk, 'email': f'import-{n}@example.com',
+            'first_name': 'Imp', 'last_name': str(n), 'phone': '0700000000', 'start_date': '2026-01-01',
+        } for n in range(count)]
+
+    def csv_body(self, rows):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return out.getvalue().encode('utf-8')
+
+    def test_streamed_csv_import_batches_queries(self):
+        counts = []
+        for offset, size in ((0, 10), (10, 990)):
+            rows = self.tenant_rows(offset + size)[offset:]
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = self.client.post(
+                    f'{self.url}?mode=import', self.csv_body(rows), content_type='text/csv',
+                )
+                elapsed = time.perf_counter() - started
+            self.assertEqual(response.status_code, 201, response.content[:500])
+            self.assertEqual((response.data['created'], response.data['failed']), (size, 0))
+            counts.append(queries.captured_queries)
+        # Lookups don't grow with the upload; inserts grow only by batch
+        selects = [sum(q['sql'].startswith('SELECT') for q in captured) for captured in counts]
+        self.assertEqual(selects[0], selects[1])
+        # Users, tenants and landlord contacts, each batched at SQLite's
+        # 999-parameter limit (~70 rows per INSERT)
+        self.assertLess(len(counts[1]), 990 // 15)
+        self.assertLess(elapsed, 5)
+        self.assertEqual(Tenant.objects.filter(unit__property=self.building).count(), BUILDING_UNITS)
+        self.assertFalse(Unit.objects.filter(property=self.building, status='vacant').exists())
+        imported = User.objects.get(email='import-5@example.com')
+        self.assertTrue(imported.has_role('tenant'))
+        self.assertFalse(imported.has_usable_password())
+
+    def test_per_row_results(self):
+        rows = self.tenant_rows(3) + [
+            # Existing account is reused and gains the tenant role
+            {**self.tenant_rows(4)[3], 'email': self.existing.email},
+            # Duplicate unit within the upload
+            {**self.tenant_rows(1)[0], 'email': 'dup@example.com'},
+            # Already occupied
+            {**self.tenant_rows(1)[0], 'unit_id': self.portfolio.unit.unit_id, 'property_id': self.portfolio.property.pk},
+            # Not the landlord's unit / bad email / bad date
+            {**self.tenant_rows(1)[0], 'unit_id': 'nope'},
+            {**self.tenant_rows(6)[5], 'email': 'not-an-email'},
+            {**self.tenant_rows(7)[6], 'start_date': '01/02/2026'},
+        ]
+        response = self.client.post(f'{self.url}?mode=import', rows, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['created'] * 4 + ['error'] * 5)
+        self.assertIn('Duplicate of row 1', results[4]['errors']['unit_id'][0])
+        self.assertIn('occupied', results[5]['errors']['unit_id'][0])
+        self.assertIn('not found', results[6]['errors']['unit_id'][0])
+        self.assertIn('email', results[7]['errors'])
+        self.assertIn('start_date', results[8]['errors'])
+        self.existing.refresh_from_db()
+        self.assertTrue(self.existing.has_role(Role.RoleName.TENANT))
+        self.assertEqual(Tenant.objects.get(pk=results[3]['id']).user_id, self.existing.pk)
+
+    def test_other_exclusive_roles_cannot_become_tenants(self):
+        host = User.objects.create(email='host@example.com', role_flags=Role.BITS[Role.RoleName.HOST])
+        rows = [
+            {**self.tenant_rows(1)[0], 'email': 'HOST@example.com'},
+            {**self.tenant_rows(2)[1], 'email': self.portfolio.landlord.email},
+            self.tenant_rows(3)[2],
+        ]
+        response = self.client.post(f'{self.url}?mode=import', rows, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['error', 'error', 'created'])
+        self.assertIn('host role', results[0]['errors']['email'][0])
+        self.assertIn('landlord role', results[1]['errors']['email'][0])
+        for user in (host, self.portfolio.landlord):
+            user.refresh_from_db()
+            self.assertFalse(user.has_role(Role.RoleName.TENANT))
+            self.assertEqual(user.role_version, 0)
+
+    def test_non_ascii_emails_match_like_the_database(self):
+        # SQLite's LOWER() folds ASCII only, so str.lower() can't stand in for it
+        existing = User.objects.create(email='emile@Éxample.com', first_name='Em', last_name='Ile')
+        rows = [
+            {**self.tenant_rows(1)[0], 'email': 'EMILE@ÉXAMPLE.COM'},
+            {**self.tenant_rows(2)[1], 'email': 'zoe@Zoë.example.com'},
+            {**self.tenant_rows(3)[2], 'email': 'ZOE@Zoë.EXAMPLE.COM'},
+        ]
+        response = self.client.post(f'{self.url}?mode=import', rows, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual([r['status'] for r in response.data['results']], ['created'] * 3)
+        tenants = [Tenant.objects.get(pk=r['id']) for r in response.data['results']]
+        self.assertEqual(tenants[0].user_id, existing.pk)
+        self.assertEqual(tenants[1].user_id, tenants[2].user_id)
+
+    def test_invite_mode_queues_emails_from_uploaded_file(self):
+        rows = [{'unitNumber': f'T{n:04d}', 'email': f'invite-{n}@example.com'} for n in range(50)]
+        upload = SimpleUploadedFile('rows.ndjson', '\n'.join(json.dumps(row) for row in rows).encode(), 'application/x-ndjson')
+        response = self.client.post(f'{self.url}?property_id={self.building.pk}', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(response.data['created'], 50)
+        self.assertEqual(TenantInvitation.objects.filter(unit__property=self.building).count(), 50)
+        self.assertEqual(OutboundEmail.objects.filter(kind='tenant_invitation').count(), 50)
+        self.assertEqual(len({i.invitation_code for i in TenantInvitation.objects.filter(unit__property=self.building)}), 50)
+
+        # The same invitations again are rejected as already pending
+        again = self.client.post(f'{self.url}?property_id={self.building.pk}', rows[:1], format='json')
+        self.assertEqual(again.status_code, 400)
+        self.assertIn('already pending', again.data['results'][0]['errors']['email'][0])
+
+    def test_dry_run_and_atomic_write_nothing(self):
+        rows = self.tenant_rows(2) + [{'unit_id': 'nope', 'email': 'x@example.com'}]
+        dry = self.client.post(f'{self.url}?dry_run=true', rows, format='json')
+        self.assertEqual(dry.status_code, 200)
+        self.assertEqual([r['status'] for r in dry.data['results']], ['valid', 'valid', 'error'])
+        atomic = self.client.post(f'{self.url}?atomic=1', rows, format='json')
+        self.assertEqual(atomic.status_code, 400)
+        self.assertEqual([r['status'] for r in atomic.data['results']], ['skipped', 'skipped', 'error'])
+        self.assertFalse(TenantInvitation.objects.filter(unit__property=self.building).exists())
+
+    def test_requires_landlord(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.tenant_user)['access']}")
+        self.assertEqual(client.post(self.url, self.tenant_rows(1), format='json').status_code, 403)
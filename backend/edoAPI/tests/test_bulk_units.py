@@ -0,0 +1,109 @@
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.models import Unit
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class BulkUnitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('units', units_per_property=2)
+        cls.other = seed_portfolio('rival', units_per_property=2)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.create_url = reverse('v1_unit-bulk-create')
+        self.update_url = reverse('v1_unit-bulk-update')
+
+    def test_range_creates_block_with_set_based_checks(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.create_url, {
+                'property': self.portfolio.property.pk,
+                'defaults': {'bedrooms': 2, 'rent_amount': '1500.00'},
+                'units': [{'unit_id': 'PH1', 'rent_amount': '5000.00'}],
+                'ranges': [{'floor_start': 1, 'floor_end': 10, 'number_start': 1, 'number_end': 30}],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(len(response.data), 301)
+        # Auth, property ownership and one uniqueness check; the rest are
+        # batched INSERTs
+        self.assertEqual(sum(q['sql'].startswith('SELECT') for q in queries.captured_queries), 3)
+        self.assertLessEqual(len(queries), 10)
+        self.assertEqual(response.data[0]['unit_id'], 'PH1')
+        self.assertEqual([row['unit_id'] for row in response.data[1:3]], ['101', '102'])
+        self.assertEqual(response.data[-1]['unit_id'], '1030')
+        unit = Unit.objects.get(property=self.portfolio.property, unit_id='1030')
+        self.assertEqual((unit.floor, unit.bedrooms, unit.rent_amount), ('10', 2, Decimal('1500.00')))
+
+    def test_duplicates_and_invalid_rows_create_nothing(self):
+        response = self.client.post(self.create_url, {
+            'property': self.portfolio.property.pk,
+            'units': [
+                {'unit_id': self.portfolio.unit.unit_id, 'rent_amount': '100'},
+                {'unit_id': 'A', 'rent_amount': '100'},
+                {'unit_id': 'A', 'rent_amount': '100'},
+                {'unit_id': 'B'},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {error['row']: error['errors'] for error in response.data['errors']}
+        self.assertIn('already exists', errors[1]['unit_id'][0])
+        self.assertIn('Duplicate of row 2', errors[3]['unit_id'][0])
+        self.assertIn('rent_amount', errors[4])
+        self.assertFalse(Unit.objects.filter(unit_id__in=['A', 'B']).exists())
+
+    def test_bad_range_pattern_is_rejected(self):
+        response = self.client.post(self.create_url, {
+            'property': self.portfolio.property.pk,
+            'ranges': [{'pattern': '{wing}-{number}', 'number_start': 1, 'number_end': 3, 'rent_amount': '1'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pattern', response.data['ranges'][0])
+
+    def test_cannot_create_in_another_landlords_property(self):
+        response = self.client.post(self.create_url, {
+            'property': self.other.property.pk, 'units': [{'unit_id': 'X', 'rent_amount': '1'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Unit.objects.filter(property=self.other.property, unit_id='X').exists())
+
+    def test_filtered_update_changes_matching_units_only(self):
+        Unit.objects.filter(pk=self.portfolio.unit.pk).update(floor='3')
+        response = self.client.patch(self.update_url, {
+            'filter': {'property': self.portfolio.property.pk, 'floor': '3'},
+            'changes': {'rent_amount': '1300.00'},
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(Unit.objects.get(pk=self.portfolio.unit.pk).rent_amount, Decimal('1300.00'))
+        self.assertFalse(Unit.objects.filter(property=self.portfolio.property, rent_amount=Decimal('1300.00')).exclude(pk=self.portfolio.unit.pk).exists())
+
+        # Another landlord's units are simply outside the caller's scope
+        response = self.client.patch(self.update_url, {
+            'filter': {'property': self.other.property.pk}, 'changes': {'rent_amount': '1.00'},
+        }, format='json')
+        self.assertEqual(response.data['updated'], 0)
+
+    def test_per_unit_update(self):
+        units = list(Unit.objects.filter(property=self.portfolio.property).order_by('pk')[:2])
+        response = self.client.post(self.update_url, {'units': [
+            {'id': units[0].pk, 'rent_amount': '2000.00'},
+            {'id': units[1].pk, 'bedrooms': 4},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        units[0].refresh_from_db()
+        units[1].refresh_from_db()
+        self.assertEqual((units[0].rent_amount, units[1].bedrooms), (Decimal('2000.00'), 4))
+
+        response = self.client.post(self.update_url, {'units': [
+            {'id': units[0].pk, 'unit_id': 'renamed'},
+            {'id': self.other.unit.pk, 'rent_amount': '1.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
@@ -0,0 +1,125 @@
+import datetime
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.conditional import queryset_validator, relation_paths
+from edoAPI.models import ChatMessage, MaintenanceMessage, Tenant, Unit, User
+from edoAPI.query_plans import get_serializer_query_plan
+from edoAPI.serializers import LandlordDetailSerializer, TenantSerializer
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('etag', units_per_property=2)
+        cls.other = seed_portfolio('etag-other', properties=1, units_per_property=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response['ETag']
+
+    def test_unchanged_list_is_not_serialized_again(self):
+        url = reverse('v1_tenant-list')
+        response = self.client.get(url)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn('Authorization', response['Vary'])
+        self.assertNotIn('Last-Modified', response)
+
+        with mock.patch.object(TenantSerializer, 'to_representation', side_effect=AssertionError('serialized')), \
+                self.assertNumQueries(2):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='W/"stale"').status_code, 200)
+
+    def test_validator_follows_serialized_relations(self):
+        tenants, properties = reverse('v1_tenant-list'), reverse('v1_landlord-property-list-create')
+        before = self.etag(tenants), self.etag(properties)
+        # A nested unit changes
+        Unit.objects.filter(pk=self.portfolio.unit.pk).update(rent_amount=2222, updated_at=timezone.now())
+        after = self.etag(tenants), self.etag(properties)
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+        # A nested unit disappears without touching its property's updated_at
+        Unit.objects.filter(pk=self.portfolio.vacant_unit.pk).delete()
+        self.assertNotEqual(self.etag(properties), after[1])
+        # Rows leaving the list
+        etag = self.etag(tenants)
+        Tenant.objects.filter(pk=self.portfolio.tenant.pk).delete()
+        self.assertNotEqual(self.etag(tenants), etag)
+
+    def test_nested_message_edits_change_the_etag(self):
+        url = reverse('v1_landlord-maintenance-detail', kwargs={'pk': self.portfolio.maintenance.pk})
+        etag = self.etag(url)
+        message = MaintenanceMessage.objects.filter(maintenance=self.portfolio.maintenance).first()
+        message.message = 'Plumber booked for Monday'
+        message.save()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_relations_are_aggregated_separately(self):
+        paths = relation_paths(get_serializer_query_plan(LandlordDetailSerializer))
+        with CaptureQueriesContext(connection) as queries:
+            validator = queryset_validator(User.objects.filter(pk=self.portfolio.landlord.pk), paths)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        # Only the root rows are counted DISTINCT; no relation is joined to another
+        self.assertEqual(sql.count('UNION ALL'), len(paths))
+        self.assertEqual(sql.count('DISTINCT'), 1)
+        # One (part, count, modified) row for the landlord, then one per path
+        counts = [count for _, count, _ in validator]
+        self.assertEqual(counts[0], 1)
+        self.assertEqual(counts[1 + paths.index('landlord_properties')], 2)
+        self.assertEqual(counts[1 + paths.index('landlord_properties__units')], Unit.objects.filter(property__landlord=self.portfolio.landlord).count())
+
+    def test_models_without_updated_at_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            queryset_validator(ChatMessage.objects.all())
+
+    def test_etag_varies_by_user_and_query(self):
+        url = reverse('v1_tenant-list')
+        etag = self.etag(url)
+        self.assertNotEqual(self.etag(f'{url}?page_size=1'), etag)
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.other.landlord)['access']}")
+        response = other.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_last_modified(self):
+        url = reverse('v1_unit-detail', kwargs={'pk': self.portfolio.unit.pk})
+        Unit.objects.filter(pk=self.portfolio.unit.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.portfolio.unit.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+
+        # Details with nested rows only use the ETag
+        tenant = reverse('v1_tenant-detail', kwargs={'pk': self.portfolio.tenant.pk})
+        response = self.client.get(tenant)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get(tenant, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_objects_outside_the_scope_are_still_not_found(self):
+        url = reverse('v1_tenant-detail', kwargs={'pk': self.other.tenant.pk})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_relation_paths_include_nested_prefetches(self):
+        paths = relation_paths(get_serializer_query_plan(LandlordDetailSerializer))
+        self.assertIn('landlord_properties', paths)
+        self.assertIn('landlord_properties__units', paths)
+        self.assertEqual(set(relation_paths(get_serializer_query_plan(TenantSerializer))), {'unit', 'unit__property'})
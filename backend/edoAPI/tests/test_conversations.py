@@ -0,0 +1,181 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import ChatMessage, Conversation, ConversationParticipant
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class ConversationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('inbox', units_per_property=2)
+        cls.landlord = cls.portfolio.landlord
+        cls.tenant = cls.portfolio.tenant_user
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        return client
+
+    def entry(self, user, conversation):
+        return ConversationParticipant.objects.get(user=user, conversation=conversation)
+
+    def test_sending_updates_thread_summary_and_unread_count(self):
+        conversation = self.portfolio.conversation
+        before = self.entry(self.tenant, conversation).unread_count
+        response = self.client_for(self.landlord).post(reverse('v1_chat-message-list'), {
+            'recipient': self.tenant.pk, 'unit': self.portfolio.unit.pk, 'message': 'Inspection on Friday',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(response.data['conversation'], conversation.pk)
+
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message_id, response.data['id'])
+        self.assertEqual(self.entry(self.tenant, conversation).unread_count, before + 1)
+        self.assertEqual(self.entry(self.landlord, conversation).last_activity, conversation.last_activity)
+
+        # A message without unit context opens a separate thread
+        general = ChatMessage.objects.create(sender=self.tenant, recipient=self.landlord, message='Hello')
+        self.assertNotEqual(general.conversation_id, conversation.pk)
+        self.assertEqual(Conversation.for_message(ChatMessage(sender=self.landlord, recipient=self.tenant)), general.conversation)
+
+    def test_inbox_is_one_query_newest_first(self):
+        ChatMessage.objects.create(sender=self.tenant, recipient=self.landlord, message='Latest')
+        client = self.client_for(self.landlord)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('v1_conversation-list'))
+        self.assertEqual(response.status_code, 200)
+        # Token user lookup, then the inbox itself
+        self.assertEqual(len(queries), 2)
+        results = response.data['results']
+        self.assertEqual(results[0]['last_message']['message'], 'Latest')
+        self.assertEqual(results[0]['participant']['id'], self.tenant.pk)
+        activity = [entry['last_activity'] for entry in results]
+        self.assertEqual(activity, sorted(activity, reverse=True))
+        self.assertEqual(len(results), ConversationParticipant.objects.filter(user=self.landlord).count())
+
+    def test_mark_read_and_badge(self):
+        client = self.client_for(self.tenant)
+        conversation = self.portfolio.conversation
+        unread = self.entry(self.tenant, conversation).unread_count
+        self.assertGreater(unread, 0)
+        badge = client.get(reverse('v1_conversation-unread')).data
+        self.assertEqual(badge['total'], sum(
+            ConversationParticipant.objects.filter(user=self.tenant).values_list('unread_count', flat=True)
+        ))
+
+        response = client.post(reverse('v1_conversation-read', kwargs={'pk': conversation.pk}))
+        self.assertEqual(response.data['marked_read'], unread)
+        self.assertEqual(self.entry(self.tenant, conversation).unread_count, 0)
+        self.assertFalse(conversation.messages.filter(recipient=self.tenant, is_read=False).exists())
+        self.assertEqual(client.get(reverse('v1_conversation-unread')).data['total'], badge['total'] - unread)
+
+        # Flipping a single message back to unread counts it again
+        message = conversation.messages.filter(recipient=self.tenant).first()
+        client.patch(reverse('v1_chat-message-detail', kwargs={'pk': message.pk}), {'is_read': False}, format='json')
+        self.assertEqual(self.entry(self.tenant, conversation).unread_count, 1)
+
+    def test_deleting_latest_message_falls_back_to_previous(self):
+        conversation = self.portfolio.conversation
+        previous = conversation.last_message_id
+        message = ChatMessage.objects.create(sender=self.tenant, recipient=self.landlord, unit=self.portfolio.unit, message='Oops')
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message_id, message.pk)
+
+        response = self.client_for(self.tenant).delete(reverse('v1_chat-message-detail', kwargs={'pk': message.pk}))
+        self.assertEqual(response.status_code, 204)
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message_id, previous)
+
+    def test_conversations_are_private(self):
+        response = self.client_for(self.portfolio.regular).get(
+            reverse('v1_conversation-detail', kwargs={'pk': self.portfolio.conversation.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkChatActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('busy', units_per_property=1)
+        cls.landlord = cls.portfolio.landlord
+        cls.tenant = cls.portfolio.tenant_user
+        ChatMessage.objects.bulk_create([
+            ChatMessage(sender=cls.landlord, recipient=cls.tenant, unit=cls.portfolio.unit, message=f'Update {n}')
+            for n in range(300)
+        ])
+        Conversation.attach(ChatMessage.objects.filter(conversation=None))
+
+    def setUp(self):
+        self.conversation = self.portfolio.conversation
+        self.messages = ChatMessage.objects.filter(conversation=self.conversation)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        return client
+
+    def unread(self, user):
+        return ConversationParticipant.objects.get(conversation=self.conversation, user=user).unread_count
+
+    def test_mark_read_up_to_id_is_one_update(self):
+        received = self.messages.filter(recipient=self.tenant).order_by('pk')
+        cutoff = received[199].pk
+        before = self.unread(self.tenant)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.tenant).post(reverse('v1_chat-message-mark-read'), {
+                'conversation': self.conversation.pk, 'to_id': cutoff,
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertEqual(response.data['marked_read'], 200)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "edoAPI_chatmessage"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.unread(self.tenant), before - 200)
+        self.assertFalse(received.filter(pk__lte=cutoff, is_read=False).exists())
+        self.assertTrue(received.filter(pk__gt=cutoff, is_read=False).exists())
+
+        # Everything up to now, then nothing left
+        response = self.client_for(self.tenant).post(reverse('v1_chat-message-mark-read'), {
+            'conversation': self.conversation.pk, 'until': timezone.now().isoformat(),
+        }, format='json')
+        self.assertEqual(self.unread(self.tenant), 0)
+
+    def test_mark_read_requires_participation(self):
+        response = self.client_for(self.portfolio.regular).post(reverse('v1_chat-message-mark-read'), {
+            'conversation': self.conversation.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_range_delete_is_one_statement_per_table_and_repairs_thread(self):
+        sent = self.messages.filter(sender=self.landlord).order_by('pk')
+        first, last = sent[100].pk, sent.last().pk
+        expected = sent.filter(pk__gte=first).count()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.landlord).post(reverse('v1_chat-message-delete-multiple'), {
+                'conversation': self.conversation.pk, 'from_id': first, 'to_id': last,
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertEqual(response.data['deleted'], expected)
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE')]
+        # One for the hot table, one for the archive
+        self.assertEqual(len(deletes), 2)
+        self.assertEqual(sum('archivedchatmessage' in sql for sql in deletes), 1)
+
+        self.conversation.refresh_from_db()
+        latest = self.messages.order_by('-timestamp', '-id').first()
+        self.assertEqual(self.conversation.last_message_id, latest.pk)
+        self.assertEqual(self.unread(self.tenant), self.messages.filter(recipient=self.tenant, is_read=False).count())
+
+    def test_delete_by_ids_only_touches_own_messages(self):
+        own = self.messages.filter(sender=self.landlord).values_list('pk', flat=True)[:3]
+        theirs = self.messages.filter(sender=self.tenant).values_list('pk', flat=True)[:2]
+        response = self.client_for(self.landlord).post(reverse('v1_chat-message-delete-multiple'), {
+            'message_ids': list(own) + list(theirs),
+        }, format='json')
+        self.assertEqual(response.data['deleted'], 3)
+        self.assertEqual(ChatMessage.objects.filter(pk__in=list(theirs)).count(), 2)
+        self.assertEqual(self.client_for(self.landlord).post(reverse('v1_chat-message-delete-multiple'), {}, format='json').status_code, 400)
@@ -0,0 +1,87 @@
+import datetime
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import LandlordMaintenance, Payment, VacateRequest
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class LandlordDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('dash', units_per_property=3)
+        cls.other = seed_portfolio('dash-other', properties=1, units_per_property=1)
+        p = cls.portfolio
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        Payment.objects.bulk_create([
+            Payment(tenant=p.tenant, unit=p.unit, amount=Decimal('1000.00'), payment_date=month_start, payment_method='mpesa'),
+            Payment(tenant=p.tenant, unit=p.unit, amount=Decimal('500.50'), payment_date=today, payment_method='cash'),
+            # Last month's payment doesn't count
+            Payment(tenant=p.tenant, unit=p.unit, amount=Decimal('999.00'),
+                    payment_date=month_start - datetime.timedelta(days=1), payment_method='cash'),
+        ])
+        LandlordMaintenance.objects.filter(pk=p.maintenance.pk).update(status='completed')
+        VacateRequest.objects.filter(pk=p.vacate_request.pk).update(status='approved')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.url = reverse('v1_landlord-dashboard')
+
+    def test_dashboard(self):
+        with self.assertNumQueries(7):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        data = response.json()
+
+        # Two properties of three occupied units, plus one vacant unit
+        self.assertEqual(data['occupancy'], {
+            'properties': 2, 'units': 7, 'occupied': 6, 'vacant': 1, 'occupancy_rate': round(6 / 7, 4),
+        })
+        first = next(row for row in data['properties'] if row['id'] == self.portfolio.property.pk)
+        self.assertEqual((first['units'], first['occupied'], first['vacant']), (4, 3, 1))
+
+        rent_roll = data['rent_roll']
+        self.assertEqual(rent_roll['potential'], '6906.00')
+        self.assertEqual(rent_roll['expected'], '6006.00')
+        self.assertEqual(rent_roll['collected'], '1500.50')
+        self.assertEqual(rent_roll['outstanding'], '4505.50')
+        self.assertEqual(rent_roll['payments'], 2)
+
+        maintenance = data['maintenance']
+        self.assertEqual(maintenance['open'], 5)
+        self.assertEqual(maintenance['by_status'], {'pending': 5, 'in_progress': 0, 'completed': 1, 'cancelled': 0})
+        self.assertEqual(sum(maintenance['open_by_priority'].values()), 5)
+
+        vacate = data['vacate_requests']
+        self.assertEqual(vacate['pending'], 5)
+        self.assertEqual(vacate['by_status']['approved'], 1)
+        self.assertEqual(len(vacate['upcoming']), 5)
+        self.assertNotIn(self.portfolio.vacate_request.pk, [row['id'] for row in vacate['upcoming']])
+
+        activity = data['recent_activity']
+        self.assertEqual(len(activity), 10)
+        self.assertEqual(activity, sorted(activity, key=lambda row: row['at'], reverse=True))
+        self.assertLessEqual({row['type'] for row in activity}, {'maintenance', 'vacate_request', 'payment', 'tenant', 'notice'})
+        other_properties = {self.other.property.name}
+        self.assertFalse(other_properties & {row['property_name'] for row in activity})
+
+    def test_empty_portfolio(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.portfolio.landlord.landlord_properties.all().delete()
+        data = client.get(self.url).json()
+        self.assertEqual(data['occupancy']['units'], 0)
+        self.assertIsNone(data['occupancy']['occupancy_rate'])
+        self.assertEqual(data['rent_roll']['collected'], '0.00')
+        self.assertIsNone(data['rent_roll']['collection_rate'])
+        self.assertEqual(data['maintenance']['open'], 0)
+
+    def test_landlords_only(self):
+        tenant = APIClient()
+        tenant.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.tenant_user)['access']}")
+        self.assertEqual(tenant.get(self.url).status_code, 403)
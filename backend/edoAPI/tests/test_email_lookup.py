@@ -0,0 +1,68 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.models import Tenant, User
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio, PASSWORD
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EmailLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('Case', units_per_property=1)
+        cls.landlord = cls.portfolio.landlord
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.landlord)['access']}")
+
+    def test_email_key_is_kept_by_the_database(self):
+        self.assertEqual(self.landlord.email, 'Case-landlord@example.com')
+        self.assertEqual(User.objects.by_email(' CASE-LANDLORD@Example.com ').get(), self.landlord)
+        # Bulk-created rows get a key too
+        tenant = Tenant.objects.get(pk=self.portfolio.tenant.pk)
+        self.assertEqual(tenant.email_key, tenant.email.lower())
+
+    def test_one_account_per_address_regardless_of_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(email='CASE-landlord@example.com')
+        response = self.client.post(reverse('v1_user-register'), {
+            'email': 'case-LANDLORD@example.com', 'password': PASSWORD, 'first_name': 'Dup', 'last_name': 'User',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+
+    def test_login_is_case_insensitive(self):
+        for url in (reverse('v1_user-login'), reverse('v1_token_obtain_pair')):
+            with self.subTest(url=url):
+                response = self.client.post(url, {'email': 'case-landlord@EXAMPLE.com', 'password': PASSWORD}, format='json')
+                self.assertEqual(response.status_code, 200, response.content[:300])
+        response = self.client.post(reverse('v1_user-login'), {'email': 'case-landlord@example.com', 'password': 'wrong'}, format='json')
+        self.assertGreaterEqual(response.status_code, 400)
+
+    def test_check_user_by_email_is_one_query(self):
+        self.authenticate()
+        url = reverse('v1_check-user-by-email')
+        with self.assertNumQueries(2):  # authentication + lookup
+            response = self.client.get(url, {'email': self.portfolio.tenant_user.email.upper()})
+        self.assertEqual(response.data['user']['id'], self.portfolio.tenant_user.pk)
+        self.assertTrue(response.data['is_tenant'])
+        response = self.client.get(url, {'email': self.portfolio.regular.email})
+        self.assertEqual((response.data['exists'], response.data['is_tenant']), (True, False))
+        self.assertEqual(self.client.get(url, {'email': 'nobody@example.com'}).data, {'exists': False})
+
+    def test_tenant_create_reuses_the_existing_account(self):
+        self.authenticate()
+        regular = self.portfolio.regular
+        response = self.client.post(reverse('v1_tenant-list'), {
+            'email': regular.email.upper(), 'first_name': 'Reggie', 'last_name': 'Case', 'phone': '0700000001',
+            'unit_id': self.portfolio.vacant_unit.unit_id, 'property_id': self.portfolio.property.pk,
+            'start_date': '2026-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(User.objects.by_email(regular.email).count(), 1)
+        self.assertEqual(Tenant.objects.get(unit=self.portfolio.vacant_unit).user, regular)
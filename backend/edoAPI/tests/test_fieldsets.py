@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.fieldsets import parse_paths
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('sparse', units_per_property=3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.json(), [query['sql'] for query in queries.captured_queries]
+
+    def test_parse_paths(self):
+        self.assertEqual(
+            parse_paths('id, unit.unit_id,unit.rent_amount,,'),
+            {'id': {}, 'unit': {'unit_id': {}, 'rent_amount': {}}},
+        )
+
+    def test_responses_are_unchanged_without_parameters(self):
+        data, _ = self.get(reverse('v1_tenant-list'))
+        self.assertIn('unit_id', data['results'][0]['unit'])
+        self.assertIn('emergencyContact', data['results'][0])
+
+    def test_fields_narrow_the_columns(self):
+        url = reverse('v1_landlord-maintenance-list')
+        data, queries = self.get(url, {'fields': 'id,subject,status_display,tenant_name'})
+        self.assertEqual(set(data[0]), {'id', 'subject', 'status_display', 'tenant_name'})
+        self.assertTrue(data[0]['tenant_name'].startswith('Tia '))
+        # Validator and list; messages are neither rendered nor prefetched
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('"description"', queries[-1])
+        self.assertNotIn('maintenancemessage', queries[-1])
+
+    def test_expansion_is_opt_in(self):
+        url = reverse('v1_landlord-maintenance-list')
+        _, full = self.get(url)
+        data, collapsed = self.get(url, {'expand': ''})
+        self.assertNotIn('messages', data[0])
+        self.assertIn('description', data[0])
+        self.assertEqual(len(collapsed), len(full) - 1)
+
+        data, _ = self.get(url, {'fields': 'id,messages.message'})
+        self.assertEqual(data[0]['messages'][0], {'message': 'Update 0'})
+
+    def test_nested_fieldsets(self):
+        url = reverse('v1_landlord-detail', kwargs={'id': self.portfolio.landlord.pk})
+        data, queries = self.get(url, {'fields': 'id,properties.name,properties.units.unit_id'})
+        self.assertEqual(set(data), {'id', 'properties'})
+        self.assertEqual(set(data['properties'][0]), {'name', 'units'})
+        self.assertEqual(set(data['properties'][0]['units'][0]), {'unit_id'})
+        self.assertTrue(any('SELECT "edoAPI_unit"."id", "edoAPI_unit"."property_id", "edoAPI_unit"."unit_id" FROM' in sql for sql in queries))
+
+        data, _ = self.get(url, {'expand': 'properties'})
+        self.assertIn('total_units', data['properties'][0])
+        self.assertNotIn('units', data['properties'][0])
+
+    def test_pagination_reads_its_keys(self):
+        url = reverse('v1_tenant-list')
+        first, _ = self.get(url, {'fields': 'id', 'page_size': 4})
+        self.assertEqual(len(first['results']), 4)
+        with self.assertNumQueries(3):
+            second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 2)
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 6)
+
+    def test_function_views_and_details(self):
+        data, _ = self.get(reverse('v1_landlord-maintenance-requests'), {'fields': 'id,priority'})
+        self.assertEqual(set(data['results'][0]), {'id', 'priority'})
+        data, queries = self.get(reverse('v1_tenant-detail', kwargs={'pk': self.portfolio.tenant.pk}), {'fields': 'id,name'})
+        self.assertEqual(data, {'id': self.portfolio.tenant.pk, 'name': f'{self.portfolio.tenant.first_name} {self.portfolio.tenant.last_name}'})
+        # No query loading deferred columns one by one
+        self.assertEqual(len(queries), 3)
+
+    def test_writes_return_every_field(self):
+        url = f"{reverse('v1_unit-detail', kwargs={'pk': self.portfolio.vacant_unit.pk})}?fields=id"
+        response = self.client.patch(url, {'floor': '9'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        self.assertEqual(response.json()['floor'], '9')
+        self.assertIn('rent_amount', response.json())
@@ -0,0 +1,77 @@
+import datetime
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import Notice, NoticeDelivery, Tenant
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class NoticeScopingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('notices', units_per_property=4)
+        cls.other = seed_portfolio('other', units_per_property=2)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        return client
+
+    def notice_ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return {row['id'] for row in response.data['results']}
+
+    def test_landlord_sees_only_their_notices(self):
+        ids = self.notice_ids(self.client_for(self.portfolio.landlord).get('/api/v1/notices/?page_size=200'))
+        self.assertEqual(ids, set(Notice.objects.filter(sender=self.portfolio.landlord).values_list('id', flat=True)))
+        self.assertFalse(ids & set(Notice.objects.filter(sender=self.other.landlord).values_list('id', flat=True)))
+
+    def test_tenant_sees_targeted_and_general_notices(self):
+        ids = self.notice_ids(self.client_for(self.portfolio.tenant_user).get('/api/v1/notices/'))
+        general = Notice.objects.get(sender=self.portfolio.landlord, unit__isnull=True, tenant__isnull=True)
+        self.assertEqual(ids, {self.portfolio.notice.id, general.id})
+
+    def test_general_notice_fans_out_in_one_insert(self):
+        client = self.client_for(self.portfolio.landlord)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/v1/notices/', {
+                'property': self.portfolio.property.pk, 'notice_type': 'general', 'title': 'Inspection',
+                'message': 'Annual inspection on Monday', 'effective_date': timezone.now().date().isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT') and '"edoAPI_noticedelivery"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        recipients = set(NoticeDelivery.objects.filter(notice_id=response.data['id']).values_list('recipient_id', flat=True))
+        self.assertEqual(recipients, set(
+            Tenant.objects.filter(unit__property=self.portfolio.property).values_list('user_id', flat=True)
+        ))
+
+    def test_since_returns_only_newer_notices(self):
+        cutoff = timezone.now()
+        newer = Notice.objects.create(
+            sender=self.portfolio.landlord, tenant=self.portfolio.tenant, notice_type='rent',
+            title='Rent reminder', message='Rent is due', effective_date=cutoff.date(),
+        )
+        newer.deliver()
+        since = (cutoff - datetime.timedelta(microseconds=1)).isoformat()
+        for user in (self.portfolio.landlord, self.portfolio.tenant_user):
+            ids = self.notice_ids(self.client_for(user).get('/api/v1/notices/', {'since': since}))
+            self.assertEqual(ids, {newer.id})
+        response = self.client_for(self.portfolio.tenant_user).get('/api/v1/notices/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_targets_must_belong_to_the_landlord(self):
+        response = self.client_for(self.portfolio.landlord).post('/api/v1/notices/', {
+            'tenant': self.other.tenant.pk, 'notice_type': 'general', 'title': 'Hello',
+            'message': 'Not yours', 'effective_date': timezone.now().date().isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_tenants_cannot_write_notices(self):
+        response = self.client_for(self.portfolio.tenant_user).patch(
+            f'/api/v1/notices/{self.portfolio.notice.pk}/', {'title': 'Edited'}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
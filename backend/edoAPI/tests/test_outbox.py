@@ -0,0 +1,115 @@
+import datetime
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import OutboundEmail, TenantInvitation
+from edoAPI.outbox import claim_batch, drain_outbox, enqueue_email, outbox_stats
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+from .smtp import LocalSMTPServer
+
+OUTBOX = {'BATCH_SIZE': 10, 'MAX_ATTEMPTS': 2, 'BACKOFF_SECONDS': 60, 'MAX_BACKOFF_SECONDS': 600, 'LEASE_SECONDS': 60}
+
+
+@override_settings(EMAIL_OUTBOX=OUTBOX)
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('outbox', units_per_property=2)
+
+    def test_invitation_queues_email_instead_of_sending(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        response = client.post(reverse('v1_create-tenant-invitation'), {
+            'unitNumber': self.portfolio.vacant_unit.unit_id, 'propertyId': self.portfolio.property.pk,
+            'email': 'invitee@example.com',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get(kind='tenant_invitation', to=['invitee@example.com'])
+        self.assertIn(TenantInvitation.objects.get(email='invitee@example.com').invitation_code, queued.body)
+
+        result = drain_outbox()
+        self.assertEqual(result.sent, 1)
+        self.assertEqual([m.to for m in mail.outbox], [['invitee@example.com']])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('sent', 1))
+
+    def test_rolled_back_transaction_queues_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue_email('Subject', 'Body', 'rollback@example.com')
+                raise RuntimeError
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_batch_reuses_one_smtp_session_and_dead_letters_failures(self):
+        for n in range(5):
+            enqueue_email(f'Hello {n}', 'Body', f'ok-{n}@example.com')
+        bounced = enqueue_email('Bounce', 'Body', 'reject@example.com')
+
+        with LocalSMTPServer() as server, override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.port, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=5,
+        ):
+            with self.assertLogs('edoAPI.outbox', 'WARNING'):
+                result = drain_outbox()
+            self.assertEqual((result.claimed, result.sent, result.retried, result.dead), (6, 5, 1, 0))
+            self.assertEqual(server.sessions, 1)
+            self.assertEqual(len(server.messages), 5)
+            self.assertEqual(len(result.send_seconds), 5)
+
+            bounced.refresh_from_db()
+            self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+            self.assertIn('SMTPRecipientsRefused', bounced.last_error)
+            # Backing off: not due again until the retry time
+            self.assertEqual(drain_outbox().claimed, 0)
+
+            with self.assertLogs('edoAPI.outbox', 'ERROR'):
+                result = drain_outbox(now=bounced.next_attempt_at + datetime.timedelta(seconds=1))
+            self.assertEqual(result.dead, 1)
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('dead', 2))
+        self.assertEqual(outbox_stats()['depth'], {'pending': 0, 'sending': 0, 'sent': 5, 'dead': 1})
+
+    def test_expired_lease_is_reclaimed(self):
+        message = enqueue_email('Subject', 'Body', 'lease@example.com')
+        OutboundEmail.objects.filter(pk=message.pk).update(
+            status='sending', claim_token='crashed', leased_until=timezone.now() - datetime.timedelta(seconds=1),
+        )
+        self.assertEqual(drain_outbox().sent, 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('sent', 1))
+
+    def test_expired_leases_count_as_attempts(self):
+        message = enqueue_email('Subject', 'Body', 'crash@example.com')
+        lease = datetime.timedelta(seconds=OUTBOX['LEASE_SECONDS'] + 1)
+        now = timezone.now()
+        # Two workers die holding the message, each leaving its lease to lapse
+        for attempt in (1, 2):
+            now += lease
+            claimed, dead = claim_batch(10, now=now)
+            self.assertEqual(([m.pk for m in claimed], dead), ([message.pk], 0))
+            self.assertEqual(claimed[0].attempts, attempt)
+
+        with self.assertLogs('edoAPI.outbox', 'ERROR'):
+            result = drain_outbox(now=now + lease)
+        self.assertEqual((result.claimed, result.sent, result.dead), (0, 0, 1))
+        self.assertEqual(len(mail.outbox), 0)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.leased_until), ('dead', 2, None))
+        self.assertIn('Lease expired', message.last_error)
+        self.assertEqual(claim_batch(10, now=now + 2 * lease), ([], 0))
+
+    def test_command_drains_queue_and_reports_depth(self):
+        for n in range(3):
+            enqueue_email(f'Hello {n}', 'Body', f'cmd-{n}@example.com')
+        out = StringIO()
+        call_command('process_outbox', batch_size=2, stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('batch 2: claimed 1, sent 1', out.getvalue())
+        self.assertIn('pending 0, sending 0, sent 3, dead 0', out.getvalue())
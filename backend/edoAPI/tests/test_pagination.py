@@ -0,0 +1,49 @@
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import ChatMessage
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('paged', units_per_property=5)
+        # Identical timestamps force the id tie-breaker to do its job
+        ChatMessage.objects.filter(pk__in=ChatMessage.objects.values('pk')[:10]).update(timestamp=timezone.now())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            url = response.data['next']
+        return pages
+
+    def test_pages_cover_every_row_once_in_key_order(self):
+        expected = list(
+            ChatMessage.objects.filter(recipient=self.portfolio.landlord)
+            .union(ChatMessage.objects.filter(sender=self.portfolio.landlord))
+            .order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        pages = self.walk('/api/v1/chat-messages/?page_size=7')
+        seen = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(seen, expected)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertTrue(all(len(page['results']) <= 7 for page in pages))
+
+    def test_previous_link_returns_the_preceding_page(self):
+        first = self.client.get('/api/v1/chat-messages/?page_size=4').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/v1/chat-messages/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
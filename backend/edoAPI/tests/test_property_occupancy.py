@@ -0,0 +1,96 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from edoAPI.models import LandlordProperty, Payment
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+def results(response):
+    data = response.json()
+    return data['results'] if isinstance(data, dict) and 'results' in data else data
+
+
+class PropertyOccupancyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('occ', units_per_property=3)
+        p = cls.portfolio
+        Payment.objects.create(
+            tenant=p.tenant, unit=p.unit, amount=Decimal('750.00'),
+            payment_date=timezone.localdate(), payment_method='mpesa',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+
+    def assertOccupancy(self, row):
+        # The first property holds three occupied units and the vacant one
+        self.assertEqual(row['total_units'], 4)
+        self.assertEqual(row['occupied_units'], 3)
+        self.assertEqual(row['vacant_units'], 1)
+        self.assertEqual(row['occupancy_rate'], 0.75)
+        self.assertEqual(row['vacancy_rate'], 0.25)
+        self.assertEqual(row['potential_rent'], '3903.00')
+        self.assertEqual(row['collected_rent'], '750.00')
+
+    def test_property_list(self):
+        url = reverse('v1_landlord-property-list-create')
+        with self.assertNumQueries(4):
+            rows = results(self.client.get(url))
+        first = next(row for row in rows if row['id'] == self.portfolio.property.pk)
+        self.assertOccupancy(first)
+        self.assertEqual(len(first['units']), 4)
+        other = next(row for row in rows if row['id'] != self.portfolio.property.pk)
+        self.assertEqual((other['total_units'], other['collected_rent'], other['vacancy_rate']), (3, '0.00', 0.0))
+
+        # Summary mode skips the units prefetch
+        with self.assertNumQueries(3):
+            rows = results(self.client.get(url, {'summary': 'true'}))
+        self.assertEqual(len(rows), 2)
+        for row in rows:
+            self.assertNotIn('units', row)
+        self.assertOccupancy(next(row for row in rows if row['id'] == self.portfolio.property.pk))
+
+    def test_landlord_detail(self):
+        url = reverse('v1_landlord-detail', kwargs={'id': self.portfolio.landlord.pk})
+        properties = self.client.get(url).json()['properties']
+        self.assertOccupancy(next(row for row in properties if row['id'] == self.portfolio.property.pk))
+        self.assertTrue(all('units' in row for row in properties))
+
+        with self.assertNumQueries(4):
+            properties = self.client.get(url, {'summary': '1'}).json()['properties']
+        self.assertOccupancy(next(row for row in properties if row['id'] == self.portfolio.property.pk))
+        self.assertFalse(any('units' in row for row in properties))
+
+    def test_new_property(self):
+        response = self.client.post(reverse('v1_landlord-property-list-create'), {
+            'name': 'Fresh Block', 'type': 'Apartment', 'street': '1 New St',
+            'city': 'Nairobi', 'state': 'Nairobi', 'zip_code': '00100',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:300])
+        data = response.json()
+        self.assertEqual((data['total_units'], data['vacant_units'], data['occupancy_rate']), (0, 0, None))
+        self.assertEqual(data['potential_rent'], '0.00')
+        self.assertEqual(data['units'], [])
+
+    def test_payments_change_the_etag(self):
+        url = reverse('v1_landlord-property-list-create')
+        etag = self.client.get(url, {'summary': 'true'})['ETag']
+        self.assertEqual(self.client.get(url, {'summary': 'true'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Payment.objects.create(
+            tenant=self.portfolio.tenant, unit=self.portfolio.unit, amount=Decimal('10.00'),
+            payment_date=timezone.localdate(), payment_method='cash',
+        )
+        response = self.client.get(url, {'summary': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        first = next(row for row in results(response) if row['id'] == self.portfolio.property.pk)
+        self.assertEqual(first['collected_rent'], '760.00')
+
+    def test_annotations_are_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(LandlordProperty.objects.filter(landlord=self.portfolio.landlord).with_occupancy())
+        self.assertEqual(sorted(row.unit_count for row in rows), [3, 4])
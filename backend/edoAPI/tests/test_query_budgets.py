@@ -0,0 +1,188 @@
+"""
+Query-budget regression tests.
+
+Every route in edoAPI.urls is exercised against two portfolio sizes. A route
+fails if it exceeds its query budget, if its query count at the larger size
+differs from the smaller one (i.e. it issues queries per row), or if the
+request takes longer than MAX_RESPONSE_SECONDS to serialize.
+
+New routes must be added to ROUTES; test_every_route_has_a_budget enforces it.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, URLPattern, URLResolver
+from rest_framework.test import APIClient
+from edoAPI import urls as edo_urls
+from edoAPI.contacts import clear_indexes
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio, PASSWORD
+
+SMALL_UNITS = 2
+LARGE_UNITS = 8
+MAX_RESPONSE_SECONDS = 1.0
+
+
+@dataclass
+class Route:
+    method: str
+    max_queries: int
+    actor: Optional[str] = 'landlord'
+    kwargs: Callable = lambda p: {}
+    data: Callable = lambda p: None
+    query: Callable = lambda p: None
+
+
+ROUTES = {
+    # Authentication
+    'v1_token_obtain_pair': Route('post', 2, actor=None, data=lambda p: {'email': p.landlord.email, 'password': PASSWORD}),
+    'v1_token_refresh': Route('post', 15, actor=None, data=lambda p: {'refresh': tokens_for_user(p.landlord)['refresh']}),
+    'v1_token_verify': Route('post', 1, actor=None, data=lambda p: {'token': tokens_for_user(p.landlord)['access']}),
+    'v1_token_blacklist': Route('post', 7, actor=None, data=lambda p: {'refresh': tokens_for_user(p.landlord)['refresh']}),
+    'v1_user-register': Route('post', 3, actor=None, data=lambda p: {
+        'email': f'new-{p.landlord.pk}@example.com', 'password': PASSWORD, 'first_name': 'New', 'last_name': 'User',
+    }),
+    'v1_user-login': Route('post', 2, actor=None, data=lambda p: {'email': p.landlord.email, 'password': PASSWORD}),
+
+    # Users and roles
+    'v1_user-list': Route('get', 2),
+    'v1_user-profile': Route('get', 1),
+    'v1_user-detail': Route('get', 2, kwargs=lambda p: {'pk': p.tenant_user.pk}),
+    'v1_become_landlord': Route('post', 4, actor='regular'),
+    'v1_become_tenant': Route('post', 4, actor='regular'),
+    'v1_become_host': Route('post', 4, actor='regular'),
+    'v1_onboard-role': Route('post', 4, actor='regular', data=lambda p: {'role': 'host'}),
+    'v1_relinquish-role': Route('post', 6, data=lambda p: {'role': 'landlord'}),
+    'v1_search-users-by-email': Route('get', 3, query=lambda p: {'q': p.tenant_user.email[:12]}),
+    'v1_check-user-by-email': Route('get', 2, query=lambda p: {'email': p.tenant_user.email}),
+
+    # Landlord portfolio. Views with ConditionalGetMixin spend one query on
+    # the ETag validator (edoAPI.conditional), which is all a 304 costs
+    'v1_landlord-property-list-create': Route('get', 4),
+    'v1_landlord-property-detail': Route('get', 4, kwargs=lambda p: {'id': p.property.pk}),
+    'v1_landlord-property-units': Route('get', 3, kwargs=lambda p: {'property_id': p.property.pk}),
+    'v1_landlord-list': Route('get', 2),
+    'v1_landlord-detail': Route('get', 5, kwargs=lambda p: {'id': p.landlord.pk}),
+    'v1_unit-list': Route('get', 3),
+    'v1_unit-bulk-create': Route('post', 6, data=lambda p: {
+        'property': p.property.pk, 'defaults': {'rent_amount': '1000.00'},
+        'ranges': [{'floor_start': 7, 'floor_end': 8, 'number_start': 1, 'number_end': 10}],
+    }),
+    'v1_unit-bulk-update': Route('post', 6, data=lambda p: {
+        'filter': {'property': p.property.pk}, 'changes': {'rent_amount': '1100.00'},
+    }),
+    'v1_unit-detail': Route('get', 2, kwargs=lambda p: {'pk': p.unit.pk}),
+    'v1_tenant-list': Route('get', 3),
+    'v1_tenant-detail': Route('get', 3, kwargs=lambda p: {'pk': p.tenant.pk}),
+
+    # Invitations
+    'v1_tenant-invitation-list': Route('get', 3),
+    'v1_tenant-invitation-detail': Route('get', 3, kwargs=lambda p: {'pk': p.invitation.pk}),
+    'v1_create-tenant-invitation': Route('post', 9, data=lambda p: {
+        'unitNumber': p.vacant_unit.unit_id, 'propertyId': p.property.pk, 'email': 'invitee@example.com',
+    }),
+    'v1_bulk-import-tenants': Route('post', 9, data=lambda p: [
+        {'unit_id': p.vacant_unit.unit_id, 'property_id': p.property.pk, 'email': 'bulk-invitee@example.com'},
+    ]),
+    'v1_accept-invitation': Route('post', 4, actor=None, kwargs=lambda p: {'invitation_code': p.invitation.invitation_code},
+                                  data=lambda p: {'action': 'create_account'}),
+
+    # Tenant views
+    'v1_tenant-rentals': Route('get', 2, actor='tenant'),
+    'v1_tenant-maintenance-requests': Route('get', 4, actor='tenant'),
+    'v1_create-tenant-maintenance-request': Route('post', 10, actor='tenant', data=lambda p: {
+        'subject': 'Broken window', 'description': 'Bedroom window is cracked',
+    }),
+
+    # Maintenance
+    'v1_landlord-maintenance-requests': Route('get', 3),
+    'v1_landlord-maintenance-list': Route('get', 4),
+    'v1_landlord-maintenance-detail': Route('get', 4, kwargs=lambda p: {'pk': p.maintenance.pk}),
+    # Auth plus the six aggregate queries of edoAPI.dashboard
+    'v1_landlord-dashboard': Route('get', 7),
+
+    # Notices, chat and vacate requests
+    'v1_notice-list': Route('get', 3),
+    'v1_notice-detail': Route('get', 2, kwargs=lambda p: {'pk': p.notice.pk}),
+    # A page that stays inside the hot window never reads the archive
+    'v1_chat-message-list': Route('get', 2, query=lambda p: {'page_size': 5}),
+    'v1_chat-message-detail': Route('get', 2, kwargs=lambda p: {'pk': p.chat_message.pk}),
+    'v1_chat-message-delete-multiple': Route('post', 9, actor='tenant', data=lambda p: {'message_ids': [p.chat_message.pk]}),
+    'v1_chat-message-mark-read': Route('post', 6, actor='tenant', data=lambda p: {'conversation': p.conversation.pk}),
+    'v1_search-messages': Route('get', 4, query=lambda p: {'q': 'unit'}),
+    'v1_conversation-list': Route('get', 2),
+    'v1_conversation-detail': Route('get', 2, kwargs=lambda p: {'pk': p.conversation.pk}),
+    'v1_conversation-read': Route('post', 6, kwargs=lambda p: {'pk': p.conversation.pk}),
+    'v1_conversation-unread': Route('get', 2),
+    'v1_vacate-request-list': Route('get', 3),
+    'v1_vacate-request-detail': Route('get', 3, kwargs=lambda p: {'pk': p.vacate_request.pk}),
+
+    'api-root': Route('get', 1),
+}
+
+
+def iter_route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = seed_portfolio('small', units_per_property=SMALL_UNITS)
+        cls.large = seed_portfolio('large', units_per_property=LARGE_UNITS)
+
+    def client_for(self, portfolio, actor):
+        client = APIClient()
+        if actor is not None:
+            user = {'landlord': portfolio.landlord, 'tenant': portfolio.tenant_user, 'regular': portfolio.regular}[actor]
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+        return client
+
+    def measure(self, name, route, portfolio):
+        """Run the route once inside a rolled-back savepoint; return (status, queries, seconds)."""
+        # Cached contact indexes would outlive the rollback
+        clear_indexes()
+        sid = transaction.savepoint()
+        try:
+            client = self.client_for(portfolio, route.actor)
+            url = reverse(name, kwargs=route.kwargs(portfolio))
+            query, data = route.query(portfolio), route.data(portfolio)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                if route.method == 'get':
+                    response = client.get(url, query)
+                else:
+                    response = client.post(url, data, format='json')
+                elapsed = time.perf_counter() - started
+        finally:
+            transaction.savepoint_rollback(sid)
+        return response, len(queries), elapsed
+
+    def test_every_route_has_a_budget(self):
+        missing = set(iter_route_names(edo_urls.urlpatterns)) - set(ROUTES)
+        self.assertFalse(missing, f'Routes without a query budget: {sorted(missing)}')
+
+    def test_query_budgets(self):
+        for name, route in ROUTES.items():
+            with self.subTest(route=name):
+                small_response, small_queries, _ = self.measure(name, route, self.small)
+                large_response, large_queries, elapsed = self.measure(name, route, self.large)
+                self.assertLess(small_response.status_code, 400, small_response.content[:500])
+                self.assertLess(large_response.status_code, 400, large_response.content[:500])
+                self.assertLessEqual(
+                    large_queries, route.max_queries,
+                    f'{name} ran {large_queries} queries (budget {route.max_queries})'
+                )
+                self.assertEqual(
+                    small_queries, large_queries,
+                    f'{name} query count grows with portfolio size ({small_queries} -> {large_queries})'
+                )
+                self.assertLess(elapsed, MAX_RESPONSE_SECONDS, f'{name} took {elapsed:.3f}s')
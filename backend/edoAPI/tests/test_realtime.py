@@ -0,0 +1,105 @@
+import asyncio
+import json
+from unittest import mock
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.test import TestCase
+from edoAPI.consumers import CHAT_PATH, CLOSE_UNAUTHORIZED, ChatSocket
+from edoAPI.models import ChatMessage
+from edoAPI.pubsub import InMemoryPubSub, user_group
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class RealtimeChatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('live', units_per_property=1)
+        cls.landlord = cls.portfolio.landlord
+        cls.tenant = cls.portfolio.tenant_user
+
+    def setUp(self):
+        self.layer = InMemoryPubSub(queue_size=2)
+        self.app = ChatSocket(layer=self.layer)
+        patcher = mock.patch('edoAPI.signals.get_layer', return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def open_socket(self, user=None, path=CHAT_PATH):
+        token = (await sync_to_async(tokens_for_user)(user))['access'] if user else ''
+        communicator = ApplicationCommunicator(self.app, {
+            'type': 'websocket', 'path': path, 'query_string': f'token={token}'.encode(),
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        return communicator, await communicator.receive_output(timeout=5)
+
+    async def receive_json(self, communicator):
+        event = await communicator.receive_output(timeout=5)
+        self.assertEqual(event['type'], 'websocket.send')
+        return json.loads(event['text'])
+
+    async def close(self, communicator):
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(timeout=5)
+
+    async def test_rejects_missing_or_invalid_token(self):
+        communicator, event = await self.open_socket()
+        self.assertEqual(event, {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        await communicator.wait(timeout=5)
+
+    async def test_new_message_is_pushed_to_recipient_on_commit(self):
+        communicator, event = await self.open_socket(self.tenant)
+        self.assertEqual(event['type'], 'websocket.accept')
+
+        def send_message():
+            with self.captureOnCommitCallbacks(execute=True):
+                return ChatMessage.objects.create(sender=self.landlord, recipient=self.tenant, message='Rent is due')
+        message = await sync_to_async(send_message)()
+
+        pushed = await self.receive_json(communicator)
+        self.assertEqual(pushed['type'], 'chat.message')
+        self.assertEqual((pushed['message']['id'], pushed['message']['message']), (message.pk, 'Rent is due'))
+        self.assertEqual(pushed['message']['sender_email'], self.landlord.email)
+        await self.close(communicator)
+
+    async def test_presence_is_shared_with_chat_partners(self):
+        watcher, _ = await self.open_socket(self.landlord)
+        # The portfolio's chat message links landlord and tenant; anyone else is ignored
+        await watcher.send_input({'type': 'websocket.receive', 'text': json.dumps({
+            'type': 'presence.watch', 'users': [self.tenant.pk, self.portfolio.regular.pk],
+        })})
+        current = await self.receive_json(watcher)
+        self.assertEqual((current['user'], current['online']), (self.tenant.pk, False))
+
+        tenant_socket, _ = await self.open_socket(self.tenant)
+        online = await self.receive_json(watcher)
+        self.assertEqual((online['user'], online['online']), (self.tenant.pk, True))
+        await self.close(tenant_socket)
+        offline = await self.receive_json(watcher)
+        self.assertEqual((offline['user'], offline['online']), (self.tenant.pk, False))
+        self.assertIsNotNone(offline['last_seen'])
+        await self.close(watcher)
+
+    async def test_slow_subscriber_drops_and_is_told_to_resync(self):
+        communicator, _ = await self.open_socket(self.tenant)
+        # Publish faster than the socket drains: the queue holds two messages
+        for n in range(5):
+            self.layer.publish(user_group(self.tenant.pk), {'type': 'chat.message', 'n': n})
+        received = [await self.receive_json(communicator) for _ in range(3)]
+        self.assertEqual(received[0], {'type': 'resync', 'dropped': 3})
+        self.assertEqual([message['n'] for message in received[1:]], [0, 1])
+        self.assertTrue(await communicator.receive_nothing())
+        await self.close(communicator)
+
+    async def test_ping_and_unknown_path(self):
+        communicator, _ = await self.open_socket(self.tenant)
+        await communicator.send_input({'type': 'websocket.receive', 'text': '{"type": "ping"}'})
+        self.assertEqual(await self.receive_json(communicator), {'type': 'pong'})
+        await communicator.send_input({'type': 'websocket.receive', 'text': 'not json'})
+        self.assertEqual((await self.receive_json(communicator))['type'], 'error')
+        await self.close(communicator)
+        self.assertFalse(self.layer.is_online(self.tenant.pk))
+
+        elsewhere, event = await self.open_socket(self.tenant, path='/ws/v1/nope/')
+        self.assertEqual(event['code'], 4404)
+        await elsewhere.wait(timeout=5)
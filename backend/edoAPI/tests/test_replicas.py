@@ -0,0 +1,108 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI import replicas
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+REPLICA = 'replica_test'
+REPLICATION = {'REPLICAS': [REPLICA], 'PIN_SECONDS': 5, 'MAX_LAG_SECONDS': 10, 'LAG_CHECK_SECONDS': 5}
+
+
+@override_settings(DB_REPLICATION=REPLICATION)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The replica alias is a second connection to the test database, standing
+    in for a streaming replica that has caught up.
+    """
+    # '__all__' is resolved per class, after setUpClass has added the alias
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA] = dict(connections['default'].settings_dict)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        replicas.reset_lag_samples()
+        self.portfolio = seed_portfolio('replica', units_per_property=1)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.url = reverse('v1_landlord-property-list-create')
+
+    def get(self, url, client=None):
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response, len(replica_queries)
+
+    def test_safe_requests_read_from_the_replica(self):
+        response, replica_queries = self.get(self.url)
+        self.assertGreater(replica_queries, 0)
+        self.assertEqual(len(response.data), 2)
+        _, replica_queries = self.get(reverse('v1_landlord-detail', kwargs={'id': self.portfolio.landlord.pk}))
+        self.assertGreater(replica_queries, 0)
+        # Views that haven't opted in stay on the primary
+        _, replica_queries = self.get(reverse('v1_unit-list'))
+        self.assertEqual(replica_queries, 0)
+
+    def test_function_views(self):
+        tenant = APIClient()
+        tenant.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.tenant_user)['access']}")
+        _, replica_queries = self.get(reverse('v1_tenant-rentals'), client=tenant)
+        self.assertGreater(replica_queries, 0)
+        _, replica_queries = self.get(reverse('v1_landlord-maintenance-requests'))
+        self.assertGreater(replica_queries, 0)
+
+    def test_writers_read_their_writes_from_the_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            response = self.client.post(self.url, {
+                'name': 'New Court', 'type': 'Apartment', 'street': '1 New St', 'city': 'Nairobi',
+                'state': 'Nairobi', 'zip_code': '00100',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:300])
+        self.assertEqual(len(replica_queries), 0)
+        response, replica_queries = self.get(self.url)
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(len(response.data), 3)
+        # Other users aren't pinned
+        tenant = APIClient()
+        tenant.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.tenant_user)['access']}")
+        _, replica_queries = self.get(reverse('v1_tenant-rentals'), client=tenant)
+        self.assertGreater(replica_queries, 0)
+        cache.delete(replicas.pin_key(self.portfolio.landlord.pk))
+        _, replica_queries = self.get(self.url)
+        self.assertGreater(replica_queries, 0)
+
+    def test_lagging_or_unreachable_replicas_are_skipped(self):
+        with mock.patch('edoAPI.replicas.replica_lag', return_value=60) as lag:
+            _, replica_queries = self.get(self.url)
+            self.get(self.url)
+        self.assertEqual(replica_queries, 0)
+        # Sampled once per LAG_CHECK_SECONDS, not per request
+        self.assertEqual(lag.call_count, 1)
+        replicas.reset_lag_samples()
+        with mock.patch('edoAPI.replicas.replica_lag', side_effect=DatabaseError('connection refused')):
+            _, replica_queries = self.get(self.url)
+        self.assertEqual(replica_queries, 0)
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(None))
+        with replicas.reads_from(REPLICA):
+            self.assertEqual(router.db_for_read(None), REPLICA)
+            self.assertEqual(router.db_for_write(None), 'default')
+        self.assertFalse(router.allow_migrate(REPLICA, 'edoAPI'))
+        self.assertIsNone(router.allow_migrate('default', 'edoAPI'))
@@ -0,0 +1,143 @@
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.models import Role, User
+from edoAPI.tokens import tokens_for_user
+
+BEFORE_FLAGS = [('edoAPI', '0021_user_role_version')]
+AFTER_FLAGS = [('edoAPI', '0022_user_role_flags')]
+
+
+def flags(*names):
+    return sum(Role.BITS[name] for name in names)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RoleFlagTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='roles@example.com')
+
+    def test_new_users_are_regular(self):
+        self.assertEqual(self.user.role_flags, flags('regular'))
+        self.assertEqual(self.user.role_names(), ['regular'])
+
+    def test_role_changes_are_one_update_each(self):
+        with self.assertNumQueries(2):  # UPDATE, then refresh
+            self.user.add_role(Role.RoleName.TENANT)
+        self.assertEqual(self.user.role_flags, flags('tenant', 'regular'))
+        self.assertEqual(self.user.role_version, 1)
+
+        with self.assertNumQueries(2):
+            self.user.remove_role('TENANT')
+        self.assertEqual(self.user.role_names(), ['regular'])
+        self.assertEqual(self.user.role_version, 2)
+
+        with self.assertNumQueries(2):
+            self.user.set_roles(['landlord', 'regular'])
+        self.assertEqual(self.user.role_names(), ['landlord', 'regular'])
+        self.assertEqual(self.user.role_version, 3)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role_flags, flags('landlord', 'regular'))
+
+    def test_regular_is_always_kept(self):
+        self.user.set_roles(['landlord'])
+        self.assertEqual(self.user.role_names(), ['landlord', 'regular'])
+        self.user.set_roles([])
+        self.assertEqual(self.user.role_flags, flags('regular'))
+        self.user.remove_role(Role.RoleName.REGULAR)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role_flags, flags('regular'))
+
+    def test_unknown_roles_are_rejected(self):
+        for change in (self.user.add_role, self.user.remove_role, lambda name: self.user.set_roles([name])):
+            with self.assertRaises(ValueError):
+                change('superhero')
+        self.assertEqual(User.objects.get(pk=self.user.pk).role_version, 0)
+
+    def test_with_role(self):
+        landlord = User.objects.create(email='landlord@example.com', role_flags=flags('landlord'))
+        both = User.objects.create(email='both@example.com', role_flags=flags('host', 'admin'))
+        self.assertEqual(set(User.objects.with_role('landlord')), {landlord})
+        self.assertEqual(set(User.objects.with_role(Role.RoleName.ADMIN)), {both})
+        self.assertEqual(set(User.objects.with_role('regular')), {self.user, landlord, both})
+        self.assertFalse(User.objects.with_role('superhero').exists())
+
+    def test_clean_allows_one_exclusive_role(self):
+        for roles in (['regular'], ['tenant', 'regular'], ['admin', 'regular']):
+            self.user.role_flags = flags(*roles)
+            self.user.clean()
+        for roles in (['tenant', 'landlord'], ['host', 'admin', 'regular']):
+            self.user.role_flags = flags(*roles)
+            with self.assertRaises(ValidationError):
+                self.user.clean()
+
+    def test_relinquish_role_is_one_update(self):
+        self.user.add_role('host')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.user)['access']}")
+        response = client.post(reverse('v1_relinquish-role'), {'role': 'host'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        self.assertEqual(response.data['roles'], ['regular'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.role_flags, flags('regular'))
+        self.assertEqual(self.user.role_version, 2)
+
+
+class RoleFlagsMigrationTests(TransactionTestCase):
+    """0022 folds the old roles many-to-many into role_flags, and back."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_each_old_role_value(self):
+        apps = self.migrate(BEFORE_FLAGS)
+        OldRole = apps.get_model('edoAPI', 'Role')
+        OldUser = apps.get_model('edoAPI', 'User')
+        roles = {name: OldRole.objects.get_or_create(name=name)[0] for name in ['host', 'tenant', 'landlord', 'admin', 'regular']}
+        # Names were free text, so cover case variants and unknown values too
+        roles['Landlord'] = OldRole.objects.create(name='Landlord')
+        roles['superhero'] = OldRole.objects.create(name='superhero')
+        held = {
+            'host': ['host'],
+            'tenant': ['tenant'],
+            'landlord': ['landlord'],
+            'admin': ['admin'],
+            'regular': ['regular'],
+            'mixed-case': ['Landlord'],
+            'tenant-regular': ['tenant', 'regular'],
+            'unknown': ['superhero'],
+            'none': [],
+        }
+        for label, names in held.items():
+            user = OldUser.objects.create(email=label)
+            user.roles.set([roles[name] for name in names])
+
+        apps = self.migrate(AFTER_FLAGS)
+        migrated = dict(apps.get_model('edoAPI', 'User').objects.values_list('email', 'role_flags'))
+        self.assertEqual(migrated, {
+            'host': flags('host', 'regular'),
+            'tenant': flags('tenant', 'regular'),
+            'landlord': flags('landlord', 'regular'),
+            'admin': flags('admin', 'regular'),
+            'regular': flags('regular'),
+            'mixed-case': flags('landlord', 'regular'),
+            'tenant-regular': flags('tenant', 'regular'),
+            'unknown': flags('regular'),
+            'none': flags('regular'),
+        })
+
+        apps = self.migrate(BEFORE_FLAGS)
+        restored = {
+            user.email: sorted(user.roles.values_list('name', flat=True))
+            for user in apps.get_model('edoAPI', 'User').objects.all()
+        }
+        self.assertEqual(restored['landlord'], ['landlord', 'regular'])
+        self.assertEqual(restored['none'], ['regular'])
@@ -0,0 +1,88 @@
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI import search
+from edoAPI.models import ChatMessage, MaintenanceMessage
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'No full-text index on this backend')
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('find', units_per_property=1)
+        cls.other = seed_portfolio('hidden', units_per_property=1)
+        cls.landlord, cls.tenant = cls.portfolio.landlord, cls.portfolio.tenant_user
+        cls.leak = ChatMessage.objects.create(
+            sender=cls.tenant, recipient=cls.landlord, unit=cls.portfolio.unit,
+            message='The kitchen sink is leaking again, can you send a plumber?',
+        )
+        ChatMessage.objects.create(
+            sender=cls.landlord, recipient=cls.tenant, unit=cls.portfolio.unit,
+            message='Plumber booked. The plumber says the plumbing is old.',
+        )
+        # Same words in someone else's conversation and maintenance thread
+        ChatMessage.objects.create(sender=cls.other.tenant_user, recipient=cls.other.landlord, message='leaking sink plumber')
+        MaintenanceMessage.objects.create(maintenance=cls.other.maintenance, sender=cls.other.landlord, message='plumber visit')
+        cls.visit = MaintenanceMessage.objects.create(
+            maintenance=cls.portfolio.maintenance, sender=cls.landlord, message='Plumber visit <b>Tuesday</b>',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.landlord)['access']}")
+        self.url = reverse('v1_search-messages')
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return response.data['results']
+
+    def test_ranked_highlighted_and_scoped(self):
+        results = self.search(q='plumber')
+        self.assertLessEqual({('chat', self.leak.pk), ('maintenance', self.visit.pk)}, {(r['type'], r['id']) for r in results})
+        # Only the caller's own threads
+        self.assertEqual(len(results), 3)
+        ranks = [r['rank'] for r in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        leak = next(r for r in results if r['id'] == self.leak.pk and r['type'] == 'chat')
+        self.assertEqual(leak['thread'], self.leak.conversation_id)
+        self.assertIn('<mark>plumber</mark>', leak['snippet'])
+        # Message text is escaped; only the highlight is markup
+        visit = next(r for r in results if r['type'] == 'maintenance')
+        self.assertIn('&lt;b&gt;Tuesday&lt;/b&gt;', visit['snippet'])
+
+    def test_all_terms_stemming_and_prefix(self):
+        results = self.search(q='leaks sink', type='chat')
+        self.assertEqual([r['id'] for r in results], [self.leak.pk])
+        self.assertEqual(len(self.search(q='plumb', type='chat')), 2)
+        self.assertEqual(self.search(q='"unbalanced OR (', type='chat'), [])
+
+    def test_index_follows_writes(self):
+        self.leak.message = 'Sorted, thanks'
+        self.leak.save()
+        self.assertNotIn(self.leak.pk, [r['id'] for r in self.search(q='leaking', type='chat')])
+        self.assertEqual([r['id'] for r in self.search(q='sorted', type='chat')], [self.leak.pk])
+
+        bulk = ChatMessage.objects.bulk_create([ChatMessage(sender=self.tenant, recipient=self.landlord, message='Boiler is broken')])
+        self.assertEqual([r['id'] for r in self.search(q='boiler')], [bulk[0].pk])
+        ChatMessage.objects.filter(pk=bulk[0].pk)._raw_delete(connection.alias)
+        self.assertEqual(self.search(q='boiler'), [])
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', '--recreate', stdout=out)
+        self.assertIn('rebuilt', out.getvalue())
+        self.assertEqual(len(self.search(q='plumber')), 3)
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'a'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'plumber', 'type': 'notices'}).status_code, 400)
+
+    def test_fallback_marks_terms(self):
+        self.assertEqual(search.render_snippet('Call the Plumber', ['plumber']), 'Call the <mark>Plumber</mark>')
@@ -0,0 +1,125 @@
+from unittest import mock, skipUnless
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI.bulk_tenants import TenantBulkImport
+from edoAPI.models import Tenant, TenantInvitation
+from edoAPI.sqlite import DEFAULTS, configure_connection, retry_on_locked
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+PROFILE = {**DEFAULTS, 'ENABLED': True, 'BACKOFF': 0}
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class SQLiteProfileTests(TransactionTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PROFILE=PROFILE)
+    def test_pragmas_applied_to_new_connections(self):
+        configure_connection(sender=None, connection=connection)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -65536)
+
+    def test_disabled_by_default(self):
+        calls = []
+
+        @retry_on_locked
+        def view():
+            calls.append(connection.in_atomic_block)
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            view()
+        self.assertEqual(calls, [False])
+
+    @override_settings(SQLITE_PROFILE=PROFILE)
+    def test_retries_locked_writes_in_a_transaction(self):
+        calls = []
+
+        @retry_on_locked
+        def view():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        with mock.patch('edoAPI.sqlite.time.sleep') as sleep:
+            self.assertEqual(view(), 'done')
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(sleep.call_count, 2)
+
+    @override_settings(SQLITE_PROFILE=PROFILE)
+    def test_gives_up_and_leaves_other_errors_alone(self):
+        @retry_on_locked
+        def locked():
+            raise OperationalError('database is locked')
+
+        @retry_on_locked
+        def broken():
+            raise OperationalError('no such table: missing')
+
+        with mock.patch('edoAPI.sqlite.time.sleep') as sleep:
+            with self.assertRaises(OperationalError):
+                locked()
+            self.assertEqual(sleep.call_count, PROFILE['RETRIES'])
+            with self.assertRaises(OperationalError):
+                broken()
+            self.assertEqual(sleep.call_count, PROFILE['RETRIES'])
+        # Inside a transaction the outer caller owns the retry
+        with transaction.atomic(), self.assertRaises(OperationalError), mock.patch('edoAPI.sqlite.time.sleep') as sleep:
+            locked()
+        sleep.assert_not_called()
+
+
+def locked_once(method):
+    """A side_effect raising 'database is locked' on the first call, then calling method."""
+    calls = []
+
+    def side_effect(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError('database is locked')
+        return method(*args, **kwargs)
+    return side_effect
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+@override_settings(SQLITE_PROFILE=PROFILE, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LockedWriteViewTests(TransactionTestCase):
+    def setUp(self):
+        self.portfolio = seed_portfolio('locked', properties=1, units_per_property=1)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.portfolio.landlord)['access']}")
+        self.unit = self.portfolio.vacant_unit
+
+    def test_streamed_csv_import_survives_a_locked_attempt(self):
+        body = (
+            'unit_id,property_id,email,first_name,last_name,phone,start_date\n'
+            f'{self.unit.unit_id},{self.unit.property_id},csv-retry@example.com,Cee,Retry,0700000000,2026-01-01\n'
+        ).encode()
+        create = TenantBulkImport.create_tenancies
+        with mock.patch.object(TenantBulkImport, 'create_tenancies', autospec=True, side_effect=locked_once(create)) as patched, \
+                mock.patch('edoAPI.sqlite.time.sleep'):
+            response = self.client.post(f"{reverse('v1_bulk-import-tenants')}?mode=import", body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Tenant.objects.filter(unit=self.unit).count(), 1)
+
+    def test_broad_exception_handlers_let_the_retry_happen(self):
+        from edoAPI import views
+        queue = views.queue_tenant_invitation_email
+        with mock.patch.object(views, 'queue_tenant_invitation_email', side_effect=locked_once(queue)), \
+                mock.patch('edoAPI.sqlite.time.sleep') as sleep:
+            response = self.client.post(reverse('v1_create-tenant-invitation'), {
+                'unitNumber': self.unit.unit_id, 'propertyId': self.unit.property_id, 'email': 'retry@example.com',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(TenantInvitation.objects.filter(email='retry@example.com').count(), 1)
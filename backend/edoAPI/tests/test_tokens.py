@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from edoAPI.models import Role
+from edoAPI.tokens import ROLE_VERSION_CLAIM, ROLES_CLAIM, request_has_role, tokens_for_user
+from .portfolio import seed_portfolio
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RoleClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('claims', properties=1, units_per_property=1)
+
+    def client_for(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def request_for(self, user, access):
+        return SimpleNamespace(user=user, auth=AccessToken(access))
+
+    def test_claims_are_stamped(self):
+        landlord = self.portfolio.landlord
+        access = AccessToken(tokens_for_user(landlord)['access'])
+        self.assertEqual(access[ROLES_CLAIM], sorted(landlord.role_names()))
+        self.assertEqual(access[ROLE_VERSION_CLAIM], landlord.role_version)
+
+    def test_stale_claims_are_not_trusted(self):
+        landlord = self.portfolio.landlord
+        access = tokens_for_user(landlord)['access']
+        url = reverse('v1_landlord-dashboard')
+        self.assertEqual(self.client_for(access).get(url).status_code, 200)
+        # The token still claims the landlord role, but its role version is old
+        landlord.remove_role(Role.RoleName.LANDLORD)
+        self.assertEqual(self.client_for(access).get(url).status_code, 403)
+
+    def test_stale_claims_fall_back_to_the_database(self):
+        user = self.portfolio.regular
+        access = tokens_for_user(user)['access']
+        self.assertFalse(request_has_role(self.request_for(user, access), 'landlord'))
+        user.add_role(Role.RoleName.LANDLORD)
+        self.assertTrue(request_has_role(self.request_for(user, access), 'landlord'))
+        self.assertEqual(self.client_for(access).get(reverse('v1_landlord-dashboard')).status_code, 200)
+
+    def test_current_claims_skip_the_role_flags(self):
+        user = self.portfolio.landlord
+        request = self.request_for(user, tokens_for_user(user)['access'])
+        with mock.patch.object(type(user), 'has_role', side_effect=AssertionError('role flags read')):
+            self.assertTrue(request_has_role(request, 'landlord'))
+            self.assertFalse(request_has_role(request, 'host'))
+
+    def test_refresh_restamps_changed_roles(self):
+        user = self.portfolio.regular
+        refresh = tokens_for_user(user)['refresh']
+        user.add_role(Role.RoleName.HOST)
+        response = APIClient().post(reverse('v1_token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        for token in (AccessToken(response.data['access']), RefreshToken(response.data['refresh'])):
+            self.assertEqual(token[ROLES_CLAIM], ['host', 'regular'])
+            self.assertEqual(token[ROLE_VERSION_CLAIM], user.role_version)
+        self.assertTrue(request_has_role(self.request_for(user, response.data['access']), 'host'))
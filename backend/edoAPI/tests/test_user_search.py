@@ -0,0 +1,106 @@
+import datetime
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from edoAPI import contacts
+from edoAPI.models import LandlordContact, Tenant, TenantInvitation, Unit, User
+from edoAPI.tokens import tokens_for_user
+from .portfolio import seed_portfolio
+
+
+class UserSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.portfolio = seed_portfolio('lookup', units_per_property=1)
+        cls.other = seed_portfolio('elsewhere', units_per_property=1)
+        cls.landlord = cls.portfolio.landlord
+        cls.grace = User.objects.create(email='Grace.Wanjiru@example.com', first_name='Grace', last_name='Wanjiru')
+        unit = Unit.objects.create(property=cls.portfolio.property, unit_id='9-001', rent_amount=1000)
+        Tenant.objects.create(
+            user=cls.grace, unit=unit, first_name='Grace', last_name='Wanjiru', email=cls.grace.email,
+            phone='0711111111', start_date=datetime.date(2026, 1, 1),
+        )
+        TenantInvitation.objects.create(
+            landlord=cls.landlord, unit=cls.portfolio.vacant_unit, email='gracious.host@example.com',
+            expires_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        TenantInvitation.objects.create(
+            landlord=cls.landlord, unit=cls.portfolio.vacant_unit, email='mike.grace@example.com',
+            expires_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        # An account with a matching name that isn't one of the landlord's contacts
+        User.objects.create(email='grace.stranger@example.com', first_name='Grace', last_name='Stranger')
+
+    def setUp(self):
+        contacts.clear_indexes()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.landlord)['access']}")
+        self.url = reverse('v1_search-users-by-email')
+
+    def tearDown(self):
+        contacts.clear_indexes()
+
+    def suggest(self, q):
+        response = self.client.get(self.url, {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [(s['email'], s['match']) for s in response.data['suggestions']]
+
+    def test_ranks_exact_prefix_name_then_substring(self):
+        self.assertEqual(self.suggest('GRAC'), [
+            ('Grace.Wanjiru@example.com', 'prefix'),
+            ('gracious.host@example.com', 'prefix'),
+            ('mike.grace@example.com', 'substring'),
+        ])
+        self.assertEqual(self.suggest('wanj'), [('Grace.Wanjiru@example.com', 'name')])
+        self.assertEqual(self.suggest('grace wan'), [('Grace.Wanjiru@example.com', 'name')])
+        self.assertEqual(self.suggest('grace.wanjiru@example.com')[0], ('Grace.Wanjiru@example.com', 'exact'))
+
+    def test_scoped_to_the_landlords_contacts(self):
+        emails = {email for email, _ in self.suggest('gr')}
+        self.assertNotIn('grace.stranger@example.com', emails)
+        self.assertFalse(any(email.startswith('elsewhere') for email, _ in self.suggest('elsewhere')))
+        # Other accounts are only found by their exact address
+        response = self.client.get(self.url, {'q': 'Grace.Stranger@example.com'})
+        [stranger] = response.data['suggestions']
+        self.assertEqual((stranger['id'], stranger['type'], stranger['match']), (User.objects.get(email='grace.stranger@example.com').pk, 'user', 'exact'))
+
+    def test_suggestion_shape(self):
+        response = self.client.get(self.url, {'q': 'gra'})
+        by_email = {s['email']: s for s in response.data['suggestions']}
+        self.assertEqual(by_email['Grace.Wanjiru@example.com']['id'], self.grace.pk)
+        self.assertEqual(by_email['Grace.Wanjiru@example.com']['type'], 'user')
+        self.assertEqual(by_email['Grace.Wanjiru@example.com']['phone'], '0711111111')
+        self.assertEqual(by_email['gracious.host@example.com']['type'], 'invitee')
+        self.assertIsNone(by_email['gracious.host@example.com']['id'])
+
+    def test_index_and_database_agree(self):
+        index = contacts.get_index(self.landlord.pk)
+        for query in ('g', 'grace', 'lookup-tenant', 'wanjiru', 'race', 'example.com', 'zzz'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [(c['email'], c['rank']) for c in index.search(query)],
+                    [(c['email'], c['rank']) for c in contacts.search_contacts_db(self.landlord.pk, query)],
+                )
+
+    def test_index_is_cached_and_invalidated_by_new_contacts(self):
+        self.suggest('gr')
+        with self.assertNumQueries(1):  # authentication only
+            self.suggest('gra')
+        TenantInvitation.objects.create(
+            landlord=self.landlord, unit=self.portfolio.vacant_unit, email='granite.new@example.com',
+            expires_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertIn(('granite.new@example.com', 'prefix'), self.suggest('gra'))
+
+    def test_invitation_doesnt_overwrite_a_tenant_contact(self):
+        TenantInvitation.objects.create(
+            landlord=self.landlord, unit=self.portfolio.vacant_unit, email='GRACE.wanjiru@example.com',
+            expires_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        contact = LandlordContact.objects.get(landlord=self.landlord, email_key='grace.wanjiru@example.com')
+        self.assertEqual((contact.kind, contact.user_id, contact.last_name), ('tenant', self.grace.pk, 'Wanjiru'))
+
+    @override_settings(CONTACT_INDEX={'MAX_CONTACTS': 2})
+    def test_large_contact_lists_are_searched_in_the_database(self):
+        self.assertIsNone(contacts.get_index(self.landlord.pk))
+        self.assertEqual(self.suggest('wanj'), [('Grace.Wanjiru@example.com', 'name')])
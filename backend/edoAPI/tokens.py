@@ -0,0 +1,62 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Custom JWT claims carrying the user's roles, so permission checks can be
+# answered from the access token alone
+ROLES_CLAIM = 'roles'
+ROLE_VERSION_CLAIM = 'role_version'
+
+
+def add_role_claims(token, user):
+    """Stamp the user's current role names and role version onto a token."""
+    token[ROLES_CLAIM] = sorted(user.role_names())
+    token[ROLE_VERSION_CLAIM] = user.role_version
+    return token
+
+
+def tokens_for_user(user):
+    """
+    Issue a refresh/access token pair carrying role claims.
+    Returns the dict shape used by the login and registration responses.
+    """
+    refresh = add_role_claims(RefreshToken.for_user(user), user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+def get_claimed_roles(request):
+    """
+    Return the role names claimed by the request's access token, or None when
+    the token carries no role claims or they are stale.
+
+    JWTAuthentication already loads the user row to authenticate the request,
+    so comparing the token's role version against it costs no extra query.
+    """
+    token = getattr(request, 'auth', None)
+    user = getattr(request, 'user', None)
+    if token is None or user is None or not user.is_authenticated:
+        return None
+    try:
+        roles = token[ROLES_CLAIM]
+        version = token[ROLE_VERSION_CLAIM]
+    except (KeyError, TypeError):
+        return None
+    if version != getattr(user, 'role_version', None):
+        return None
+    return frozenset(roles)
+
+
+def request_has_role(request, role_name):
+    """
+    Check whether the requesting user holds a role, trusting the token's role
+    claims when they are current and falling back to the user's role flags
+    otherwise.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    roles = get_claimed_roles(request)
+    if roles is not None:
+        return role_name in roles
+    return user.has_role(role_name)
@@ -6,7 +6,7 @@ from rest_framework_simplejwt.views import (
     TokenBlacklistView,
 )
 from rest_framework.routers import DefaultRouter
-from .views import UserListView, UserDetailView, UserRegistrationView, UserLoginView, UserProfileView, LandlordPropertyListCreateView, LandlordPropertyDetailView, LandlordPropertyUnitsView, become_landlord, become_tenant, become_host, OnboardRoleView, relinquish_role, UnitViewSet, TenantViewSet, TenantInvitationViewSet, LandlordMaintenanceViewSet, NoticeViewSet, ChatMessageViewSet, create_tenant_invitation, accept_invitation, search_users_by_email, tenant_rentals, check_user_by_email, tenant_maintenance_requests, create_tenant_maintenance_request, landlord_maintenance_requests, LandlordListView, LandlordDetailView, VacateRequestViewSet
+from .views import UserListView, UserDetailView, UserRegistrationView, UserLoginView, UserProfileView, LandlordPropertyListCreateView, LandlordPropertyDetailView, LandlordPropertyUnitsView, become_landlord, become_tenant, become_host, OnboardRoleView, relinquish_role, UnitViewSet, TenantViewSet, TenantInvitationViewSet, LandlordMaintenanceViewSet, NoticeViewSet, ChatMessageViewSet, ConversationViewSet, create_tenant_invitation, bulk_import_tenants, accept_invitation, search_users_by_email, search_messages, tenant_rentals, check_user_by_email, tenant_maintenance_requests, create_tenant_maintenance_request, landlord_maintenance_requests, landlord_dashboard, LandlordListView, LandlordDetailView, VacateRequestViewSet
 
 # API v1 Router configuration
 v1_router = DefaultRouter()
@@ -16,6 +16,7 @@ v1_router.register(r'tenant-invitations', TenantInvitationViewSet, basename='v1_
 v1_router.register(r'landlord-maintenance', LandlordMaintenanceViewSet, basename='v1_landlord-maintenance')
 v1_router.register(r'notices', NoticeViewSet, basename='v1_notice')
 v1_router.register(r'chat-messages', ChatMessageViewSet, basename='v1_chat-message')
+v1_router.register(r'conversations', ConversationViewSet, basename='v1_conversation')
 v1_router.register(r'vacate-requests', VacateRequestViewSet, basename='v1_vacate-request')
 
 # API v1 URL patterns
@@ -45,8 +46,10 @@ v1_urlpatterns = [
     
     # Tenant invitation endpoints
     path('tenants/invite/', create_tenant_invitation, name='v1_create-tenant-invitation'),
+    path('tenants/bulk-import/', bulk_import_tenants, name='v1_bulk-import-tenants'),
     path('tenants/accept-invitation/<str:invitation_code>/', accept_invitation, name='v1_accept-invitation'),
     path('users/search-email/', search_users_by_email, name='v1_search-users-by-email'),
+    path('messages/search/', search_messages, name='v1_search-messages'),
     
     # Tenant rental properties endpoint
     path('tenant/rentals/', tenant_rentals, name='v1_tenant-rentals'),
@@ -57,6 +60,9 @@ v1_urlpatterns = [
     path('tenant/maintenance/', tenant_maintenance_requests, name='v1_tenant-maintenance-requests'),
     path('tenant/maintenance/create/', create_tenant_maintenance_request, name='v1_create-tenant-maintenance-request'),
     path('landlord/maintenance/', landlord_maintenance_requests, name='v1_landlord-maintenance-requests'),
+
+    # Landlord dashboard summary
+    path('landlord/dashboard/', landlord_dashboard, name='v1_landlord-dashboard'),
 ] + v1_router.urls
 
 # Main URL patterns with versioning structure
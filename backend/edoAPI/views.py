@@ -3,87 +3,41 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions, viewsets
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import tokens_for_user, request_has_role
+from .query_plans import QueryPlanMixin, with_query_plan
+from .pagination import KeysetPagination, paginate
+from .archive import ReadThroughKeysetPagination
+from .emails import queue_tenant_invitation_email
+from .search import find_messages, INDEXED_MODELS as SEARCHABLE_MESSAGES
+from .contacts import search_contacts, MATCH_NAMES as CONTACT_MATCHES
+from .sqlite import is_locked, retry_on_locked, RetryOnLockedMixin
+from .replicas import read_from_replica, ReplicaReadMixin
+from .conditional import ConditionalGetMixin
+from .response_cache import bump_generation, cached_per_landlord, LandlordCachedListMixin
+from .dashboard import landlord_dashboard as build_landlord_dashboard
+from .bulk_tenants import TenantBulkImport, CSVRowParser, NDJSONRowParser, read_rows
 from django.contrib.auth import authenticate
-from .models import User, LandlordProperty, Role, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage, TenantInvitation, VacateRequest
-from .serializers import UserSerializer, UserRegistrationSerializer, UserLoginSerializer, LandlordPropertySerializer, UnitSerializer, TenantSerializer, PaymentSerializer, NoticeSerializer, LandlordMaintenanceSerializer, MaintenanceMessageSerializer, ChatMessageSerializer, TenantInvitationSerializer, LandlordListSerializer, LandlordDetailSerializer, VacateRequestSerializer
-from rest_framework.decorators import api_view, permission_classes, action
-from django.db import models
+from .models import User, LandlordProperty, Role, Unit, Tenant, Payment, Notice, LandlordMaintenance, MaintenanceMessage, ChatMessage, ArchivedChatMessage, Conversation, ConversationParticipant, TenantInvitation, VacateRequest
+from .serializers import UserSerializer, UserRegistrationSerializer, UserLoginSerializer, LandlordPropertySerializer, UnitSerializer, TenantSerializer, PaymentSerializer, NoticeSerializer, LandlordMaintenanceSerializer, MaintenanceMessageSerializer, ChatMessageSerializer, ChatMessageRangeSerializer, ConversationSerializer, TenantInvitationSerializer, LandlordListSerializer, LandlordDetailSerializer, LandlordDetailSummarySerializer, LandlordPropertySummarySerializer, VacateRequestSerializer, UnitBulkItemSerializer, UnitRangeSerializer
+from rest_framework.decorators import api_view, permission_classes, parser_classes, action
+from rest_framework.parsers import JSONParser, MultiPartParser
+from django.db import models, transaction, IntegrityError
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from django.db.models import Count
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
 from datetime import timedelta
 
-def send_tenant_invitation_email(invitation):
-    """
-    Send invitation email to tenant with both account creation and quick approval options
-    """
-    subject = f"Tenant Invitation - {invitation.unit.property.name} Unit {invitation.unit.unit_id}"
-    
-    # Create invitation URLs
-    base_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
-    create_account_url = f"{base_url}/accept-invitation/{invitation.invitation_code}?action=create_account"
-    quick_approve_url = f"{base_url}/accept-invitation/{invitation.invitation_code}?action=approve"
-    
-    message = f"""
-Hello,
-
-You have been invited to become a tenant at {invitation.unit.property.name} Unit {invitation.unit.unit_id}.
-
-Property Details:
-- Property: {invitation.unit.property.name}
-- Unit: {invitation.unit.unit_id}
-- Monthly Rent: ${invitation.unit.rent_amount}
-- Landlord: {invitation.landlord.get_full_name()}
-
-You have two options to accept this invitation:
-
-1. CREATE ACCOUNT (Recommended):
-   - Access the full tenant portal
-   - Submit maintenance requests
-   - Pay rent online
-   - Message your landlord
-   - View your rental information
-   
-   Click here: {create_account_url}
-
-2. QUICK APPROVE:
-   - Simple approval without creating an account
-   - Basic tenant record created
-   - No platform access required
-   
-   Click here: {quick_approve_url}
-
-{f"Personal Message from your landlord: {invitation.message}" if invitation.message else ""}
-
-This invitation expires on {invitation.expires_at.strftime('%B %d, %Y')}.
-
-If you have any questions, please contact your landlord.
-
-Best regards,
-The Edo Real Estate Team
-    """
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[invitation.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending invitation email: {e}")
-        return False
-
-class UserListView(ListAPIView):
+class UserListView(QueryPlanMixin, ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = KeysetPagination
 
-class UserDetailView(RetrieveUpdateAPIView):
+class UserDetailView(RetryOnLockedMixin, RetrieveUpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -93,7 +47,7 @@ class UserDetailView(RetrieveUpdateAPIView):
         context['request'] = self.request
         return context
 
-class UserProfileView(RetrieveUpdateAPIView):
+class UserProfileView(RetryOnLockedMixin, RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
     
@@ -105,6 +59,7 @@ class UserProfileView(RetrieveUpdateAPIView):
         context['request'] = self.request
         return context
 
+    @retry_on_locked
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -116,11 +71,12 @@ class UserProfileView(RetrieveUpdateAPIView):
         self.perform_update(serializer)
         return Response(serializer.data)
 
-class UserRegistrationView(CreateAPIView):
+class UserRegistrationView(RetryOnLockedMixin, CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
 
+    @retry_on_locked
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
@@ -128,19 +84,19 @@ class UserRegistrationView(CreateAPIView):
                 user = serializer.save()
                 
                 # Generate tokens
-                refresh = RefreshToken.for_user(user)
+                tokens = tokens_for_user(user)
                 
                 return Response({
                     'message': 'User registered successfully',
                     'user': UserSerializer(user, context={'request': request}).data,
-                    'tokens': {
-                        'access': str(refresh.access_token),
-                        'refresh': str(refresh),
-                    }
+                    'tokens': tokens
                 }, status=status.HTTP_201_CREATED)
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
+            if is_locked(e):
+                # Let retry_on_locked run the view again
+                raise
             print(f"Registration error: {e}")
             return Response({
                 'error': str(e)
@@ -156,15 +112,12 @@ class UserLoginView(APIView):
                 user = serializer.validated_data['user']
                 
                 # Generate tokens
-                refresh = RefreshToken.for_user(user)
+                tokens = tokens_for_user(user)
                 
                 return Response({
                     'message': 'Login successful',
                     'user': UserSerializer(user, context={'request': request}).data,
-                    'tokens': {
-                        'access': str(refresh.access_token),
-                        'refresh': str(refresh),
-                    }
+                    'tokens': tokens
                 }, status=status.HTTP_200_OK)
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -176,25 +129,31 @@ class UserLoginView(APIView):
 
 class IsLandlord(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='landlord').exists()
+        return request_has_role(request, 'landlord')
 
     def has_object_permission(self, request, view, obj):
         # For Tenant objects, we need to check if the landlord of the property matches the request user
         if hasattr(obj, 'unit') and hasattr(obj.unit, 'property'):
-            return obj.unit.property.landlord == request.user
+            return obj.unit.property.landlord_id == request.user.id
         # For other objects that have a direct landlord attribute
-        elif hasattr(obj, 'landlord'):
-            return obj.landlord == request.user
+        elif hasattr(obj, 'landlord_id'):
+            return obj.landlord_id == request.user.id
         # Default to False if we can't determine the relationship
         return False
 
 class IsHost(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='host').exists()
+        return request_has_role(request, 'host')
 
 class IsTenant(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='tenant').exists()
+        return request_has_role(request, 'tenant')
+
+class IsLandlordOrReadOnly(permissions.BasePermission):
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return request.user.is_authenticated
+        return request_has_role(request, 'landlord')
 
 class HasRolePermission(permissions.BasePermission):
     """
@@ -205,11 +164,12 @@ class HasRolePermission(permissions.BasePermission):
         required_role = getattr(view, 'required_role', None)
         if not request.user.is_authenticated or not required_role:
             return False
-        return request.user.has_role(required_role)
+        return request_has_role(request, required_role)
 
 class OnboardRoleView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @retry_on_locked
     def post(self, request):
         """
         Add a role to the authenticated user. Expects {"role": "role_name"} in POST data.
@@ -218,17 +178,28 @@ class OnboardRoleView(APIView):
         role_name = request.data.get('role')
         if not role_name:
             return Response({'error': 'Role name is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            role = Role.objects.get(name=role_name)
-        except Role.DoesNotExist:
+        if not Role.bit(role_name):
             return Response({'error': f'Role "{role_name}" does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-        user.roles.add(role)
-        user.save()
-        return Response({'message': f'User is now a {role_name}', 'roles': list(user.roles.values_list('name', flat=True))})
+        user.add_role(role_name)
+        return Response({'message': f'User is now a {role_name}', 'roles': user.role_names(), 'tokens': tokens_for_user(user)})
+
+class PropertySummaryMixin:
+    """
+    GET ?summary=true serializes with summary_serializer_class: occupancy
+    and rent figures without the nested units.
+    """
+    summary_serializer_class = None
 
-class LandlordPropertyListCreateView(generics.ListCreateAPIView):
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and query_flag(self.request, 'summary'):
+            return self.summary_serializer_class
+        return super().get_serializer_class()
+
+class LandlordPropertyListCreateView(PropertySummaryMixin, ReplicaReadMixin, ConditionalGetMixin, LandlordCachedListMixin, RetryOnLockedMixin, QueryPlanMixin, generics.ListCreateAPIView):
     serializer_class = LandlordPropertySerializer
+    summary_serializer_class = LandlordPropertySummarySerializer
     permission_classes = [IsLandlord]
+    cache_endpoint = 'properties'
 
     def get_queryset(self):
         # Landlords can only see their own properties
@@ -238,8 +209,9 @@ class LandlordPropertyListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(landlord=self.request.user)
 
-class LandlordPropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
+class LandlordPropertyDetailView(PropertySummaryMixin, ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = LandlordPropertySerializer
+    summary_serializer_class = LandlordPropertySummarySerializer
     permission_classes = [IsLandlord]
     lookup_field = 'id'
 
@@ -248,33 +220,31 @@ class LandlordPropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@retry_on_locked
 def become_landlord(request):
     user = request.user
-    landlord_role, _ = Role.objects.get_or_create(name='landlord')
-    user.roles.add(landlord_role)
-    user.save()
-    return Response({'message': 'User is now a landlord', 'roles': list(user.roles.values_list('name', flat=True))})
+    user.add_role(Role.RoleName.LANDLORD)
+    return Response({'message': 'User is now a landlord', 'roles': user.role_names(), 'tokens': tokens_for_user(user)})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@retry_on_locked
 def become_tenant(request):
     user = request.user
-    tenant_role, _ = Role.objects.get_or_create(name='tenant')
-    user.roles.add(tenant_role)
-    user.save()
-    return Response({'message': 'User is now a tenant', 'roles': list(user.roles.values_list('name', flat=True))})
+    user.add_role(Role.RoleName.TENANT)
+    return Response({'message': 'User is now a tenant', 'roles': user.role_names(), 'tokens': tokens_for_user(user)})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@retry_on_locked
 def become_host(request):
     user = request.user
-    host_role, _ = Role.objects.get_or_create(name='host')
-    user.roles.add(host_role)
-    user.save()
-    return Response({'message': 'User is now a host', 'roles': list(user.roles.values_list('name', flat=True))})
+    user.add_role(Role.RoleName.HOST)
+    return Response({'message': 'User is now a host', 'roles': user.role_names(), 'tokens': tokens_for_user(user)})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@retry_on_locked
 def relinquish_role(request):
     """
     Allow a user to relinquish a specific exclusive role (host, landlord, tenant).
@@ -287,27 +257,18 @@ def relinquish_role(request):
     role_name = role_name.strip().lower()  # Normalize input
     if role_name not in ['host', 'tenant', 'landlord']:
         return Response({'error': 'Invalid or non-relinquishable role.'}, status=status.HTTP_400_BAD_REQUEST)
-    try:
-        role = Role.objects.get(name__iexact=role_name)  # Case-insensitive lookup
-    except Role.DoesNotExist:
-        return Response({'error': f'Role "{role_name}" does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-    if not user.roles.filter(name__iexact=role_name).exists():
+    if not user.has_role(role_name):
         return Response({'error': f'User does not have the role "{role_name}".'}, status=status.HTTP_400_BAD_REQUEST)
-    # Remove the role
-    user.roles.remove(role)
-    # If user has no other exclusive role, assign 'regular'
-    exclusive_roles = ['host', 'tenant', 'landlord', 'admin']
-    if not user.roles.filter(name__in=exclusive_roles).exists():
-        regular_role, _ = Role.objects.get_or_create(name='regular')
-        user.roles.set([regular_role])
-    user.save()
-    return Response({'message': f'Role "{role_name}" relinquished. You are now a regular user.', 'roles': list(user.roles.values_list('name', flat=True))}, status=status.HTTP_200_OK)
-
-class LandlordPropertyViewSet(viewsets.ModelViewSet):
+    # Remove the role; 'regular' stays, so a user with no other exclusive
+    # role is left a regular user. One UPDATE and one role_version bump
+    user.remove_role(role_name)
+    return Response({'message': f'Role "{role_name}" relinquished. You are now a regular user.', 'roles': user.role_names(), 'tokens': tokens_for_user(user)}, status=status.HTTP_200_OK)
+
+class LandlordPropertyViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = LandlordProperty.objects.all()
     serializer_class = LandlordPropertySerializer
 
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = UnitSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -316,25 +277,188 @@ class UnitViewSet(viewsets.ModelViewSet):
         return Unit.objects.filter(property__landlord=self.request.user)
 
     def perform_create(self, serializer):
-        # Ensure the property belongs to the requesting user
-        property_id = self.request.data.get('property')
-        if property_id:
-            try:
-                property_obj = LandlordProperty.objects.get(
-                    id=property_id, 
-                    landlord=self.request.user
-                )
-                serializer.save(property=property_obj)
-            except LandlordProperty.DoesNotExist:
-                raise serializers.ValidationError(
-                    "Property not found or you don't have permission to add units to this property."
-                )
-        else:
+        # Ensure the property belongs to the requesting user; the serializer
+        # has already loaded it, so no second lookup is needed
+        property_obj = serializer.validated_data.get('property')
+        if property_obj is None:
             raise serializers.ValidationError("Property ID is required.")
+        if property_obj.landlord_id != self.request.user.id:
+            raise serializers.ValidationError(
+                "Property not found or you don't have permission to add units to this property."
+            )
+        serializer.save()
+
+    def get_owned_property(self, property_id):
+        try:
+            return LandlordProperty.objects.filter(pk=int(property_id), landlord=self.request.user).first()
+        except (TypeError, ValueError):
+            return None
 
-class TenantViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='bulk-create', url_name='bulk-create')
+    @retry_on_locked
+    def bulk_create_units(self, request):
+        """
+        Create many units in one property:
+        {"property": 1, "defaults": {...unit fields},
+         "units": [{"unit_id": "PH1", ...}],
+         "ranges": [{"floor_start": 1, "floor_end": 10, "number_start": 1, "number_end": 30,
+                     "pattern": "{floor}{number:02d}", ...unit fields}]}
+        Rows are validated in memory and written with bulk_create; nothing is
+        created unless every row is valid.
+        """
+        property_obj = self.get_owned_property(request.data.get('property'))
+        if property_obj is None:
+            return Response({
+                'error': "Property not found or you don't have permission to add units to this property."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        defaults = request.data.get('defaults') or {}
+        units = request.data.get('units') or []
+        ranges = request.data.get('ranges') or []
+        if not isinstance(defaults, dict) or not isinstance(units, list) or not isinstance(ranges, list):
+            return Response({'error': '"defaults" must be an object; "units" and "ranges" must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = [{**defaults, **unit} for unit in units if isinstance(unit, dict)]
+        range_errors = []
+        for spec in ranges:
+            spec = spec if isinstance(spec, dict) else {}
+            range_serializer = UnitRangeSerializer(data=spec)
+            if not range_serializer.is_valid():
+                range_errors.append(range_serializer.errors)
+                continue
+            range_errors.append({})
+            extra = {key: value for key, value in spec.items() if key not in UnitRangeSerializer.RANGE_FIELDS}
+            rows.extend({**defaults, **extra, 'unit_id': unit_id, 'floor': floor} for unit_id, floor in range_serializer.generate())
+        if any(range_errors):
+            return Response({'ranges': range_errors}, status=status.HTTP_400_BAD_REQUEST)
+        if not rows:
+            return Response({'error': 'No units provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > UnitRangeSerializer.MAX_UNITS:
+            return Response({'error': f'At most {UnitRangeSerializer.MAX_UNITS} units can be created per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = UnitBulkItemSerializer(data=rows, many=True)
+        items.is_valid()
+        row_errors = [dict(error) for error in items.errors] if items.errors else [{} for _ in rows]
+        # (property, unit_id) uniqueness: within the request, then one query
+        # against the units already in the property
+        seen = {}
+        for index, row in enumerate(rows):
+            unit_id = str(row.get('unit_id', ''))
+            if unit_id in seen:
+                row_errors[index].setdefault('unit_id', []).append(f'Duplicate of row {seen[unit_id] + 1}.')
+            seen.setdefault(unit_id, index)
+        existing = set(Unit.objects.filter(property=property_obj, unit_id__in=list(seen)).values_list('unit_id', flat=True))
+        for index, row in enumerate(rows):
+            if str(row.get('unit_id', '')) in existing:
+                row_errors[index].setdefault('unit_id', []).append('A unit with this ID already exists in the property.')
+        if any(row_errors):
+            return Response({'errors': [
+                {'row': index + 1, 'unit_id': row.get('unit_id'), 'errors': errors}
+                for index, (row, errors) in enumerate(zip(rows, row_errors)) if errors
+            ]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                created = Unit.objects.bulk_create(
+                    [Unit(property=property_obj, **data) for data in items.validated_data], batch_size=500,
+                )
+                # bulk_create doesn't send post_save
+                bump_generation(property_obj.landlord_id)
+        except IntegrityError:
+            # Another request added one of these unit IDs after validation
+            return Response({'error': 'Units changed during the request; please retry'}, status=status.HTTP_409_CONFLICT)
+        return Response(UnitSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    BULK_UPDATE_FILTERS = {'property': 'property_id', 'floor': 'floor', 'status': 'status', 'ids': 'pk__in', 'unit_ids': 'unit_id__in'}
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk-update', url_name='bulk-update')
+    @retry_on_locked
+    def bulk_update_units(self, request):
+        """
+        Partially update many of the requesting landlord's units, either with
+        the same changes for every unit matching a filter (one UPDATE):
+            {"filter": {"property": 1, "floor": "3"}, "changes": {"rent_amount": "1300.00"}}
+        or with per-unit changes (one bulk_update):
+            {"units": [{"id": 10, "rent_amount": "1300.00"}, {"id": 11, "status": "occupied"}]}
+        Filter keys: property, floor, status, ids, unit_ids. unit_id itself
+        can't be changed.
+        """
+        if 'units' in request.data:
+            return self.bulk_update_rows(request.data.get('units'))
+
+        lookup = request.data.get('filter') or {}
+        changes = request.data.get('changes') or {}
+        if not isinstance(lookup, dict) or not lookup or set(lookup) - set(self.BULK_UPDATE_FILTERS):
+            return Response({
+                'error': f'"filter" must be an object using some of: {", ".join(self.BULK_UPDATE_FILTERS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if any(not isinstance(lookup[key], list) for key in ('ids', 'unit_ids') if key in lookup):
+            return Response({'error': '"ids" and "unit_ids" filters must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+        validated = self.validate_unit_changes(changes)
+        if isinstance(validated, Response):
+            return validated
+
+        queryset = self.get_queryset().filter(**{self.BULK_UPDATE_FILTERS[key]: value for key, value in lookup.items()})
+        with transaction.atomic():
+            # Pin the matched ids first: the changes may alter filtered fields
+            ids = list(queryset.values_list('pk', flat=True))
+            updated = Unit.objects.filter(pk__in=ids).update(**validated, updated_at=timezone.now())
+            bump_generation(request.user.pk)
+        units = Unit.objects.filter(pk__in=ids).order_by('pk')
+        return Response({'updated': updated, 'units': UnitSerializer(units, many=True).data})
+
+    def validate_unit_changes(self, changes):
+        if not isinstance(changes, dict) or not changes:
+            return Response({'error': '"changes" must be a non-empty object'}, status=status.HTTP_400_BAD_REQUEST)
+        if 'unit_id' in changes or 'property' in changes:
+            return Response({'error': 'unit_id and property cannot be changed in bulk'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = UnitBulkItemSerializer(data=changes, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return serializer.validated_data
+
+    def bulk_update_rows(self, rows):
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return Response({'error': '"units" must be a non-empty list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > UnitRangeSerializer.MAX_UNITS:
+            return Response({'error': f'At most {UnitRangeSerializer.MAX_UNITS} units can be updated per request'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = []
+        for row in rows:
+            try:
+                ids.append(int(row.get('id')))
+            except (TypeError, ValueError):
+                ids.append(None)
+        units = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+
+        errors, changed_fields = [], set()
+        for index, (pk, row) in enumerate(zip(ids, rows)):
+            unit = units.get(pk)
+            changes = {key: value for key, value in row.items() if key != 'id'}
+            if unit is None:
+                errors.append({'row': index + 1, 'id': row.get('id'), 'errors': {'id': ['Unit not found or not owned by you.']}})
+                continue
+            validated = self.validate_unit_changes(changes)
+            if isinstance(validated, Response):
+                errors.append({'row': index + 1, 'id': unit.pk, 'errors': validated.data})
+                continue
+            for field, value in validated.items():
+                setattr(unit, field, value)
+            changed_fields.update(validated)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        for unit in units.values():
+            unit.updated_at = now
+        Unit.objects.bulk_update(list(units.values()), [*sorted(changed_fields), 'updated_at'], batch_size=500)
+        bump_generation(self.request.user.pk)
+        ordered = sorted(units.values(), key=lambda unit: unit.pk)
+        return Response({'updated': len(ordered), 'units': UnitSerializer(ordered, many=True).data})
+
+class TenantViewSet(ConditionalGetMixin, LandlordCachedListMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = TenantSerializer
     permission_classes = [IsLandlord]
+    pagination_class = KeysetPagination
+    cache_endpoint = 'tenants'
 
     def get_queryset(self):
         # Only show tenants for units owned by the requesting user
@@ -347,6 +471,7 @@ class TenantViewSet(viewsets.ModelViewSet):
         unit.save()
         instance.delete()
 
+    @retry_on_locked
     def destroy(self, request, *args, **kwargs):
         """
         Override destroy method to ensure proper JSON response
@@ -355,6 +480,7 @@ class TenantViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @retry_on_locked
     def create(self, request, *args, **kwargs):
         try:
             # Extract data from request
@@ -370,29 +496,26 @@ class TenantViewSet(viewsets.ModelViewSet):
                     'error': 'Email, first_name, last_name, phone, and unit_id are required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Find or create user
-            user, created = User.objects.get_or_create(
-                email=email,
-                defaults={
-                    'first_name': first_name,
-                    'last_name': last_name,
-                    'phone': phone,
-                }
-            )
-            
-            # Update user info if not created (in case landlord wants to update existing user)
-            if not created:
+            # Find or create user; an existing account matches whatever the
+            # case of the address given
+            user = User.objects.by_email(email).first()
+            if user is None:
+                user = User.objects.create(email=email, first_name=first_name, last_name=last_name, phone=phone)
+            else:
+                # Update user info (in case landlord wants to update existing user)
                 user.first_name = first_name
                 user.last_name = last_name
                 user.phone = phone
                 user.save()
             
-            # Find the unit
+            # Find the unit; unit IDs are only unique per property, so narrow
+            # to the (property, unit_id) key when the client supplies it
+            unit_lookup = {'unit_id': unit_id, 'property__landlord': request.user}
+            property_id = request.data.get('property_id') or request.data.get('propertyId')
+            if property_id:
+                unit_lookup['property_id'] = property_id
             try:
-                unit = Unit.objects.get(
-                    unit_id=unit_id,
-                    property__landlord=request.user
-                )
+                unit = Unit.objects.get(**unit_lookup)
             except Unit.DoesNotExist:
                 return Response({
                     'error': f'Unit {unit_id} not found or not owned by you'
@@ -442,11 +565,14 @@ class TenantViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
         except Exception as e:
+            if is_locked(e):
+                # Let retry_on_locked run the view again
+                raise
             return Response({
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -454,31 +580,93 @@ class PaymentViewSet(viewsets.ModelViewSet):
         # Only show payments for units owned by the requesting user
         return Payment.objects.filter(unit__property__landlord=self.request.user)
 
-class NoticeViewSet(viewsets.ModelViewSet):
-    queryset = Notice.objects.all().order_by('-date_sent')
+class NoticeViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = NoticeSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsLandlordOrReadOnly]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-date_sent', '-id')
+
+    def get_queryset(self):
+        user = self.request.user
+        since = self.get_since()
+        # Landlords see the notices they sent; targets are checked against
+        # their properties on write, so this covers all of their portfolio
+        if request_has_role(self.request, 'landlord'):
+            notices = Notice.objects.filter(sender=user)
+            return notices.filter(date_sent__gt=since) if since else notices
+        # Tenants see the notices delivered to them; "since" is a range on
+        # the same delivery index, so it never scans other users' notices
+        elif request_has_role(self.request, 'tenant'):
+            if since:
+                return Notice.objects.filter(deliveries__recipient=user, deliveries__delivered_at__gt=since)
+            return Notice.objects.filter(deliveries__recipient=user)
+        return Notice.objects.none()
+
+    def get_since(self):
+        value = self.request.query_params.get('since')
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise serializers.ValidationError({'since': 'Expected an ISO 8601 datetime.'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def check_targets(self, serializer):
+        user = self.request.user
+        data = serializer.validated_data
+        for name, owner in (('property', lambda obj: obj.landlord_id),
+                            ('unit', lambda obj: obj.property.landlord_id),
+                            ('tenant', lambda obj: obj.unit.property.landlord_id)):
+            target = data.get(name)
+            if target is not None and owner(target) != user.id:
+                raise serializers.ValidationError({name: f'{name.title()} not found or not owned by you.'})
+
+    def perform_create(self, serializer):
+        self.check_targets(serializer)
+        with transaction.atomic():
+            notice = serializer.save(sender=self.request.user)
+            notice.deliver()
 
+    def perform_update(self, serializer):
+        self.check_targets(serializer)
+        instance = serializer.instance
+        targets = (instance.property_id, instance.unit_id, instance.tenant_id)
+        with transaction.atomic():
+            notice = serializer.save()
+            if (notice.property_id, notice.unit_id, notice.tenant_id) != targets:
+                notice.redeliver()
+
+    @retry_on_locked
     def create(self, request, *args, **kwargs):
         try:
             return super().create(request, *args, **kwargs)
+        except serializers.ValidationError:
+            raise
         except Exception as e:
+            if is_locked(e):
+                # Let retry_on_locked run the view again
+                raise
             import traceback
             print("Notice creation error:", e)
             traceback.print_exc()
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class LandlordMaintenanceViewSet(viewsets.ModelViewSet):
+class LandlordMaintenanceViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = LandlordMaintenanceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         # Landlords see maintenance for their properties
-        if user.roles.filter(name='landlord').exists():
+        if request_has_role(self.request, 'landlord'):
             return LandlordMaintenance.objects.filter(property__landlord=user)
         # Tenants see their own maintenance requests
-        elif user.roles.filter(name='tenant').exists():
+        elif request_has_role(self.request, 'tenant'):
             return LandlordMaintenance.objects.filter(tenant__user=user)
         # Default to empty queryset for other roles
         return LandlordMaintenance.objects.none()
@@ -486,7 +674,7 @@ class LandlordMaintenanceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         user = self.request.user
         # If tenant is creating, set them as the tenant
-        if user.roles.filter(name='tenant').exists():
+        if request_has_role(self.request, 'tenant'):
             tenant = Tenant.objects.filter(user=user).first()
             if tenant:
                 serializer.save(tenant=tenant, requested_by=user)
@@ -500,7 +688,7 @@ class LandlordMaintenanceViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         # Only landlords can update status and assignment
-        if user.roles.filter(name='landlord').exists():
+        if request_has_role(self.request, 'landlord'):
             # Check if assignment is happening (either assigned_to or assignee_name/phone)
             is_assigning = (
                 serializer.validated_data.get('assigned_to') or
@@ -518,7 +706,7 @@ class LandlordMaintenanceViewSet(viewsets.ModelViewSet):
         
         serializer.save()
 
-class MaintenanceMessageViewSet(viewsets.ModelViewSet):
+class MaintenanceMessageViewSet(RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = MaintenanceMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -526,20 +714,77 @@ class MaintenanceMessageViewSet(viewsets.ModelViewSet):
         # Only show maintenance messages for properties owned by the requesting user
         return MaintenanceMessage.objects.filter(maintenance__property__landlord=self.request.user)
 
-class ChatMessageViewSet(viewsets.ModelViewSet):
+class ChatMessageViewSet(RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = ChatMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-timestamp', '-id')
+
+    # Lists page from the hot table into the archive (see edoAPI.archive)
+    pagination_class = ReadThroughKeysetPagination
 
     def get_queryset(self):
+        return self.scope(ChatMessage.objects.all())
+
+    def get_archive_queryset(self):
+        return with_query_plan(self.scope(ArchivedChatMessage.objects.all()), self.get_serializer_class())
+
+    def get_object(self):
+        # Detail requests read through to the archive when the id is not hot
+        try:
+            return super().get_object()
+        except Http404:
+            instance = get_object_or_404(self.get_archive_queryset(), pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            self.check_object_permissions(self.request, instance)
+            return instance
+
+    def scope(self, queryset):
         # Only show chat messages where the user is the sender or recipient
-        return ChatMessage.objects.filter(
+        queryset = queryset.filter(
             models.Q(sender=self.request.user) | models.Q(recipient=self.request.user)
         )
+        conversation = self.request.query_params.get('conversation')
+        if conversation:
+            if not conversation.isdigit():
+                raise serializers.ValidationError({'conversation': 'A valid integer is required.'})
+            queryset = queryset.filter(conversation_id=conversation)
+        return queryset
 
     def perform_create(self, serializer):
         # Set the sender to the current user
         serializer.save(sender=self.request.user)
-        
+
+    def perform_update(self, serializer):
+        was_read = serializer.instance.is_read
+        with transaction.atomic():
+            message = serializer.save()
+            # Keep the recipient's unread count in step with the flag
+            if message.is_read != was_read and message.conversation_id and message.recipient_id != message.sender_id:
+                ConversationParticipant.objects.filter(
+                    conversation_id=message.conversation_id, user_id=message.recipient_id,
+                ).update(unread_count=Greatest(
+                    F('unread_count') + (-1 if message.is_read else 1), 0, output_field=models.PositiveIntegerField(),
+                ))
+
+    @retry_on_locked
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        # Archived messages are read and settled; restore them to edit
+        if isinstance(instance, ArchivedChatMessage):
+            return Response({'error': 'Archived messages cannot be edited.'}, status=status.HTTP_409_CONFLICT)
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        if isinstance(instance, ArchivedChatMessage):
+            # Never a conversation's latest or unread message: nothing to repair
+            instance.delete()
+            return
+        Conversation.delete_messages(ChatMessage.objects.filter(pk=instance.pk))
+
+    @retry_on_locked
     def destroy(self, request, *args, **kwargs):
         # Get the message instance
         instance = self.get_object()
@@ -556,32 +801,79 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
         
     @action(detail=False, methods=['post'])
+    @retry_on_locked
     def delete_multiple(self, request):
-        # Get message IDs from request data
-        message_ids = request.data.get('message_ids', [])
-        
-        if not message_ids:
-            return Response(
-                {"detail": "No message IDs provided."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        # Get messages that belong to the user
-        messages = ChatMessage.objects.filter(
-            id__in=message_ids,
-            sender=request.user
-        )
-        
-        # Delete the messages
-        deleted_count = messages.count()
-        messages.delete()
-        
+        """
+        Delete the caller's own messages by id list (message_ids) or by range
+        (conversation plus from_id/to_id and/or since/until) in one statement.
+        """
+        selection = ChatMessageRangeSerializer(data=request.data)
+        if not selection.is_valid():
+            if not request.data.get('message_ids') and 'conversation' not in request.data:
+                return Response({"detail": "No message IDs provided."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(selection.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        deleted_count = Conversation.delete_messages(selection.apply(ChatMessage.objects.filter(sender=request.user)))
+        # Then the archived ones; a retry after a lock only deletes what is left
+        archived = selection.apply(ArchivedChatMessage.objects.filter(sender=request.user))
+        deleted_count += archived._raw_delete(archived.db)
         return Response(
-            {"detail": f"Successfully deleted {deleted_count} messages."},
+            {"detail": f"Successfully deleted {deleted_count} messages.", "deleted": deleted_count},
             status=status.HTTP_200_OK
         )
 
-class LandlordListView(ListAPIView):
+    @action(detail=False, methods=['post'], url_path='mark-read', url_name='mark-read')
+    @retry_on_locked
+    def mark_read(self, request):
+        """
+        Mark the caller's received messages in a conversation read, up to
+        to_id and/or until when given, with a single UPDATE. Only the hot
+        table is touched: archived messages are read by definition.
+        """
+        selection = ChatMessageRangeSerializer(data=request.data)
+        selection.is_valid(raise_exception=True)
+        data = selection.validated_data
+        if 'conversation' not in data:
+            raise serializers.ValidationError({'conversation': 'This field is required.'})
+        entry = ConversationParticipant.objects.filter(
+            conversation_id=data['conversation'], user=request.user,
+        ).select_related('conversation').first()
+        if entry is None:
+            return Response({"detail": "Conversation not found."}, status=status.HTTP_404_NOT_FOUND)
+        marked = entry.conversation.mark_read(request.user, up_to_id=data.get('to_id'), until=data.get('until'))
+        return Response({'conversation': entry.conversation_id, 'marked_read': marked})
+
+class ConversationViewSet(QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The caller's inbox: one entry per conversation, most recently active
+    first, with the latest message and the caller's unread count.
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-last_activity', '-id')
+    lookup_field = 'conversation_id'
+    lookup_url_kwarg = 'pk'
+
+    def get_queryset(self):
+        return ConversationParticipant.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    @retry_on_locked
+    def read(self, request, pk=None):
+        entry = self.get_object()
+        marked = entry.conversation.mark_read(request.user)
+        return Response({'conversation': entry.conversation_id, 'marked_read': marked})
+
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        # Sums stored counters; never counts messages
+        totals = ConversationParticipant.objects.filter(user=request.user, unread_count__gt=0).aggregate(
+            total=Sum('unread_count'), conversations=Count('id'),
+        )
+        return Response({'total': totals['total'] or 0, 'conversations': totals['conversations']})
+
+class LandlordListView(QueryPlanMixin, ListAPIView):
     """
     View to list all landlords with their property counts
     """
@@ -590,23 +882,22 @@ class LandlordListView(ListAPIView):
     
     def get_queryset(self):
         # Get all users who have the landlord role
-        landlord_role = Role.objects.get(name='landlord')
-        return User.objects.filter(roles=landlord_role).distinct()
+        return User.objects.with_role(Role.RoleName.LANDLORD).annotate(property_count=Count('landlord_properties'))
 
-class LandlordDetailView(RetrieveAPIView):
+class LandlordDetailView(PropertySummaryMixin, ReplicaReadMixin, ConditionalGetMixin, QueryPlanMixin, RetrieveAPIView):
     """
     View to get details of a specific landlord including their properties
     """
     serializer_class = LandlordDetailSerializer
+    summary_serializer_class = LandlordDetailSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
     
     def get_queryset(self):
         # Get all users who have the landlord role
-        landlord_role = Role.objects.get(name='landlord')
-        return User.objects.filter(roles=landlord_role).distinct().prefetch_related('landlord_properties')
+        return User.objects.with_role(Role.RoleName.LANDLORD)
 
-class LandlordPropertyUnitsView(ListAPIView):
+class LandlordPropertyUnitsView(ConditionalGetMixin, QueryPlanMixin, ListAPIView):
     """
     View to get all units for a specific landlord property
     """
@@ -617,7 +908,7 @@ class LandlordPropertyUnitsView(ListAPIView):
         property_id = self.kwargs.get('property_id')
         return Unit.objects.filter(property_id=property_id, property__landlord=self.request.user)
 
-class TenantInvitationViewSet(viewsets.ModelViewSet):
+class TenantInvitationViewSet(ConditionalGetMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tenant invitations
     """
@@ -628,13 +919,14 @@ class TenantInvitationViewSet(viewsets.ModelViewSet):
         return TenantInvitation.objects.filter(landlord=self.request.user)
 
     def perform_create(self, serializer):
-        invitation = serializer.save()
-        # Here you would send the invitation email/SMS
-        # For now, we'll just save the invitation
+        with transaction.atomic():
+            invitation = serializer.save()
+            queue_tenant_invitation_email(invitation)
         return invitation
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@retry_on_locked
 def create_tenant_invitation(request):
     """
     Create a tenant invitation
@@ -651,7 +943,7 @@ def create_tenant_invitation(request):
         
         # Find the unit
         try:
-            unit = Unit.objects.get(
+            unit = Unit.objects.select_related('property').get(
                 unit_id=unit_number,
                 property_id=property_id,
                 property__landlord=request.user
@@ -677,21 +969,81 @@ def create_tenant_invitation(request):
         
         serializer = TenantInvitationSerializer(data=invitation_data, context={'request': request})
         if serializer.is_valid():
-            invitation = serializer.save()
-            
-            # Send invitation email
-            email_sent = send_tenant_invitation_email(invitation)
+            # The email is queued in the invitation's transaction and sent
+            # by the process_outbox worker
+            with transaction.atomic():
+                # Reuse the unit (with its property) fetched above for the email
+                invitation = serializer.save(unit=unit)
+                queue_tenant_invitation_email(invitation)
             
             return Response({
-                'message': 'Invitation sent successfully' + (' (email sent)' if email_sent else ' (email failed)'),
+                'message': 'Invitation sent successfully (email queued)',
                 'invitation': serializer.data
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
+        if is_locked(e):
+            # Let retry_on_locked run the view again
+            raise
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def query_flag(request, name):
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+@retry_on_locked
+def run_tenant_import(landlord, mode, rows, default_property_id=None, **options):
+    # Each attempt validates the rows afresh
+    importer = TenantBulkImport(landlord, mode, rows, default_property_id=default_property_id)
+    return importer.run(**options)
+
+@api_view(['POST'])
+@permission_classes([IsLandlord])
+@parser_classes([JSONParser, CSVRowParser, NDJSONRowParser, MultiPartParser])
+def bulk_import_tenants(request):
+    """
+    Invite or import many tenants at once from a JSON array, NDJSON or CSV
+    body, or a multipart `file` upload. Rows take the same fields as
+    create_tenant_invitation / TenantViewSet.create (unit_id, property_id,
+    email, names, phone, dates...).
+
+    Query parameters:
+    - mode: 'invite' (default) creates invitations and queues their emails;
+      'import' creates tenancies directly
+    - property_id: default property for rows that don't name one
+    - dry_run=true: validate only
+    - atomic=true: write nothing unless every row is valid
+
+    Valid rows are written even when others fail unless atomic is set; the
+    response lists a result per row.
+    """
+    mode = request.query_params.get('mode', 'invite')
+    if mode not in ('invite', 'import'):
+        return Response({'error': 'mode must be "invite" or "import"'}, status=status.HTTP_400_BAD_REQUEST)
+    # Read once, outside the retry: streamed CSV/NDJSON bodies can't be read again
+    rows = read_rows(request)
+    if not rows:
+        return Response({'error': 'No rows provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = run_tenant_import(
+            request.user, mode, rows, default_property_id=request.query_params.get('property_id'),
+            dry_run=query_flag(request, 'dry_run'), all_or_nothing=query_flag(request, 'atomic'),
+        )
+    except IntegrityError:
+        # A unit was taken by a concurrent request between validation and insert
+        return Response({'error': 'Units changed during the import; please retry'}, status=status.HTTP_409_CONFLICT)
+
+    if result['dry_run']:
+        response_status = status.HTTP_200_OK
+    elif result['created']:
+        response_status = status.HTTP_201_CREATED
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response(result, status=response_status)
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@retry_on_locked
 def accept_invitation(request, invitation_code):
     """
     Accept a tenant invitation - can be used for both account creation and quick approval
@@ -755,58 +1107,67 @@ def accept_invitation(request, invitation_code):
     except TenantInvitation.DoesNotExist:
         return Response({'error': 'Invalid invitation code'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
+        if is_locked(e):
+            # Let retry_on_locked run the view again
+            raise
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def search_messages(request):
+    """
+    Full-text search over the caller's chat conversations and maintenance
+    threads. ?q= is required; ?type=chat|maintenance narrows it and ?limit=
+    caps the results (default 20, at most 50). Results are best match first
+    with <mark>-highlighted snippets.
+    """
+    query = request.query_params.get('q', '').strip()
+    if len(query) < 2:
+        return Response({'q': 'Enter at least 2 characters.'}, status=status.HTTP_400_BAD_REQUEST)
+    kind = request.query_params.get('type')
+    if kind and kind not in SEARCHABLE_MESSAGES:
+        return Response({'type': f'Must be one of: {", ".join(SEARCHABLE_MESSAGES)}.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+    except ValueError:
+        return Response({'limit': 'A valid integer is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    results = find_messages(request.user, query, kinds=(kind,) if kind else tuple(SEARCHABLE_MESSAGES), limit=limit)
+    return Response({'query': query, 'results': results})
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def search_users_by_email(request):
     """
-    Search for users by email for auto-suggestions in invitation form
+    Search for users by email for auto-suggestions in invitation form.
+
+    Suggestions come from the requesting landlord's own contacts (tenants and
+    invitees), ranked exact email, email prefix, name prefix, then substring.
+    Other accounts are only suggested on an exact email match.
     """
     query = request.GET.get('q', '').strip()
     
     if not query or len(query) < 2:
         return Response({'suggestions': []}, status=status.HTTP_200_OK)
     
-    # Search for users by email (partial match)
-    users = User.objects.filter(
-        email__icontains=query
-    ).values('id', 'email', 'first_name', 'last_name', 'phone')[:10]  # Limit to 10 results
-    
-    # Also search for existing tenants by email
-    tenants = Tenant.objects.filter(
-        email__icontains=query
-    ).values('id', 'email', 'first_name', 'last_name', 'phone')[:10]
-    
-    # Combine and deduplicate results
-    all_results = []
-    seen_emails = set()
-    
-    for user in users:
-        if user['email'] not in seen_emails:
-            all_results.append({
-                'id': user['id'],
-                'email': user['email'],
-                'first_name': user['first_name'],
-                'last_name': user['last_name'],
-                'phone': user['phone'],
-                'type': 'user'
-            })
-            seen_emails.add(user['email'])
+    suggestions = []
+    for contact in search_contacts(request.user.id, query, limit=10):
+        suggestions.append({
+            'id': contact['user_id'] or contact['tenant_id'],
+            'email': contact['email'],
+            'first_name': contact['first_name'],
+            'last_name': contact['last_name'],
+            'phone': contact['phone'],
+            'type': 'user' if contact['user_id'] else contact['kind'],
+            'match': CONTACT_MATCHES[contact['rank']],
+        })
+
+    has_exact = bool(suggestions) and suggestions[0]['match'] == 'exact'
+    if '@' in query and not has_exact:
+        user = User.objects.by_email(query).values('id', 'email', 'first_name', 'last_name', 'phone').first()
+        if user is not None:
+            suggestions = [{**user, 'type': 'user', 'match': 'exact'}] + suggestions[:9]
     
-    for tenant in tenants:
-        if tenant['email'] not in seen_emails:
-            all_results.append({
-                'id': tenant['id'],
-                'email': tenant['email'],
-                'first_name': tenant['first_name'],
-                'last_name': tenant['last_name'],
-                'phone': tenant['phone'],
-                'type': 'tenant'
-            })
-            seen_emails.add(tenant['email'])
-    
-    return Response({'suggestions': all_results}, status=status.HTTP_200_OK)
+    return Response({'suggestions': suggestions}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -819,23 +1180,16 @@ def check_user_by_email(request):
     if not email:
         return Response({'error': 'Email is required.'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        # Check if user exists
-        users = User.objects.filter(email__iexact=email)
-        if users.exists():
-            user = users.first()
-            # Check if this email is already registered as a tenant
-            is_tenant = Tenant.objects.filter(email__iexact=email).exists()
-            
+        # One indexed lookup answers both questions
+        user = User.objects.by_email(email).annotate(
+            is_tenant=models.Exists(Tenant.objects.filter(email_key=models.OuterRef('email_key')))
+        ).values('id', 'email', 'first_name', 'last_name', 'phone', 'is_tenant').first()
+        if user is not None:
+            is_tenant = user.pop('is_tenant')
             return Response({
                 'exists': True,
                 'is_tenant': is_tenant,
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'phone': user.phone,
-                }
+                'user': user,
             }, status=status.HTTP_200_OK)
         else:
             return Response({'exists': False}, status=status.HTTP_200_OK)
@@ -844,6 +1198,7 @@ def check_user_by_email(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@read_from_replica
 def tenant_rentals(request):
     """
     Get rental properties for the authenticated tenant
@@ -853,14 +1208,14 @@ def tenant_rentals(request):
         user = request.user
         
         # Check if user is a tenant
-        if not user.has_role('tenant'):
+        if not request_has_role(request, 'tenant'):
             return Response({
                 'error': 'Access denied. Only tenants can view their rentals.'
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Get all tenancies for this user
         tenancies = Tenant.objects.filter(user=user).select_related(
-            'unit__property'
+            'unit__property__landlord'
         )
         
         rentals = []
@@ -917,15 +1272,18 @@ def tenant_maintenance_requests(request):
     """
     try:
         tenant = Tenant.objects.get(user=request.user)
-        maintenance_requests = LandlordMaintenance.objects.filter(tenant=tenant).order_by('-created_at')
+        maintenance_requests = with_query_plan(
+            LandlordMaintenance.objects.filter(tenant=tenant),
+            LandlordMaintenanceSerializer, request
+        )
         
-        serializer = LandlordMaintenanceSerializer(maintenance_requests, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginate(request, maintenance_requests, LandlordMaintenanceSerializer)
     except Tenant.DoesNotExist:
         return Response({'error': 'Tenant profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@retry_on_locked
 def create_tenant_maintenance_request(request):
     """
     Create a new maintenance request as a tenant
@@ -948,38 +1306,59 @@ def create_tenant_maintenance_request(request):
     except Tenant.DoesNotExist:
         return Response({'error': 'Tenant profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([IsLandlord])
+@read_from_replica
+@cached_per_landlord('dashboard')
+def landlord_dashboard(request):
+    """
+    Occupancy, rent roll, maintenance, vacate requests and recent activity
+    for the landlord's portfolio in one response (see edoAPI.dashboard)
+    """
+    return Response(build_landlord_dashboard(request.user))
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@read_from_replica
+@cached_per_landlord('maintenance_requests')
 def landlord_maintenance_requests(request):
     """
     Get maintenance requests for properties owned by the current landlord
     """
     try:
-        maintenance_requests = LandlordMaintenance.objects.filter(
-            property__landlord=request.user
-        ).order_by('-created_at')
+        maintenance_requests = with_query_plan(
+            LandlordMaintenance.objects.filter(property__landlord=request.user),
+            LandlordMaintenanceSerializer, request
+        )
         
-        serializer = LandlordMaintenanceSerializer(maintenance_requests, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginate(request, maintenance_requests, LandlordMaintenanceSerializer)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class VacateRequestViewSet(viewsets.ModelViewSet):
+class VacateRequestViewSet(ConditionalGetMixin, LandlordCachedListMixin, RetryOnLockedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = VacateRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_endpoint = 'vacate_requests'
+
+    def cache_landlord_id(self, request):
+        # Tenants see their own requests (see get_queryset); only cache the landlord view
+        if request_has_role(request, 'tenant') or not request_has_role(request, 'landlord'):
+            return None
+        return request.user.pk
     
     def get_queryset(self):
         user = self.request.user
         # Tenants can only see their own vacate requests
-        if user.roles.filter(name='tenant').exists():
+        if request_has_role(self.request, 'tenant'):
             try:
                 tenant = Tenant.objects.get(user=user)
                 return VacateRequest.objects.filter(tenant=tenant)
             except Tenant.DoesNotExist:
                 return VacateRequest.objects.none()
         # Landlords can see vacate requests for their properties
-        elif user.roles.filter(name='landlord').exists():
+        elif request_has_role(self.request, 'landlord'):
             return VacateRequest.objects.filter(property__landlord=user)
         # Default to empty queryset for other roles
         return VacateRequest.objects.none()
@@ -987,7 +1366,7 @@ class VacateRequestViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         user = self.request.user
         # Only tenants can create vacate requests
-        if not user.roles.filter(name='tenant').exists():
+        if not request_has_role(self.request, 'tenant'):
             raise serializers.ValidationError("Only tenants can submit vacate requests")
         
         try:
@@ -1034,12 +1413,13 @@ class VacateRequestViewSet(viewsets.ModelViewSet):
         
         serializer.save(tenant=tenant, unit=unit, property=property_obj)
     
+    @retry_on_locked
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         user = request.user
         
         # Check if user is authorized to update this vacate request
-        if user.roles.filter(name='tenant').exists() and instance.tenant.user == user:
+        if request_has_role(request, 'tenant') and instance.tenant.user_id == user.id:
             # Tenants can only withdraw their own requests when pending
             if 'status' in request.data and request.data['status'] == 'withdrawn':
                 # Only allow withdrawing if current status is pending
@@ -1059,7 +1439,7 @@ class VacateRequestViewSet(viewsets.ModelViewSet):
                     {'error': 'Tenants can only withdraw their requests'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        elif user.roles.filter(name='landlord').exists() and instance.property.landlord == user:
+        elif request_has_role(request, 'landlord') and instance.property.landlord_id == user.id:
             # Landlords can only update status to approved/declined for their own properties
             if 'status' in request.data:
                 new_status = request.data['status']
@@ -1096,5 +1476,6 @@ class VacateRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
     
+    @retry_on_locked
     def partial_update(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
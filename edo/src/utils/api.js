@@ -208,6 +208,11 @@ const apiRequest = async (endpoint, options = {}, retry = true) => {
   }
 };
 
+// Paginated lists (users, tenants, chat messages, notices, maintenance
+// requests) return { next, previous, results }; callers here want the rows
+const listResults = (data) =>
+  Array.isArray(data) ? data : data?.results || [];
+
 // Authentication API
 export const authAPI = {
   // Register user
@@ -274,7 +279,7 @@ export const authAPI = {
 export const userAPI = {
   // Get all users
   getUsers: async () => {
-    return await apiRequest("/users/");
+    return listResults(await apiRequest("/users/"));
   },
 
   // Get user by ID
@@ -411,7 +416,7 @@ export const tenantAPI = {
 export const landlordTenantAPI = {
   // Fetch all tenants for the logged-in landlord
   list: async () => {
-    return await apiRequest("/tenants/", { method: "GET" });
+    return listResults(await apiRequest("/tenants/", { method: "GET" }));
   },
   // Add a new tenant
   create: async (tenantData) => {
@@ -494,7 +499,9 @@ export const becomeTenant = async () => {
 export const chatAPI = {
   // Get chat messages
   getMessages: async () => {
-    return await apiRequest("/chat-messages/", { method: "GET" });
+    return listResults(
+      await apiRequest("/chat-messages/", { method: "GET" })
+    );
   },
   // Send a chat message
   sendMessage: async (messageData) => {